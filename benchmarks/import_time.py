@@ -0,0 +1,51 @@
+"""Benchmarks bot startup import time and memory per set of enabled games
+
+Run from the repository root with: python -m benchmarks.import_time [repeats]
+"""
+
+from statistics import median
+from subprocess import run
+from sys import argv, executable
+
+game_sets: list[list[str]] = [[], ["mg"], ["bj"], ["ty"], ["mg", "bj", "ty"]]
+"""Sets of enabled games to measure startup for"""
+
+# Runs in a fresh interpreter each time so that nothing is cached between measurements
+probe = """
+import tracemalloc
+from time import perf_counter
+tracemalloc.start()
+start = perf_counter()
+import modules.misc.chips
+from modules.games.registry import load_games
+load_games({games!r})
+import modules.misc.misc
+print("RESULT", perf_counter() - start, tracemalloc.get_traced_memory()[1])
+"""
+
+def measure(games: list[str]) -> tuple[float, int]:
+    """Import the base modules and the given games in a subprocess
+
+    ### Parameters
+    games: list[str]
+        Command prefixes of the games to load
+
+    ### Returns
+    tuple[float, int]
+        Seconds spent importing, and peak traced memory in bytes
+    """
+
+    result = run([executable, "-c", probe.format(games = games)], capture_output = True, text = True, check = True)
+    line = [line for line in result.stdout.splitlines() if line.startswith("RESULT")][-1]
+    _, seconds, peak = line.split()
+    return float(seconds), int(peak)
+
+if __name__ == "__main__":
+    repeats = int(argv[1]) if len(argv) > 1 else 5
+
+    print(f"{'games':<16}{'import (ms)':>14}{'peak mem (KiB)':>18}")
+    for games in game_sets:
+        samples = [measure(games) for _ in range(repeats)]
+        seconds = median(sample[0] for sample in samples)
+        peak = median(sample[1] for sample in samples)
+        print(f"{','.join(games) or '(none)':<16}{seconds * 1000:>14.1f}{peak / 1024:>18.0f}")
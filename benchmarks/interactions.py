@@ -0,0 +1,233 @@
+"""Replays interactions captured by modules.base.recorder against the real command handlers, without Discord
+
+Every interaction goes through the same global and group checks as on Discord, then its handler is called
+with a stand-in ApplicationContext; responses are discarded. Runs on a scratch copy of the database,
+and logs go to a scratch folder, so nothing of the live bot is touched.
+
+Run from the repository root with: python -m benchmarks.interactions <recording> [--speed N] [--database PATH]
+"""
+
+from argparse import ArgumentParser
+from asyncio import run, sleep, gather
+from contextlib import redirect_stdout
+from contextvars import ContextVar
+from io import StringIO
+from json import loads
+from os import chdir, getcwd, makedirs, path
+from shutil import copyfile
+from statistics import mean, quantiles
+from tempfile import mkdtemp
+from time import perf_counter
+from traceback import format_exception
+
+from discord import CheckFailure, SlashCommandGroup, SlashCommandOptionType
+from sqlalchemy import create_engine, event
+
+class FakeUser:
+    """Stands in for a discord.User or discord.Member; only the ID is recorded"""
+
+    def __init__(self, id: int):
+        self.id = id
+        self.mention = f"<@{id}>"
+
+    def __str__(self) -> str:
+        return str(self.id)
+
+class FakeChannel:
+    """Stands in for the channel of an interaction; messages sent are only counted"""
+
+    def __init__(self, id: int):
+        self.id = id
+        self.sent = 0
+
+    def __str__(self) -> str:
+        return str(self.id)
+
+    async def send(self, *args, **kwargs) -> None:
+        self.sent += 1
+
+class FakeInteraction:
+    """Stands in for a discord.Interaction; holds the data the recorder flattened"""
+
+    def __init__(self, id: int, name: str, options: dict):
+        self.id = id
+        # Rebuilt as a single flat command; checks only ever read the name and options from it
+        self.data = {"name": name, "options": [{"name": key, "value": value, "type": 3} for key, value in options.items()]}
+
+class FakeContext:
+    """Stands in for a discord.ApplicationContext, with just what the checks and handlers use"""
+
+    def __init__(self, bot, command, entry: dict, id: int):
+        self.bot = bot
+        self.command = command
+        self.interaction = FakeInteraction(id, entry["cmd"], entry["opt"])
+        self.author = FakeUser(entry["user"])
+        self.channel = FakeChannel(entry["ch"])
+        self.channel_id = entry["ch"]
+        self.guild = entry["guild"]
+        self.guild_id = entry["guild"]
+        self.responses = 0
+
+    async def respond(self, *args, **kwargs) -> None:
+        self.responses += 1
+
+    async def defer(self, *args, **kwargs) -> None:
+        pass
+
+current_queries: ContextVar[list[int] | None] = ContextVar("current_queries", default = None)
+"""Query counter of the interaction being replayed in the current task"""
+
+def count_query(*args) -> None:
+    """Engine event hook; counts a statement towards the interaction running in this task"""
+
+    if (counter := current_queries.get()) is not None:
+        counter[0] += 1
+
+def find_command(bot, name: str):
+    """Get the command object for a full command name, e.g. "admin game set_chips"; None if it no longer exists"""
+
+    commands = bot.pending_application_commands
+    command = None
+    for part in name.split():
+        command = next((cmd for cmd in commands if cmd.name == part), None)
+        if command is None:
+            return None
+        commands = command.subcommands if isinstance(command, SlashCommandGroup) else []
+
+    return command
+
+def command_args(command, options: dict) -> dict:
+    """Build the keyword arguments of a handler from recorded options, filling in defaults"""
+
+    kwargs = {}
+    for option in command.options:
+        value = options.get(option.name, option.default)
+        if option.input_type in (SlashCommandOptionType.user, SlashCommandOptionType.mentionable) and value is not None:
+            value = FakeUser(int(value))
+        kwargs[option.name] = value
+
+    return kwargs
+
+async def replay_one(bot, entry: dict, id: int, results: dict) -> None:
+    """Run the checks and handler of a single interaction, adding its latency and query count to the results,
+    and the traceback of the handler if it raised"""
+
+    command = find_command(bot, entry["cmd"])
+    if command is None:
+        results.setdefault(entry["cmd"], {"missing": 0})["missing"] += 1
+        return
+
+    context = FakeContext(bot, command, entry, id)
+    counter = [0]
+    current_queries.set(counter)
+
+    stats = results.setdefault(entry["cmd"], {"ms": [], "recorded_ms": [], "queries": [], "denied": 0, "errors": 0, "tracebacks": []})
+    start = perf_counter()
+    try:
+        if await bot.can_run(context, call_once = True) and await command.can_run(context):
+            await command.callback(context, **command_args(command, entry["opt"]))
+        else:
+            stats["denied"] += 1
+    except CheckFailure:
+        stats["denied"] += 1
+    except Exception as err:
+        stats["errors"] += 1
+        stats["tracebacks"].append((id, "".join(format_exception(err))))
+    stats["ms"].append((perf_counter() - start) * 1000)
+    stats["recorded_ms"].append(entry["ms"])
+    stats["queries"].append(counter[0])
+
+async def replay_all(bot, entries: list[dict], speed: float) -> dict:
+    """Replay every interaction; one after another if speed is 0, otherwise at their recorded times sped up
+
+    ### Returns
+    dict
+        Full command name mapped to its measurements
+    """
+
+    results = {}
+    if speed <= 0:
+        for id, entry in enumerate(entries):
+            await replay_one(bot, entry, id, results)
+        return results
+
+    start = perf_counter()
+    first = entries[0]["t"]
+
+    async def scheduled(id: int, entry: dict) -> None:
+        await sleep(max(0, (entry["t"] - first) / speed - (perf_counter() - start)))
+        await replay_one(bot, entry, id, results)
+
+    await gather(*(scheduled(id, entry) for id, entry in enumerate(entries)))
+    return results
+
+def percentile(samples: list[float], share: int) -> float:
+    """Rough percentile that also works on a single sample"""
+
+    if len(samples) < 2:
+        return samples[0]
+    return quantiles(samples, n = 100, method = "inclusive")[share - 1]
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description = "Replay recorded interactions against the command handlers, reporting latency and queries")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type = float, default = 0, help = "Speed-up over the recorded timing; 0 replays back to back")
+    parser.add_argument("--database", help = "Database to start from, e.g. a backup taken when recording began; copied, never modified")
+    parser.add_argument("--show-output", action = "store_true", help = "Print the bot's log lines while replaying")
+    args = parser.parse_args()
+
+    with open(args.recording, "r", encoding = "utf-8") as file:
+        entries = sorted((loads(line) for line in file if line.strip()), key = lambda entry: entry["t"])
+    if not entries:
+        parser.error("Recording is empty")
+
+    # Load the bot the same way main.py does, minus the recorder and syncing to Discord
+    from modules.base.auxiliary import config
+    from modules.base.bot import bot_client, database_connector, SQLBase
+    from modules.games.registry import load_games
+    import modules.misc.chips
+    load_games(config["games"]["enabled"])
+    import modules.misc.misc
+    import modules.misc.leaderboard
+
+    scratch = mkdtemp(prefix = "c1rc3_replay_")
+    makedirs(path.join(scratch, "logs"))
+    database = path.join(scratch, "db.sqlite")
+    if args.database:
+        copyfile(args.database, database)
+
+    engine = create_engine("sqlite:///" + database)
+    event.listen(engine, "before_cursor_execute", count_query)
+    SQLBase.metadata.create_all(engine)
+    database_connector.configure(bind = engine)
+
+    # Logs are written relative to the working directory
+    cwd = getcwd()
+    chdir(scratch)
+    start = perf_counter()
+    try:
+        if args.show_output:
+            results = run(replay_all(bot_client, entries, args.speed))
+        else:
+            with redirect_stdout(StringIO()):
+                results = run(replay_all(bot_client, entries, args.speed))
+    finally:
+        chdir(cwd)
+    elapsed = perf_counter() - start
+
+    print(f"{len(entries)} interactions in {elapsed:.2f}s; scratch files in {scratch}")
+    print(f"{'command':<32}{'n':>6}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}{'rec. ms':>10}{'queries':>9}{'denied':>8}{'errors':>8}")
+    for name in sorted(results):
+        stats = results[name]
+        if "missing" in stats:
+            print(f"{name:<32}{stats['missing']:>6}  no longer exists")
+            continue
+        print(
+            f"{name:<32}{len(stats['ms']):>6}{mean(stats['ms']):>10.2f}{percentile(stats['ms'], 95):>10.2f}{max(stats['ms']):>10.2f}"
+            f"{mean(stats['recorded_ms']):>10.2f}{mean(stats['queries']):>9.1f}{stats['denied']:>8}{stats['errors']:>8}"
+        )
+
+    # Say why, not just which, commands failed
+    for name in sorted(results):
+        for id, trace in results[name].get("tracebacks", ()):
+            print(f"\nInteraction {id} ({name}) raised:\n{trace}", end = "")
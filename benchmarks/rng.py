@@ -0,0 +1,51 @@
+"""Benchmarks the generators and shuffle paths available to games
+
+Run from the repository root with: python -m benchmarks.rng [shuffles]
+"""
+
+from random import Random, SystemRandom
+from sys import argv
+from time import perf_counter
+
+from modules.base.rng import game_rng, shuffled
+
+def per_card_shuffle(rng: Random, cards: list[int]) -> list[int]:
+    """The standard library shuffle, which draws once per card"""
+
+    cards = list(cards)
+    rng.shuffle(cards)
+    return cards
+
+def time_shuffles(make_rng, shuffle, cards: list[int], shuffles: int) -> float:
+    """Time a number of shuffles, each with a freshly derived generator as games do
+
+    ### Returns
+    float
+        Shuffles per second
+    """
+
+    start = perf_counter()
+    for counter in range(shuffles):
+        shuffle(make_rng(counter), cards)
+
+    return shuffles / (perf_counter() - start)
+
+if __name__ == "__main__":
+    shuffles = int(argv[1]) if len(argv) > 1 else 20000
+    system = SystemRandom()
+
+    generators = (
+        ("seeded", lambda counter: game_rng(12345, counter)),
+        ("system", lambda counter: system),
+    )
+    paths = (
+        ("per card", per_card_shuffle),
+        ("batched", shuffled),
+    )
+
+    for decks in (1, 6):
+        cards = list(range(52)) * decks
+        for gen_name, make_rng in generators:
+            for path_name, shuffle in paths:
+                rate = time_shuffles(make_rng, shuffle, cards, shuffles)
+                print(f"{decks} deck(s)  {gen_name:<8}{path_name:<10}{rate:>12,.0f} shuffles/s")
@@ -0,0 +1,79 @@
+"""Benchmarks the pure rules engine, without Discord or the database
+
+Run from the repository root with: python -m benchmarks.rules [rounds]
+"""
+
+from random import Random
+from sys import argv
+from time import perf_counter
+
+from modules.base import rules
+
+def blackjack_rounds(rounds: int, players: int = 4, stand_on: int = 17, seed: int = 0) -> int:
+    """Play rounds of Blackjack where every player hits until reaching a value
+
+    ### Parameters
+    rounds: int
+        Amount of rounds to play
+    players: int = 4
+        Hands per round
+    stand_on: int = 17
+        Raw hand value at which a player stands
+    seed: int = 0
+        Seed for the deck shuffles
+
+    ### Returns
+    int
+        Amount of hands played
+    """
+
+    rng = Random(seed)
+    for _ in range(rounds):
+        deck = rng.sample(range(52), 52)
+        hands = [rules.BlackjackHand([deck.pop(), deck.pop()]) for _ in range(players)]
+        for hand in hands:
+            while hand.total < stand_on and rules.hit(hand, deck.pop()):
+                pass
+            if hand.state == rules.HandState.HIT:
+                hand.state = rules.HandState.STAND
+        rules.blackjack_winners(hands)
+
+    return rounds * players
+
+def tourney_rounds(rounds: int, players: int = 4, seed: int = 0) -> int:
+    """Play rounds of Tourney where every player plays their cards in order
+
+    ### Parameters
+    rounds: int
+        Amount of rounds to play
+    players: int = 4
+        Hands per round
+    seed: int = 0
+        Seed for the deals
+
+    ### Returns
+    int
+        Amount of hands played
+    """
+
+    rng = Random(seed)
+    size = players + 2
+    for _ in range(rounds):
+        deal = rng.sample(range(52), players * size)
+        hands = [rules.TourneyHand(deal[i * size:(i + 1) * size]) for i in range(players)]
+        for match in range(players + 1):
+            for hand in hands:
+                hand.played = match
+            rules.tourney_match(hands)
+        rules.tourney_winners(hands)
+
+    return rounds * players
+
+if __name__ == "__main__":
+    rounds = int(argv[1]) if len(argv) > 1 else 100000
+
+    for name, game in (("blackjack", blackjack_rounds), ("tourney", tourney_rounds)):
+        start = perf_counter()
+        hands = game(rounds)
+        elapsed = perf_counter() - start
+        print(f"{name:<12}{hands:>10} hands in {elapsed:.2f}s = {hands / elapsed:,.0f} hands/s")
@@ -10,11 +10,85 @@ import modules.base.dbmodels as dbmodels
 
 db = sqlite3.connect("database/dbedit.sqlite")
 c = db.cursor()
+# Same case folding as ChipAccount.name_key, which SQLite's lower() doesn't match beyond ASCII
+db.create_function("casefold", 1, str.casefold, deterministic = True)
 
 stmts = [
     #"SELECT * FROM col",
     #"ALTER TABLE table ADD COLUMN col VARCHAR NOT NULL DEFAULT 'something'",
     #"SELECT * FROM col",
+    # Running hand values; finish any Blackjack rounds in progress first, as existing hands start at 0
+    #"ALTER TABLE blackjack_player ADD COLUMN hand_total INTEGER NOT NULL DEFAULT 0",
+    #"ALTER TABLE blackjack_player ADD COLUMN soft_aces INTEGER NOT NULL DEFAULT 0",
+    #"ALTER TABLE blackjack_player ADD COLUMN hand_size INTEGER NOT NULL DEFAULT 0",
+    # Turn tracking; likewise finish any Blackjack rounds in progress first
+    #"ALTER TABLE blackjack_player ADD COLUMN hand_state INTEGER NOT NULL DEFAULT 0",
+    #"UPDATE blackjack_player SET hand_state = CASE state WHEN 'hit' THEN 0 WHEN 'stand' THEN 1 ELSE 2 END",
+    #"ALTER TABLE blackjack_player DROP COLUMN state",
+    #"ALTER TABLE blackjack_player ADD COLUMN next_hitter INTEGER NOT NULL DEFAULT -1",
+    #"ALTER TABLE blackjack_player ADD COLUMN prev_hitter INTEGER NOT NULL DEFAULT -1",
+    #"ALTER TABLE blackjack ADD COLUMN hitting INTEGER NOT NULL DEFAULT 0",
+    #"ALTER TABLE blackjack ADD COLUMN standing INTEGER NOT NULL DEFAULT 0",
+    #"ALTER TABLE blackjack ADD COLUMN busted INTEGER NOT NULL DEFAULT 0",
+    # Blackjack shoe; games get a fresh shoe on their next round
+    #"ALTER TABLE blackjack ADD COLUMN shoe BLOB NOT NULL DEFAULT x''",
+    #"ALTER TABLE blackjack ADD COLUMN shoe_pos INTEGER NOT NULL DEFAULT 0",
+    #"ALTER TABLE blackjack DROP COLUMN deck",
+    # Per-game random streams; existing games get a seed from the statement below
+    #"ALTER TABLE game ADD COLUMN rng_seed INTEGER NOT NULL DEFAULT 0",
+    #"ALTER TABLE game ADD COLUMN rng_counter INTEGER NOT NULL DEFAULT 0",
+    #"UPDATE game SET rng_seed = abs(random() >> 1)",
+    # Event log of every game; db_update() creates the same table
+    #"CREATE TABLE game_event (id INTEGER NOT NULL PRIMARY KEY, game_id INTEGER NOT NULL, time INTEGER NOT NULL, kind INTEGER NOT NULL, user_id INTEGER, data VARCHAR NOT NULL)",
+    #"CREATE INDEX ix_game_event_game_id ON game_event (game_id)",
+    # Bet alignment count; bets placed before this are only counted again once the bet turn player bets
+    #"ALTER TABLE game ADD COLUMN bets_matching INTEGER NOT NULL DEFAULT 0",
+    # Turn timers; rounds already in progress only get a deadline once their turn next moves
+    #"ALTER TABLE game ADD COLUMN turn_deadline INTEGER",
+    # Idle game cleanup; existing games count as active as of the migration
+    #"ALTER TABLE game ADD COLUMN last_active INTEGER NOT NULL DEFAULT 0",
+    #"UPDATE game SET last_active = CAST(strftime('%s', 'now') AS INTEGER)",
+    #"CREATE INDEX ix_game_last_active ON game (last_active)",
+    # History of finished games; db_update() creates the same tables. Games already in progress are archived as usual
+    #"CREATE TABLE game_history (id INTEGER NOT NULL PRIMARY KEY, game_id INTEGER NOT NULL, type VARCHAR NOT NULL, stake INTEGER NOT NULL, ended INTEGER)",
+    #"CREATE INDEX ix_game_history_game_id ON game_history (game_id)",
+    #"CREATE INDEX ix_game_history_ended ON game_history (ended)",
+    #"CREATE TABLE player_history (id INTEGER NOT NULL PRIMARY KEY, history_id INTEGER NOT NULL REFERENCES game_history (id), user_id INTEGER NOT NULL, time INTEGER NOT NULL, name VARCHAR NOT NULL, place INTEGER, chips VARCHAR NOT NULL, used VARCHAR NOT NULL, tfs VARCHAR NOT NULL)",
+    #"CREATE INDEX ix_player_history_history_id ON player_history (history_id)",
+    #"CREATE INDEX ix_player_history_user_time ON player_history (user_id, time)",
+    # Player and character statistics; db_update() creates the same tables. Rounds ended before this aren't counted
+    #"CREATE TABLE user_stats (user_id INTEGER NOT NULL, period VARCHAR NOT NULL, rounds INTEGER NOT NULL, wins INTEGER NOT NULL, won VARCHAR NOT NULL, lost VARCHAR NOT NULL, blackjacks INTEGER NOT NULL, charlies INTEGER NOT NULL, PRIMARY KEY (user_id, period))",
+    #"CREATE INDEX ix_user_stats_period_wins ON user_stats (period, wins)",
+    #"CREATE TABLE account_stats (name VARCHAR NOT NULL, period VARCHAR NOT NULL, rounds INTEGER NOT NULL, wins INTEGER NOT NULL, won VARCHAR NOT NULL, lost VARCHAR NOT NULL, blackjacks INTEGER NOT NULL, charlies INTEGER NOT NULL, PRIMARY KEY (name, period))",
+    #"CREATE INDEX ix_account_stats_period_wins ON account_stats (period, wins)",
+    # TF entries as rows; db_update() creates the same table. Moves every player's TF list over, keeping indices
+    #"CREATE TABLE tf_entry (game_id INTEGER NOT NULL, user_id INTEGER NOT NULL, position INTEGER NOT NULL, description VARCHAR NOT NULL, cost INTEGER NOT NULL, cost_type INTEGER NOT NULL, done BOOLEAN NOT NULL, PRIMARY KEY (game_id, user_id, position), FOREIGN KEY(user_id, game_id) REFERENCES player (user_id, game_id) ON DELETE CASCADE)",
+    #"INSERT INTO tf_entry SELECT player.game_id, player.user_id, CAST(tf.key AS INTEGER), json_extract(tf.value, '$[0]'), json_extract(tf.value, '$[1]'), json_extract(tf.value, '$[2]'), json_extract(tf.value, '$[3]') FROM player, json_each(player.tfs) AS tf",
+    #"ALTER TABLE player ADD COLUMN tf_next INTEGER NOT NULL DEFAULT 0",
+    #"ALTER TABLE player ADD COLUMN tf_owed VARCHAR NOT NULL DEFAULT '[0, 0, 0, 0, 0, 0]'",
+    #"UPDATE player SET tf_next = json_array_length(tfs), tf_owed = json_array((SELECT coalesce(sum(cost), 0) FROM tf_entry WHERE tf_entry.game_id = player.game_id AND tf_entry.user_id = player.user_id AND NOT done AND cost_type = 0), (SELECT coalesce(sum(cost), 0) FROM tf_entry WHERE tf_entry.game_id = player.game_id AND tf_entry.user_id = player.user_id AND NOT done AND cost_type = 1), (SELECT coalesce(sum(cost), 0) FROM tf_entry WHERE tf_entry.game_id = player.game_id AND tf_entry.user_id = player.user_id AND NOT done AND cost_type = 2), (SELECT coalesce(sum(cost), 0) FROM tf_entry WHERE tf_entry.game_id = player.game_id AND tf_entry.user_id = player.user_id AND NOT done AND cost_type = 3), (SELECT coalesce(sum(cost), 0) FROM tf_entry WHERE tf_entry.game_id = player.game_id AND tf_entry.user_id = player.user_id AND NOT done AND cost_type = 4), (SELECT coalesce(sum(cost), 0) FROM tf_entry WHERE tf_entry.game_id = player.game_id AND tf_entry.user_id = player.user_id AND NOT done AND cost_type = 5))",
+    #"ALTER TABLE player DROP COLUMN tfs",
+    # Account IDs; rebuilds the table, as SQLite can't change a primary key. Fails if two names differ only in case, so rename one first
+    #"CREATE TABLE account_new (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR NOT NULL, name_key VARCHAR NOT NULL, owner_id INTEGER NOT NULL, chips VARCHAR NOT NULL)",
+    #"INSERT INTO account_new (name, name_key, owner_id, chips) SELECT name, casefold(name), owner_id, chips FROM account ORDER BY rowid",
+    #"DROP TABLE account",
+    #"ALTER TABLE account_new RENAME TO account",
+    #"CREATE UNIQUE INDEX ix_account_name_key ON account (name_key)",
+    #"CREATE INDEX ix_account_owner_id ON account (owner_id)",
+    # Chip ledger; db_update() creates the same tables. Every balance carries over as the account's first snapshot
+    #"CREATE TABLE chip_ledger (id INTEGER NOT NULL PRIMARY KEY, account_id INTEGER NOT NULL REFERENCES account (id), delta VARCHAR NOT NULL, reason INTEGER NOT NULL, actor_id INTEGER NOT NULL, time INTEGER NOT NULL)",
+    #"CREATE INDEX ix_chip_ledger_account_id ON chip_ledger (account_id)",
+    #"CREATE TABLE chip_snapshot (account_id INTEGER NOT NULL REFERENCES account (id), ledger_id INTEGER NOT NULL, chips VARCHAR NOT NULL, time INTEGER NOT NULL, PRIMARY KEY (account_id, ledger_id))",
+    #"INSERT INTO chip_snapshot SELECT id, 0, chips, CAST(strftime('%s', 'now') AS INTEGER) FROM account",
+    #"ALTER TABLE account DROP COLUMN chips",
+    # Account versions, guarding withdrawals, transfers and cash-outs
+    #"ALTER TABLE account ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    # Character statistics by account ID; names differing only in case are merged, and names without an account are dropped
+    #"CREATE TABLE account_stats_new (account_id INTEGER NOT NULL REFERENCES account (id), period VARCHAR NOT NULL, rounds INTEGER NOT NULL, wins INTEGER NOT NULL, won VARCHAR NOT NULL, lost VARCHAR NOT NULL, blackjacks INTEGER NOT NULL, charlies INTEGER NOT NULL, PRIMARY KEY (account_id, period))",
+    #"INSERT INTO account_stats_new SELECT account.id, period, sum(rounds), sum(wins), json_array(sum(json_extract(won, '$[0]')), sum(json_extract(won, '$[1]')), sum(json_extract(won, '$[2]')), sum(json_extract(won, '$[3]')), sum(json_extract(won, '$[4]')), sum(json_extract(won, '$[5]'))), json_array(sum(json_extract(lost, '$[0]')), sum(json_extract(lost, '$[1]')), sum(json_extract(lost, '$[2]')), sum(json_extract(lost, '$[3]')), sum(json_extract(lost, '$[4]')), sum(json_extract(lost, '$[5]'))), sum(blackjacks), sum(charlies) FROM account_stats JOIN account ON account.name_key = casefold(account_stats.name) GROUP BY account.id, period",
+    #"DROP TABLE account_stats",
+    #"ALTER TABLE account_stats_new RENAME TO account_stats",
+    #"CREATE INDEX ix_account_stats_period_wins ON account_stats (period, wins)",
 ]
 
 for stmt in stmts:
@@ -22,3 +96,7 @@ for stmt in stmts:
         print(c.execute(stmt).fetchall())
     except Exception as err:
         print("".join(format_exception(err)))
+
+# sqlite3 opens a transaction on the first data change, which would be rolled back on exit
+db.commit()
+db.close()
@@ -1,65 +1,158 @@
-"""Main bot application file to run directly with Python"""
+"""Main bot application file to run directly with Python
 
+The main process only loads settings and supervises; the bot itself runs in a child process,
+which is restarted with exponential backoff whenever it crashes.
+"""
+
+from collections import deque
+from multiprocessing import Process
+from random import uniform
+from time import monotonic, sleep
 from traceback import format_exception
-from time import sleep
-
-# Load environment
-import discord
-
-print("\nRunning PyCord version " + discord.__version__)
-try:
-    with open("settings/bottoken.txt") as file:
-        bot_token = file.read()
-except OSError:
-    print("\nBot token not found!\nTerminating program...")
-    quit()
-else:
-    print("\nBot token found!")
-
-# Creates certain empty folders if necessary
-from os.path import exists
-from os import mkdir
-if exists("database"):
-    print("Database folder found!")
-else:
-    print("Database folder not found!\nCreating new folder...")
-    mkdir("database")
-
-if exists("database/db.sqlite"):
-    print("Database found!")
-else:
-    print("Database not found!\nPlease run modules.base.bot.db_update() in a separate script to initialize the database.")
-    quit()
-
-if exists("logs"):
-    print("Logs folder found!")
-else:
-    print("Logs folder not found!\nCreating new folder...")
-    mkdir("logs")
-
-if exists("settings/perms.json"):
-    print("Permissions settings found!")
-else:
-    print("Permissions file not found!\nTerminating...")
-    quit()
-
-# Import all modules, setting up event listeners
-from modules.base.bot import bot_client
-from modules.base.auxiliary import log, get_time, loc
-import modules.misc.chips
-import modules.misc.misc
-import modules.games.miscgame
-import modules.games.blackjack
-import modules.games.tourney
-
-print("All bot modules successfully loaded!\n")
-
-# Initialize bot loop
-
-while True:
+
+def load_bot_modules() -> None:
+    """Import all modules, setting up event listeners and commands"""
+
+    from modules.base.auxiliary import config
+    from modules.games.registry import load_games
+
+    import modules.misc.chips
+    load_games(config["games"]["enabled"])
+    # Builds on the loaded games, so after them
+    import modules.misc.misc
+    import modules.misc.leaderboard
+    import modules.base.sweeper
+    import modules.base.ledger
+    if config["recorder"]["enabled"]:
+        import modules.base.recorder
+    import modules.base.cmdsync
+
+    print("All bot modules successfully loaded!\n")
+
+def run_bot(bot_token: str) -> None:
+    """Entry point of the bot child process; runs the bot until it is closed
+
+    With the fork start method, the modules loaded by the supervisor are inherited and the restart is warm;
+    otherwise they are loaded here.
+
+    ### Parameters
+    bot_token: str
+        Discord bot token, already read by the supervisor
+    """
+
+    from modules.base.bot import bot_client
+    from modules.base.auxiliary import log, get_time, loc, flush_logs
+    load_bot_modules()
+
     try:
         log(loc("bot.init", get_time()))
         bot_client.run(bot_token)
     except Exception as err:
         log(loc("bot.crash", get_time(), "".join(format_exception(err))))
-        sleep(300)
\ No newline at end of file
+        exit(1)
+    finally:
+        # Child processes skip exit handlers, so flush explicitly
+        flush_logs()
+
+def supervise(bot_token: str) -> None:
+    """Run the bot in a child process, restarting it on crashes
+
+    Restart delays grow exponentially with consecutive crashes, with random jitter;
+    a child that stayed up long enough resets the backoff.
+    Too many crashes within the crash window trips the breaker and stops the supervisor.
+    A child exiting with code 0 (i.e. an admin shutdown) also stops the supervisor.
+
+    ### Parameters
+    bot_token: str
+        Discord bot token to hand to every child process
+    """
+
+    from modules.base.auxiliary import log, get_time, loc, config, flush_logs
+
+    settings = config["supervisor"]
+    crashes: deque[float] = deque()
+    failures = 0
+
+    while True:
+        # Forked children inherit the log buffer, so empty it first
+        flush_logs()
+
+        started = monotonic()
+        child = Process(target = run_bot, args = (bot_token,), name = "C1RC3")
+        child.start()
+        child.join()
+
+        if child.exitcode == 0:
+            log(loc("bot.stopped", get_time()))
+            return
+
+        now = monotonic()
+        if now - started >= settings["stable_after"]:
+            failures = 0
+        failures += 1
+
+        # Crash-loop breaker
+        crashes.append(now)
+        while crashes[0] < now - settings["crash_window"]:
+            crashes.popleft()
+        if len(crashes) >= settings["max_crashes"]:
+            log(loc("bot.crashloop", get_time(), len(crashes), settings["crash_window"]))
+            exit(1)
+
+        # Exponential backoff with jitter; always wait at least half of the step
+        delay = min(settings["base_delay"] * 2 ** (failures - 1), settings["max_delay"])
+        delay = uniform(delay / 2, delay)
+        log(loc("bot.restart", get_time(), child.exitcode, round(delay, 1)))
+        sleep(delay)
+
+if __name__ == "__main__":
+    # Load environment
+    import discord
+
+    print("\nRunning PyCord version " + discord.__version__)
+    try:
+        with open("settings/bottoken.txt") as file:
+            bot_token = file.read()
+    except OSError:
+        print("\nBot token not found!\nTerminating program...")
+        quit()
+    else:
+        print("\nBot token found!")
+
+    # Creates certain empty folders if necessary
+    from os.path import exists
+    from os import mkdir
+    if exists("database"):
+        print("Database folder found!")
+    else:
+        print("Database folder not found!\nCreating new folder...")
+        mkdir("database")
+
+    if exists("database/db.sqlite"):
+        print("Database found!")
+    else:
+        print("Database not found!\nPlease run modules.base.bot.db_update() in a separate script to initialize the database.")
+        quit()
+
+    if exists("logs"):
+        print("Logs folder found!")
+    else:
+        print("Logs folder not found!\nCreating new folder...")
+        mkdir("logs")
+
+    if exists("settings/perms.json"):
+        print("Permissions settings found!")
+    else:
+        print("Permissions file not found!\nTerminating...")
+        quit()
+
+    if exists("settings/config.json"):
+        print("Config settings found!")
+    else:
+        print("Config file not found!\nTerminating...")
+        quit()
+
+    # Load modules once here so that forked children start warm
+    load_bot_modules()
+
+    supervise(bot_token)
@@ -2,7 +2,9 @@
 
 print("Loading module 'auxiliary'...")
 
+from atexit import register
 from datetime import datetime
+from io import TextIOWrapper
 from json import load
 
 from discord import ApplicationContext
@@ -18,6 +20,10 @@ with open("settings/guilds.json", "r") as file:
     guilds: list[int] = load(file)
     """Contains all guild ids that the bot is to be used in"""
 
+with open("settings/config.json", "r") as file:
+    config: dict[str, dict] = load(file)
+    """Contains per-deployment tuning options, grouped by subsystem"""
+
 with open("settings/localization_en.json", "r") as file:
     loc_en: dict[str, str] = load(file)
     """Contains log/response messages localization in English"""
@@ -104,20 +110,41 @@ def get_time() -> str:
 
     return datetime.now().strftime("%Y-%m-%d, %H:%M:%S")
 
+log_file: TextIOWrapper | None = None
+"""Currently open dated log; kept open and buffered between writes"""
+
 def log(out: str) -> None:
     """Both prints the input string to the console and writes the input string to a dated log.
 
     This log is found in the logs/ folder (the logs folder has to be created first).
+    Writes are buffered; call flush_logs() to make sure they have hit the disk.
 
     ### Parameters
     out: str
         String to print to file and console
     """
 
+    global log_file
+
     print(out)
 
-    with open("logs/" + datetime.now().strftime("%Y-%m-%d") + ".txt", "a", encoding = "utf-8") as log_file:
-        log_file.write(out + "\n")
+    log_name = "logs/" + datetime.now().strftime("%Y-%m-%d") + ".txt"
+    if log_file is None or log_file.name != log_name:
+        # New day, new log
+        flush_logs()
+        log_file = open(log_name, "a", encoding = "utf-8")
+
+    log_file.write(out + "\n")
+
+@register
+def flush_logs() -> None:
+    """Write out and close the currently open log, if any; also runs on interpreter exit"""
+
+    global log_file
+
+    if log_file is not None:
+        log_file.close()
+        log_file = None
 
 async def ghost_reply(context: ApplicationContext, message: str, private: bool = False) -> None:
     """Reply to a message without the command reply being visible to everyone else
@@ -136,43 +163,28 @@ async def ghost_reply(context: ApplicationContext, message: str, private: bool =
         await context.respond("https://canary.discordapp.com/__development/link/", ephemeral = True, delete_after = 0)
         await context.channel.send(message)
 
-def clamp(arr: list[int | float], max: list[int | float]) -> None:
-    """Clamp each value in a list to those in another list.
-    
-    ### Parameters
-    arr: list[int | float]
-        The list to clamp (MODIFIED IN-PLACE)
-    max: list[int | float]
-        The list of maximum values
-
-    ### Raises
-    InvalidArgumentError
-        Lists are not the same length
-    """
-
-    if len(arr) != len(max):
-        raise InvalidArgumentError
-    
-    for i in range(len(arr)):
-        if arr[i] > max[i]:
-            arr[i] = max[i]
+def command_path(data: dict) -> tuple[str, dict]:
+    """Flatten the data of an application command interaction into the full command name and its options
 
-def all_zero(arr: list[int]) -> bool:
-    """Check if a list of integers contains nothing but 0's.
+    Must be read before the command is invoked, as command groups replace the data with their subcommand's.
     
     ### Parameters
-    arr: list[int]
-        The list of integers to be tested
+    data: dict
+        Interaction data, i.e. discord.Interaction.data
 
     ### Returns
-    True
-        Every value is 0
-    False
-        At least one value is nonzero
+    A tuple:
+    Index 0
+        Full name of the command, e.g. "admin game set_chips"
+    Index 1
+        Values of the options given, by name; users, channels etc. as their IDs
     """
 
-    for num in arr:
-        if num != 0:
-            return False
+    path = [data["name"]]
+    options = data.get("options", [])
+    # Option types 1 and 2 are subcommands and subcommand groups
+    while options and options[0]["type"] in (1, 2):
+        path.append(options[0]["name"])
+        options = options[0].get("options", [])
 
-    return True
\ No newline at end of file
+    return (" ".join(path), {option["name"]: option["value"] for option in options})
@@ -5,7 +5,7 @@ print("Loading module 'bot'...")
 from traceback import format_exception
 
 import discord
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from .auxiliary import log, get_time, loc
@@ -15,8 +15,8 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot_client = discord.Bot(intents = intents)
-"""Main bot object"""
+bot_client = discord.Bot(intents = intents, auto_sync_commands = False)
+"""Main bot object; commands are synced by modules.base.cmdsync instead of on every connect"""
 
 @bot_client.listen()
 async def on_ready():
@@ -27,14 +27,31 @@ async def on_ready():
 @bot_client.listen()
 async def on_connect():
     log(loc("bot.reconnect", get_time()))
+
+class ShuttingDownError(discord.CheckFailure):
+    """Raised by the global check when a command arrives while the bot is shutting down; already responded to"""
+    pass
+
 @bot_client.listen()
 async def on_application_command_error(context: discord.ApplicationContext, exception: discord.DiscordException):
+    if isinstance(exception, ShuttingDownError):
+        return
     log(loc("error.log", get_time(), context.guild, context.channel, context.author, "".join(format_exception(exception))))
     await context.respond(loc("error"))
 
 
 # Database stuff (SQLite and SQLAlchemy)
 database_engine = create_engine("sqlite:///database/db.sqlite")
+
+@event.listens_for(database_engine, "connect")
+def enable_wal(dbapi_connection, connection_record) -> None:
+    """Put the database in write-ahead log mode, so that reads don't wait on writes;
+    modules.base.shutdown checkpoints the log back into the database file on shutdown"""
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
 database_connector = sessionmaker(database_engine, autocommit = False, autoflush = False)
 """To use, call database_connector to create session."""
 
@@ -0,0 +1,106 @@
+"""Contains ChipVector, the amount of each type of chip, as used by all chip math
+
+Chip types are indexed as: physical, mental, artificial, supernatural, merge, swap.
+Like rules, this is independent of Discord and the database, so simulations can use it directly.
+"""
+
+print("Loading module 'chipvector'...")
+
+from typing import Iterable
+
+CHIP_TYPES = 6
+"""Amount of chip types"""
+
+class ChipVector(tuple):
+    """Immutable amount of each type of chip; a tuple of 6 ints, validated once on creation
+
+    Arithmetic is element-wise: + and - between vectors, * with an int; an operand of the wrong length raises ValueError.
+    Being a tuple, it hashes, compares equal by value, and serializes to JSON as a plain list.
+    Amounts may be negative, i.e. for differences; see nonnegative().
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, chips: Iterable[int] = (0,) * CHIP_TYPES) -> "ChipVector":
+        """
+        ### Parameters
+        chips: Iterable[int] = all 0
+            Amount of each type of chip
+
+        ### Raises
+        ValueError
+            Not exactly 6 amounts, or an amount is not a whole number
+        """
+
+        if type(chips) is cls:
+            return chips
+
+        vector = tuple.__new__(cls, chips)
+        if len(vector) != CHIP_TYPES:
+            raise ValueError("Chip amounts need exactly one value per chip type")
+        for chips in vector:
+            if type(chips) is not int:
+                raise ValueError("Chip amounts must be whole numbers")
+
+        return vector
+
+    @classmethod
+    def trusted(cls, chips: Iterable[int]) -> "ChipVector":
+        """Skip validation, for results of operations on vectors that are already valid"""
+
+        return tuple.__new__(cls, chips)
+
+    @classmethod
+    def of(cls, chip_type: int, amount: int) -> "ChipVector":
+        """An amount of a single chip type, e.g. the cost of a TF"""
+
+        return cls([amount if index == chip_type else 0 for index in range(CHIP_TYPES)])
+
+    def __add__(self, other: "ChipVector") -> "ChipVector":
+        return ChipVector.trusted([a + b for a, b in zip(self, other, strict = True)])
+
+    def __sub__(self, other: "ChipVector") -> "ChipVector":
+        return ChipVector.trusted([a - b for a, b in zip(self, other, strict = True)])
+
+    def __mul__(self, factor: int) -> "ChipVector":
+        return ChipVector.trusted([chips * factor for chips in self])
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "ChipVector":
+        return ChipVector.trusted([-chips for chips in self])
+
+    def __repr__(self) -> str:
+        # Shown the same as the lists used before, so logs read unchanged, even nested in other containers
+        return repr(list(self))
+
+    __str__ = __repr__
+
+    def covers(self, other: "ChipVector") -> bool:
+        """Whether there is at least as much of every chip type as in another vector, e.g. to pay it"""
+
+        for a, b in zip(self, other, strict = True):
+            if a < b:
+                return False
+        return True
+
+    def clamp(self, cap: "ChipVector") -> "ChipVector":
+        """Limit each chip type to the amount in another vector"""
+
+        return ChipVector.trusted([min(a, b) for a, b in zip(self, cap, strict = True)])
+
+    def is_zero(self) -> bool:
+        """Whether there are no chips of any type"""
+
+        return not any(self)
+
+    def nonnegative(self) -> bool:
+        """Whether no chip type is negative; i.e. whether it is a valid amount to hold or pay"""
+
+        for chips in self:
+            if chips < 0:
+                return False
+        return True
+
+ChipVector.ZERO = ChipVector()
+"""No chips of any type"""
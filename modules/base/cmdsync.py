@@ -0,0 +1,75 @@
+"""Handles syncing application commands to Discord only when they have actually changed"""
+
+print("Loading module 'cmdsync'...")
+
+from hashlib import sha256
+from json import dumps, load, dump
+
+from .bot import bot_client
+from .auxiliary import log, get_time, loc
+
+fingerprint_path = "database/commands.json"
+"""Where the fingerprints of the last successfully synced commands are stored"""
+
+def command_fingerprints() -> dict[str, str]:
+    """Hash the schema of every application command that is to be registered
+
+    ### Returns
+    dict[str, str]
+        Command name mapped to a hash of its full schema and the guilds it is registered to
+    """
+
+    return {
+        cmd.name: sha256(dumps([cmd.to_dict(), sorted(cmd.guild_ids or [])], sort_keys = True).encode()).hexdigest()
+        for cmd in bot_client.pending_application_commands
+    }
+
+def load_fingerprints() -> dict[str, str]:
+    """Load the fingerprints of the last successful sync
+
+    ### Returns
+    dict[str, str]
+        Command name mapped to schema hash; empty if no sync has been recorded yet
+    """
+
+    try:
+        with open(fingerprint_path, "r") as file:
+            return load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_fingerprints(fingerprints: dict[str, str]) -> None:
+    """Record the fingerprints of a successful sync
+
+    ### Parameters
+    fingerprints: dict[str, str]
+        Command name mapped to schema hash
+    """
+
+    with open(fingerprint_path, "w") as file:
+        dump(fingerprints, file, indent = 4, sort_keys = True)
+
+async def sync_changed_commands() -> None:
+    """Sync application commands to Discord, skipping entirely if nothing changed since the last sync
+
+    Commands that did change are pushed individually, so unchanged groups are left alone;
+    commands that no longer exist are deleted.
+    """
+
+    current = command_fingerprints()
+    stored = load_fingerprints()
+
+    if current == stored:
+        log(loc("bot.sync.skip", get_time()))
+        return
+
+    changed = sorted(name for name in current if stored.get(name) != current[name])
+    removed = sorted(name for name in stored if name not in current)
+    log(loc("bot.sync", get_time(), changed, removed))
+
+    await bot_client.sync_commands(method = "individual")
+    save_fingerprints(current)
+
+@bot_client.listen()
+async def on_connect():
+    await sync_changed_commands()
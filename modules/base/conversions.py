@@ -0,0 +1,128 @@
+"""Exact chip conversion rates, and a planner finding the fewest conversions to cover a cost
+
+Rates are kept as fractions, so any amount is checked for fractional chips exactly, no matter how large.
+Chip types are indexed as everywhere else: physical, mental, artificial, supernatural, merge, swap.
+"""
+
+print("Loading module 'conversions'...")
+
+from fractions import Fraction
+from math import ceil, lcm
+
+from .chipvector import ChipVector
+
+MAX_STEPS = 4
+"""Most conversions a plan may chain; every cost that can be covered at all needs fewer"""
+
+class Conversion:
+    """A single conversion rate between chip types
+
+    ### Attributes
+    consumed: tuple[Fraction, ...]
+        Chips of each type used up per amount converted
+    produced: tuple[Fraction, ...]
+        Chips of each type gained per amount converted
+    step: int
+        Smallest amount that converts whole chips only; every valid amount is a multiple of it
+    """
+
+    __slots__ = ("consumed", "produced", "step")
+
+    def __init__(self, consumed: tuple, produced: tuple):
+        self.consumed = tuple(Fraction(chips) for chips in consumed)
+        self.produced = tuple(Fraction(chips) for chips in produced)
+        self.step = lcm(*(chips.denominator for chips in self.consumed + self.produced))
+
+    def scaled(self, amount: int) -> tuple[ChipVector, ChipVector] | None:
+        """Chips consumed and produced when converting an amount
+
+        ### Parameters
+        amount: int
+            How many times the rate is applied
+
+        ### Returns
+        A tuple:
+        Index 0
+            Chips of each type consumed
+        Index 1
+            Chips of each type produced
+        None
+            The amount would consume or produce a fractional chip
+        """
+
+        if amount % self.step != 0:
+            return None
+
+        return (ChipVector(int(chips * amount) for chips in self.consumed), ChipVector(int(chips * amount) for chips in self.produced))
+
+CONVERSIONS: tuple[Conversion, ...] = (
+    Conversion((0, 1, 0, 0, 0, 0), (10, 0, 0, 0, 0, 0)),
+    Conversion((0, 0, 1, 0, 0, 0), (40, 3, 0, 0, 0, 0)),
+    Conversion((40, 3, 0, 0, 0, 0), (0, 0, 1, 0, 0, 0)),
+    Conversion((0, 0, 0, 1, 0, 0), (5, 0, 0, 0, 0, 0)),
+    Conversion((0, 0, 0, 1, 0, 0), (0, Fraction(1, 2), 0, 0, 0, 0)),
+    Conversion((5, 0, 0, 0, 0, 0), (0, 0, 0, 1, 0, 0)),
+    Conversion((0, Fraction(1, 2), 0, 0, 0, 0), (0, 0, 0, 1, 0, 0)),
+    Conversion((0, 0, 0, 0, 1, 0), (30, 0, 0, 0, 0, 0)),
+    Conversion((0, 0, 0, 0, 1, 0), (0, 3, 0, 0, 0, 0)),
+    Conversion((0, 0, 0, 0, 0, 1), (5, 0, 0, 0, 0, 0)),
+    Conversion((0, 0, 0, 0, 0, 1), (0, Fraction(1, 2), 0, 0, 0, 0)),
+)
+"""Every conversion players can make, in the order of the /convert choices"""
+
+PRODUCERS: tuple[tuple[int, ...], ...] = tuple(
+    tuple(i for i, conversion in enumerate(CONVERSIONS) if conversion.produced[chip_type] > 0)
+    for chip_type in range(6)
+)
+"""Indices of the conversions producing each chip type; the edges of the conversion graph, taken backwards"""
+
+def plan(chips: ChipVector, cost: ChipVector, max_steps: int = MAX_STEPS) -> list[tuple[int, int]] | None:
+    """Find the fewest conversions that leave a player with at least the given chips
+
+    Searches backwards from the cost: each step picks a conversion producing a type still short,
+    with just enough amount to cover that shortage, and adds what it consumes to what must be held beforehand.
+    Among plans with the fewest steps, the one converting the fewest chips is picked.
+
+    ### Parameters
+    chips: ChipVector
+        Chips of each type currently held
+    cost: ChipVector
+        Chips of each type to end up with at least
+    max_steps: int = MAX_STEPS
+        Most conversions to chain
+
+    ### Returns
+    list[tuple[int, int]]
+        Pairs of conversion index and amount, in the order to be converted; empty if the chips already cover the cost
+    None
+        No plan of at most max_steps conversions covers the cost
+    """
+
+    start = tuple(cost)
+    frontier: list[tuple[tuple[int, ...], list[tuple[int, int]]]] = [(start, [])]
+    seen = {start}
+
+    for _ in range(max_steps + 1):
+        found = [steps for need, steps in frontier if chips.covers(need)]
+        if found:
+            return min(found, key = lambda steps: sum(sum(CONVERSIONS[c].consumed) * amount for c, amount in steps))
+
+        next_frontier = []
+        for need, steps in frontier:
+            short = [i for i in range(6) if need[i] > chips[i]]
+            for c in sorted({c for i in short for c in PRODUCERS[i]}):
+                conversion = CONVERSIONS[c]
+                amount = max(ceil((need[i] - chips[i]) / conversion.produced[i]) for i in short if conversion.produced[i] > 0)
+                amount = ceil(amount / conversion.step) * conversion.step
+
+                before = tuple(
+                    int(max(need[i] - conversion.produced[i] * amount, 0) + conversion.consumed[i] * amount)
+                    for i in range(6)
+                )
+                if before not in seen:
+                    seen.add(before)
+                    next_frontier.append((before, [(c, amount)] + steps))
+
+        frontier = next_frontier
+
+    return None
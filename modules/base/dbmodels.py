@@ -2,53 +2,97 @@
 
 print("Loading module 'dbmodels'...")
 
+from enum import IntEnum
 from json import dumps, loads
-from random import sample
+from random import Random
+from time import gmtime, strftime, time
 
 from discord import User
-from sqlalchemy import ForeignKey, ForeignKeyConstraint
+from sqlalchemy import ForeignKey, ForeignKeyConstraint, Index, String, func, select, update
 from sqlalchemy.orm import Mapped, mapped_column, relationship, Session
+from sqlalchemy.types import TypeDecorator
 
 from .bot import SQLBase, bot_client
-from .auxiliary import InvalidArgumentError, clamp
+from .auxiliary import InvalidArgumentError, config
+from . import rules
+from .chipvector import ChipVector
+from .rng import new_seed, game_rng, shuffled
+from .events import EventKind, record
+from .timers import new_deadline, schedule
+from . import nameindex
+
+
+class ChipColumn(TypeDecorator):
+    """Column holding a ChipVector; stored as the same JSON array text as before, so no migration is needed"""
+
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value: ChipVector | None, dialect) -> str | None:
+        return None if value is None else dumps(list(value))
+
+    def process_result_value(self, value: str | None, dialect) -> ChipVector | None:
+        return None if value is None else ChipVector(loads(value))
 
 
 class ChipAccount(SQLBase):
     """Represents a chips account belonging to a single character.
 
     ### Attributes
-    [PRIMARY] name: str
+    [PRIMARY] id: int
+        Number of the account, in order of opening
+    name: str
         Unique name that the account is under
+    name_key: str
+        Case-folded name, which is what makes names unique and is looked up by
     owner_id: int
         ID of User who owns this account
-    chips: str
-        Jsonified array of chips of each type within the account
+    version: int
+        How many times the balance has changed; guards removals against changes made since the balance was read
+
+    The balance isn't stored on the account, but kept as an append-only ledger; see LedgerEntry and BalanceSnapshot.
         
     ### Methods
     [STATIC] create_account(session: sqlalchemy.orm.Session, name: str) -> bool
         Attempt to open a chip account under the given name
     [STATIC] find_account(session: sqlalchemy.orm.Session, username: str) -> ChipAccount | None
         Returns the ChipAccount if it exists
-    get_bal() -> list[int]
-        Returns the balance unjsonified
-    deposit(session: sqlalchemy.orm.Session, amount: list[int]) -> None
+    [STATIC] owned_by(session: sqlalchemy.orm.Session, owner_id: int) -> list[ChipAccount]
+        Returns every ChipAccount of a user
+    get_bal() -> ChipVector
+        Returns the balance
+    deposit(session: sqlalchemy.orm.Session, amount: ChipVector, actor: int) -> None
         Deposit an amount of chips into the account
-    withdraw(session: sqlalchemy.orm.Session, amount: list[int]) -> bool
+    withdraw(session: sqlalchemy.orm.Session, amount: ChipVector, actor: int) -> bool
         Withdraw an amount of chips from the account
+    transfer(session: sqlalchemy.orm.Session, target: ChipAccount, amount: ChipVector, actor: int) -> bool
+        Move an amount of chips to another account
+    change_bal(session: sqlalchemy.orm.Session, delta: ChipVector, reason: LedgerReason, actor: int) -> bool
+        Append a change to the balance to the ledger, unless it would overdraw the account
     change_name(session: sqlalchemy.orm.Session, new: str) -> None
         Change the name of the account
+    history(limit: int) -> list[LedgerEntry]
+        Returns the latest changes to the balance
+    snapshot(session: sqlalchemy.orm.Session) -> None
+        Record the current balance, so that reading it no longer needs the ledger before now
     """
 
     __tablename__ = "account"
 
-    name: Mapped[str] = mapped_column(primary_key = True)
+    id: Mapped[int] = mapped_column(primary_key = True)
+    """Number of the account, in order of opening"""
+
+    name: Mapped[str]
     """Unique name that the account is under"""
 
-    owner_id: Mapped[int]
+    name_key: Mapped[str] = mapped_column(unique = True, index = True)
+    """Case-folded name, which is what makes names unique and is looked up by"""
+
+    owner_id: Mapped[int] = mapped_column(index = True)
     """ID of User who owns this account"""
-    
-    chips: Mapped[str] = mapped_column(default = "[0, 0, 0, 0, 0, 0]")
-    """Jsonified array of chips of each type within the account"""
+
+    version: Mapped[int] = mapped_column(default = 0)
+    """How many times the balance has changed; guards removals against changes made since the balance was read"""
 
     @staticmethod
     def create_account(session: Session, id: int, name: str) -> bool:
@@ -66,16 +110,19 @@ class ChipAccount(SQLBase):
         True
             Successfully created account
         False
-            Account already existed
+            Account already existed, under the same name in any case
         """
 
-        found_account = session.get(ChipAccount, name)
+        found_account = ChipAccount.find_account(session, name)
         
         if found_account is None:
             # Create new account
-            new_account = ChipAccount(owner_id = id, name = name)
+            new_account = ChipAccount(owner_id = id, name = name, name_key = name.casefold(), version = 0)
             session.add(new_account)
+            session.flush()
+            session.add(BalanceSnapshot(account_id = new_account.id, ledger_id = 0, chips = ChipVector.ZERO, time = int(time())))
             session.commit()
+            nameindex.add(id, name)
             return True
         else:
             return False
@@ -88,59 +135,89 @@ class ChipAccount(SQLBase):
         session: sqlalchemy.orm.Session
             Database session scope
         name: str
-            Name of account to search for
+            Name of account to search for, in any case
 
         ### Returns
         ChipAccount with matching username or None if not found.
         """
 
-        return session.get(ChipAccount, name)
+        return session.scalars(select(ChipAccount).where(ChipAccount.name_key == name.casefold())).first()
+
+    @staticmethod
+    def owned_by(session: Session, owner_id: int) -> list["ChipAccount"]:
+        """Returns every ChipAccount of a user
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        owner_id: int
+            ID of Discord user
+
+        ### Returns
+        list[ChipAccount]
+            The user's accounts, in order of name
+        """
+
+        return list(session.scalars(select(ChipAccount).where(ChipAccount.owner_id == owner_id).order_by(ChipAccount.name_key)))
     
-    def get_bal(self) -> list[int]:
-        """Returns the balance unjsonified
+    def get_bal(self) -> ChipVector:
+        """Returns the balance
         
         ### Returns
-        A list of integers containing each type of chip in the account
+        ChipVector of each type of chip in the account
         """
 
-        return loads(self.chips)
+        session = Session.object_session(self)
+        snapshot = session.scalars(
+            select(BalanceSnapshot)
+            .where(BalanceSnapshot.account_id == self.id)
+            .order_by(BalanceSnapshot.ledger_id.desc())
+            .limit(1)
+        ).first()
+
+        # Only the ledger after the latest snapshot is left to add up; compaction keeps it short
+        bal = snapshot.chips
+        for delta in session.scalars(select(LedgerEntry.delta).where(LedgerEntry.account_id == self.id, LedgerEntry.id > snapshot.ledger_id)):
+            bal += delta
 
-    def deposit(self, session: Session, amount: list[int]) -> None:
+        return bal
+
+    def deposit(self, session: Session, amount: ChipVector, actor: int) -> None:
         """Deposit an amount of chips into the account
 
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        amount: list[int]
+        amount: ChipVector
             Amount of each type of chips to add to the balance
+        actor: int
+            ID of the Discord user depositing
 
         ### Raises
         InvalidArgumentError
             Amount given is negative or not enough chip arguments
         """
 
-        for chips in amount:
-            if chips < 0:
-                raise InvalidArgumentError
-        
-        current_chips: list[int] = loads(self.chips)
-        if len(amount) != len(current_chips):
+        try:
+            amount = ChipVector(amount)
+        except ValueError:
+            raise InvalidArgumentError
+        if not amount.nonnegative():
             raise InvalidArgumentError
-        
-        for i in range(len(amount)):
-            current_chips[i] += amount[i]
 
-        self.chips = dumps(current_chips)
+        self.change_bal(session, amount, LedgerReason.DEPOSIT, actor)
         session.commit()
     
-    def withdraw(self, session: Session, amount: list[int]) -> bool:
+    def withdraw(self, session: Session, amount: ChipVector, actor: int) -> bool:
         """Withdraw an amount of chips from the account
 
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        amount: list[int]
+        amount: ChipVector
             Amount of each type of chips to remove from the balance
+        actor: int
+            ID of the Discord user withdrawing
 
         ### Returns
         True
@@ -153,24 +230,95 @@ class ChipAccount(SQLBase):
             Amount given is negative or not enough chip arguments
         """
 
-        for chips in amount:
-            if chips < 0:
-                raise InvalidArgumentError
-        
-        current_chips: list[int] = loads(self.chips)
-        if len(amount) != len(current_chips):
+        try:
+            amount = ChipVector(amount)
+        except ValueError:
+            raise InvalidArgumentError
+        if not amount.nonnegative():
+            raise InvalidArgumentError
+
+        if not self.change_bal(session, -amount, LedgerReason.WITHDRAW, actor):
+            return False
+        session.commit()
+
+        return True
+
+    def transfer(self, session: Session, target: "ChipAccount", amount: ChipVector, actor: int) -> bool:
+        """Move an amount of chips to another account, in one transaction
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        target: ChipAccount
+            Account to move the chips to
+        amount: ChipVector
+            Amount of each type of chips to move
+        actor: int
+            ID of the Discord user moving the chips
+
+        ### Returns
+        True
+            Successful transfer
+        False
+            Any amount of chips was more than balance
+
+        ### Raises
+        InvalidArgumentError
+            Amount given is negative, or the target is this account
+        """
+
+        if not amount.nonnegative() or target.id == self.id:
             raise InvalidArgumentError
-        
-        for i in range(len(amount)):
-            if amount[i] > current_chips[i]:
-                return False
-            current_chips[i] -= amount[i]
 
-        self.chips = dumps(current_chips)
+        if not self.change_bal(session, -amount, LedgerReason.TRANSFER_OUT, actor):
+            return False
+        target.change_bal(session, amount, LedgerReason.TRANSFER_IN, actor)
         session.commit()
 
         return True
 
+    def change_bal(self, session: Session, delta: ChipVector, reason: "LedgerReason", actor: int) -> bool:
+        """Append a change to the balance to the ledger, unless it would overdraw the account; does not commit
+
+        Removing chips is guarded by the account's version, read before the balance: if any other change was made since,
+        nothing is appended, so two removals can't both spend the same chips. A change lost that way is retried once,
+        against the balance read again.
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        delta: ChipVector
+            Chips of each type to add to the balance; negative to remove
+        reason: LedgerReason
+            Why the balance changes
+        actor: int
+            ID of the Discord user making the change
+
+        ### Returns
+        True
+            Change appended
+        False
+            The balance would go negative, or kept changing while it was read; nothing was appended
+        """
+
+        for attempt in range(2):
+            bump = update(ChipAccount).where(ChipAccount.id == self.id).values(version = ChipAccount.version + 1)
+            if not delta.nonnegative():
+                seen = self.version
+                if not (self.get_bal() + delta).nonnegative():
+                    return False
+                bump = bump.where(ChipAccount.version == seen)
+
+            moved = session.execute(bump.execution_options(synchronize_session = False)).rowcount > 0
+            session.expire(self, ["version"])
+            if moved:
+                break
+        else:
+            return False
+
+        session.add(LedgerEntry(account_id = self.id, delta = delta, reason = reason, actor_id = actor, time = int(time())))
+        return True
+
     def change_name(self, session: Session, new: str) -> None:
         """Change the name of the account
 
@@ -188,9 +336,133 @@ class ChipAccount(SQLBase):
         if new == "":
             raise InvalidArgumentError
 
+        old = self.name
         self.name = new
+        self.name_key = new.casefold()
         session.commit()
 
+        nameindex.remove(self.owner_id, old)
+        nameindex.add(self.owner_id, new)
+
+    def history(self, limit: int) -> list["LedgerEntry"]:
+        """Returns the latest changes to the balance
+
+        ### Parameters
+        limit: int
+            Most changes to return
+
+        ### Returns
+        list[LedgerEntry]
+            Changes to the balance, newest first
+        """
+
+        session = Session.object_session(self)
+        return list(session.scalars(
+            select(LedgerEntry)
+            .where(LedgerEntry.account_id == self.id)
+            .order_by(LedgerEntry.id.desc())
+            .limit(limit)
+        ))
+
+    def snapshot(self, session: Session) -> None:
+        """Record the current balance, so that reading it no longer needs the ledger before now; does not commit
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        """
+
+        last = session.scalar(select(func.max(LedgerEntry.id)).where(LedgerEntry.account_id == self.id))
+        if last is None:
+            return
+        session.add(BalanceSnapshot(account_id = self.id, ledger_id = last, chips = self.get_bal(), time = int(time())))
+
+
+class LedgerReason(IntEnum):
+    """Why a chip account's balance changed; stored as its int value, so only ever append to this"""
+
+    DEPOSIT = 0
+    """Chips deposited by the owner"""
+    WITHDRAW = 1
+    """Chips withdrawn by the owner"""
+    TRANSFER_OUT = 2
+    """Chips moved to another account"""
+    TRANSFER_IN = 3
+    """Chips moved from another account"""
+    CASH_OUT = 4
+    """Chips moved from a player in a game"""
+
+
+class LedgerEntry(SQLBase):
+    """A single change to the balance of a ChipAccount; only ever appended, never changed
+
+    ### Attributes
+    [PRIMARY] id: int
+        Order in which changes happened, across every account
+    [FOREIGN] account_id: int
+        ID of the ChipAccount changed
+    delta: ChipVector
+        Chips of each type added to the balance; negative for removed
+    reason: int
+        LedgerReason of the change
+    actor_id: int
+        ID of the Discord user who made the change
+    time: int
+        Unix time of the change
+    """
+
+    __tablename__ = "chip_ledger"
+
+    id: Mapped[int] = mapped_column(primary_key = True)
+    """Order in which changes happened, across every account"""
+
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id"), index = True)
+    """ID of the ChipAccount changed; the index also orders an account's changes, as it ends in the row ID"""
+
+    delta: Mapped[ChipVector] = mapped_column(ChipColumn)
+    """Chips of each type added to the balance; negative for removed"""
+
+    reason: Mapped[int]
+    """LedgerReason of the change"""
+
+    actor_id: Mapped[int]
+    """ID of the Discord user who made the change"""
+
+    time: Mapped[int]
+    """Unix time of the change"""
+
+
+class BalanceSnapshot(SQLBase):
+    """Balance of a ChipAccount as of a point in its ledger
+
+    The balance of an account is its latest snapshot plus the ledger entries after it.
+    Every account starts with an empty snapshot, and modules.base.ledger adds more as ledgers grow.
+
+    ### Attributes
+    [PRIMARY, FOREIGN] account_id: int
+        ID of the ChipAccount
+    [PRIMARY] ledger_id: int
+        ID of the last LedgerEntry counted; 0 if none
+    chips: ChipVector
+        Chips of each type in the account as of that entry
+    time: int
+        Unix time the snapshot was taken
+    """
+
+    __tablename__ = "chip_snapshot"
+
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id"), primary_key = True)
+    """ID of the ChipAccount"""
+
+    ledger_id: Mapped[int] = mapped_column(primary_key = True)
+    """ID of the last LedgerEntry counted; 0 if none"""
+
+    chips: Mapped[ChipVector] = mapped_column(ChipColumn)
+    """Chips of each type in the account as of that entry"""
+
+    time: Mapped[int]
+    """Unix time the snapshot was taken"""
+
 
 class Player(SQLBase):
     """Represents a User's participation within a Game.
@@ -206,14 +478,18 @@ class Player(SQLBase):
         The type of game this Player belongs to
     name: str
         What name the Player shall be referred to as
-    chips: str
-        Jsonified array of chips of each type the Player holds
-    used: str
-        Jsonified array of chips of each type the Player has used this game
-    bet: str
+    chips: ChipVector
+        Chips of each type the Player holds
+    used: ChipVector
+        Chips of each type the Player has used this game
+    bet: ChipVector
         How many chips the Player is currently willing to bet
-    tfs: str
-        Jsonified array of TFs planned on Players
+    [BACKREF] tf_entries: list[TFEntry]
+        TFs planned on the Player, in the order they were added
+    tf_next: int
+        Position the next TF added to the Player gets
+    tf_owed: ChipVector
+        Total cost of the Player's TFs not done yet, by chip type
 
     ### Methods
     leave(session: sqlalchemy.orm.Session) -> None
@@ -226,32 +502,42 @@ class Player(SQLBase):
         Get index of player in corresponding game's player list
     rename(session: sqlalchemy.orm.Session, new_name: str) -> None
         Change the name of the player
-    get_bet() -> list[int]
+    get_bet() -> ChipVector
         Get the Player's current bet
-    set_bet(session: sqlalchemy.orm.Session, bet: list[int]) -> None
-        Set the Player's bet
-    get_chips() -> list[int]
-        Return the Player's current amount of chips unjsonified
-    set_chips(session: sqlalchemy.orm.Session, amount: list[int]) -> None
+    set_bet(session: sqlalchemy.orm.Session, bet: ChipVector) -> bool
+        Set the Player's bet, starting the round if it aligns every bet
+    get_chips() -> ChipVector
+        Return the Player's current amount of chips
+    set_chips(session: sqlalchemy.orm.Session, amount: ChipVector) -> None
         Set the Player's chips directly
-    get_used() -> list[int]
-        Return the Player's used amount of chips unjsonified
-    set_used(session: sqlalchemy.orm.Session, amount: list[int]) -> None
+    get_used() -> ChipVector
+        Return the Player's used amount of chips
+    set_used(session: sqlalchemy.orm.Session, amount: ChipVector) -> None
         Set the Player's used chips directly
-    pay_chips(session: sqlalchemy.orm.Session, amount: list[int]) -> None
+    pay_chips(session: sqlalchemy.orm.Session, amount: ChipVector) -> None
         Add an amount of chips to the Player's current amount of chips
-    use_chips(session: sqlalchemy.orm.Session, amount: list[int], track: bool = True) -> bool
+    add_chips(session: sqlalchemy.orm.Session, amount: ChipVector) -> None
+        Add an amount of chips to the Player's current amount of chips, as part of a larger change
+    use_chips(session: sqlalchemy.orm.Session, amount: ChipVector, track: bool = True) -> bool
         Removes a player's chips, if able, and tracks used chips
-    get_tf_entry() -> list[list[str | int | bool]]
-        Returns unjsonified tf entries
-    set_tf_entry(session: sqlalchemy.orm.Session, tfs: list[list[str | int | bool]]) -> None
-        Directly set entire tf list
+    convert_chips(session: sqlalchemy.orm.Session, steps: list[tuple[ChipVector, ChipVector]]) -> bool
+        Exchange some of the Player's chips for others in one or more steps, if able; not tracked as used
+    cash_out(session: sqlalchemy.orm.Session, account: ChipAccount, amount: ChipVector) -> bool
+        Move an amount of the Player's chips into a chip account, in one transaction
+    move_to_account(session: sqlalchemy.orm.Session, account: ChipAccount, amount: ChipVector) -> bool
+        Move an amount of the Player's chips into a chip account, unless they changed since they were read
+    get_tf_entry() -> list[TFEntry]
+        Returns the tf entries in order
+    swap_tf_entries(session: sqlalchemy.orm.Session, other: Player) -> None
+        Exchange every tf entry with another Player of the same game
     add_tf_entry(session: sqlalchemy.orm.Session, desc: str, cost: int, type: int) -> None
         Adds an entry to the list of tfs on the player
     remove_tf_entry(session: sqlalchemy.orm.Session, index: int) -> None
         Removes an entry from the list of tfs on the player
     toggle_tf_entry(session: sqlalchemy.orm.Session, index: int) -> None
         Marks an entry from the list of tfs as done or not
+    archive(session: sqlalchemy.orm.Session, history: GameHistory, place: int | None) -> None
+        Copy the Player's final standing into the history of the game
     """
 
     __tablename__ = "player"
@@ -275,20 +561,23 @@ class Player(SQLBase):
     name: Mapped[str]
     """What name the Player shall be referred to as"""
 
-    chips: Mapped[str] = mapped_column(default = "[0, 0, 0, 0, 0, 0]")
-    """Jsonified array of chips of each type the Player holds"""
+    chips: Mapped[ChipVector] = mapped_column(ChipColumn, default = ChipVector.ZERO)
+    """Chips of each type the Player holds"""
 
-    used: Mapped[str] = mapped_column(default = "[0, 0, 0, 0, 0, 0]")
-    """Jsonified array of chips of each type the Player has used this game"""
+    used: Mapped[ChipVector] = mapped_column(ChipColumn, default = ChipVector.ZERO)
+    """Chips of each type the Player has used this game"""
 
-    bet: Mapped[str] = mapped_column(default = "[0, 0, 0, 0, 0, 0]")
+    bet: Mapped[ChipVector] = mapped_column(ChipColumn, default = ChipVector.ZERO)
     """How many chips the Player is currently willing to bet"""
 
-    tfs: Mapped[str] = mapped_column(default = "[]")
-    """Jsonified array of TFs planned on Players
-    
-    Entry is tuple of str (desc), int (cost), int (type), bool (done)
-    """
+    tf_entries: Mapped[list["TFEntry"]] = relationship(order_by = "TFEntry.position", cascade = "all, delete-orphan")
+    """TFs planned on the Player, in the order they were added; only loaded when listed"""
+
+    tf_next: Mapped[int] = mapped_column(default = 0)
+    """Position the next TF added to the Player gets; positions are never reused, so indices stay put"""
+
+    tf_owed: Mapped[ChipVector] = mapped_column(ChipColumn, default = ChipVector.ZERO)
+    """Total cost of the Player's TFs not done yet, by chip type; kept up to date by the tf entry methods"""
     
     def leave(self, session: Session) -> None:
         """Remove Player from Game, i.e. delete Player from database
@@ -304,7 +593,12 @@ class Player(SQLBase):
             self.game.bet_turn -= 1
         if len(self.game.players) > 1:
             self.game.bet_turn %= (len(self.game.players) - 1)
+        self.game.count_matching_bets([player for player in self.game.players if player is not self])
+        if self.game.started:
+            # Leaving a game in progress places behind everyone still in it
+            self.archive(session, GameHistory.for_game(session, self.game), len(self.game.players))
 
+        record(session, self.game_id, EventKind.LEAVE, self.user_id, bet_turn = self.game.bet_turn)
         session.delete(self)
         session.commit()
 
@@ -356,100 +650,137 @@ class Player(SQLBase):
         """
 
         self.name = new_name
+        record(session, self.game_id, EventKind.RENAME, self.user_id, name = new_name)
         session.commit()
 
-    def get_bet(self) -> list[int]:
+    def get_bet(self) -> ChipVector:
         """Get the Player's current bet
         
         ### Returns
-        list[int]
-            The player's current bet, deserialized
+        ChipVector
+            The player's current bet
         """
 
-        return loads(self.bet)
+        return self.bet
+
+    def set_bet(self, session: Session, bet: ChipVector) -> bool:
+        """Set the Player's bet, starting the round if it aligns every bet
 
-    def set_bet(self, session: Session, bet: list[int]) -> None:
-        """Set the Player's bet
+        Keeps the game's count of matching bets up to date, so alignment is known without comparing every bet.
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        bet: list[int]
+        bet: ChipVector
             The bet to set the Player's bet to
+
+        ### Returns
+        True
+            Every bet is now aligned, and the round's bet was set in the same transaction
+        False
+            Bet placed; round not started
         """
 
-        self.bet = dumps(bet)
+        game = self.game
+        leading = game.get_bet_turn()
+        old = self.bet
+
+        self.bet = ChipVector(bet)
+        record(session, self.game_id, EventKind.BET, self.user_id, bet = bet)
+
+        if self is leading:
+            game.count_matching_bets()
+        elif not leading.bet.is_zero():
+            game.bets_matching += (self.bet == leading.bet) - (old == leading.bet)
+
+        if not game.is_midround() and game.bets_aligned():
+            # Game.set_bet() commits the bet along with the round's
+            game.set_bet(session, self.bet)
+            return True
+
         session.commit()
+        return False
 
-    def get_chips(self) -> list[int]:
-        """Return the Player's current amount of chips unjsonified
+    def get_chips(self) -> ChipVector:
+        """Return the Player's current amount of chips
         
         ### Returns
-        List of integers corresponding to types of chips
+        ChipVector corresponding to types of chips
         """
 
-        return loads(self.chips)
+        return self.chips
     
-    def set_chips(self, session: Session, amount: list[int]) -> None:
+    def set_chips(self, session: Session, amount: ChipVector) -> None:
         """Set the Player's chips directly
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        amount: list[int]
-            The list of chips to set the Player's chips to
+        amount: ChipVector
+            The chips to set the Player's chips to
         """
 
-        self.chips = dumps(amount)
+        self.chips = ChipVector(amount)
+        record(session, self.game_id, EventKind.SET_CHIPS, self.user_id, chips = amount)
         session.commit()
 
-    def get_used(self) -> list[int]:
-        """Return the Player's used amount of chips unjsonified
+    def get_used(self) -> ChipVector:
+        """Return the Player's used amount of chips
         
         ### Returns
-        List of integers corresponding to types of chips
+        ChipVector corresponding to types of chips
         """
 
-        return loads(self.used)
+        return self.used
     
-    def set_used(self, session: Session, amount: list[int]) -> None:
+    def set_used(self, session: Session, amount: ChipVector) -> None:
         """Set the Player's used chips directly
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        amount: list[int]
-            The list of chips to set the Player's used chips to
+        amount: ChipVector
+            The chips to set the Player's used chips to
         """
 
-        self.used = dumps(amount)
+        self.used = ChipVector(amount)
+        record(session, self.game_id, EventKind.SET_USED, self.user_id, chips = amount)
         session.commit()
 
-    def pay_chips(self, session: Session, amount: list[int]) -> None:
+    def pay_chips(self, session: Session, amount: ChipVector) -> None:
         """Add an amount of chips to the Player's current amount of chips
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        amount: list[int]
-            The list of chips to add to the Player's chips
+        amount: ChipVector
+            The chips to add to the Player's chips
         """
 
-        bal = loads(self.chips)
-        for i in range(len(bal)):
-            bal[i] += amount[i]
-        self.chips = dumps(bal)
-
+        self.add_chips(session, amount)
         session.commit()
 
-    def use_chips(self, session: Session, amount: list[int], track: bool = True) -> bool:
+    def add_chips(self, session: Session, amount: ChipVector) -> None:
+        """Add an amount of chips to the Player's current amount of chips, as part of a larger change; does not commit
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        amount: ChipVector
+            The chips to add to the Player's chips
+        """
+
+        self.chips += amount
+        record(session, self.game_id, EventKind.PAY, self.user_id, chips = amount)
+
+    def use_chips(self, session: Session, amount: ChipVector, track: bool = True) -> bool:
         """Removes a player's chips, if able, and tracks used chips
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        amount: list[int]
-            The list of chips to try to remove from the Player's chips
+        amount: ChipVector
+            The chips to try to remove from the Player's chips
         track: bool = True
             Whether to track the chips removed here or not
 
@@ -460,48 +791,151 @@ class Player(SQLBase):
             Less current chips than was requested to be removed
         """
 
-        bal = loads(self.chips)
         # Check if enough chips
-        for i in range(len(bal)):
-            if bal[i] < amount[i]:
-                return False
-
-        for i in range(len(bal)):
-            bal[i] -= amount[i]
+        if not self.chips.covers(amount):
+            return False
 
+        self.chips -= amount
         if track:
-            used = loads(self.used)
-            for i in range(len(bal)):
-                used[i] += amount[i]
-            self.used = dumps(used)
+            self.used += amount
+
+        record(session, self.game_id, EventKind.USE, self.user_id, chips = amount, track = track)
+        session.commit()
+        return True
+
+    def convert_chips(self, session: Session, steps: list[tuple[ChipVector, ChipVector]]) -> bool:
+        """Exchange some of the Player's chips for others in one or more steps, if able; not tracked as used
+
+        Steps are applied in order, in a single transaction; if any step can't be afforded, nothing is converted.
+        
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        steps: list[tuple[ChipVector, ChipVector]]
+            Pairs of chips to remove from the Player's chips and chips to add in exchange
+
+        ### Returns
+        True
+            Chips successfully converted
+        False
+            Less current chips than a step requested to be removed
+        """
+
+        bal = self.chips
+        for consumed, produced in steps:
+            if not bal.covers(consumed):
+                return False
+            bal = bal - consumed + produced
 
-        self.chips = dumps(bal)
+        self.chips = bal
+        for consumed, produced in steps:
+            record(session, self.game_id, EventKind.CONVERT, self.user_id, consumed = consumed, produced = produced)
         session.commit()
         return True
     
-    def get_tf_entry(self) -> list[list[str | int | bool]]:
-        """Returns unjsonified tf entries
+    def cash_out(self, session: Session, account: ChipAccount, amount: ChipVector) -> bool:
+        """Move an amount of the Player's chips into a chip account, in one transaction; not tracked as used
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        account: ChipAccount
+            Account to move the chips to
+        amount: ChipVector
+            The chips to move
+
+        ### Returns
+        True
+            Chips successfully moved
+        False
+            Less current chips than was requested to be moved
+
+        ### Raises
+        InvalidArgumentError
+            Amount given is negative
+        """
+
+        if not amount.nonnegative():
+            raise InvalidArgumentError
+
+        if not self.move_to_account(session, account, amount):
+            return False
+        session.commit()
+        return True
+
+    def move_to_account(self, session: Session, account: ChipAccount, amount: ChipVector) -> bool:
+        """Move an amount of the Player's chips into a chip account, unless they changed since they were read; does not commit
+
+        Like ChipAccount.change_bal(), the chips are only removed if they are still what was read,
+        so two moves can't both spend the same chips; a move lost that way is retried once, against the chips read again.
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        account: ChipAccount
+            Account to move the chips to
+        amount: ChipVector
+            The chips to move
+
+        ### Returns
+        True
+            Chips moved
+        False
+            Less current chips than was requested, or they kept changing while they were read; nothing was moved
+        """
+
+        for attempt in range(2):
+            if not self.chips.covers(amount):
+                return False
+
+            moved = session.execute(
+                update(Player)
+                .where(Player.user_id == self.user_id, Player.game_id == self.game_id, Player.chips == self.chips)
+                .values(chips = self.chips - amount)
+                .execution_options(synchronize_session = False)
+            ).rowcount > 0
+            session.expire(self, ["chips"])
+            if moved:
+                break
+        else:
+            return False
+
+        account.change_bal(session, amount, LedgerReason.CASH_OUT, self.user_id)
+        record(session, self.game_id, EventKind.USE, self.user_id, chips = amount, track = False, account = account.id)
+        return True
+
+    def get_tf_entry(self) -> list["TFEntry"]:
+        """Returns the tf entries in order
         
         ### Returns
-        list[list[str | int | bool]]
-            Unjsonified version of tf list
+        list[TFEntry]
+            Every tf entry of the Player; their positions are the indices to refer to them by
         """
 
-        return loads(self.tfs)
+        return self.tf_entries
     
-    def set_tf_entry(self, session: Session, tfs: list[list[str | int | bool]]) -> None:
-        """Directly set entire tf list
+    def swap_tf_entries(self, session: Session, other: "Player") -> None:
+        """Exchange every tf entry with another Player of the same game
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        tfs: list[list[str | int | bool]]
-            List of TFs to set to
+        other: Player
+            Player to exchange tf entries with
         """
 
-        self.tfs = dumps(tfs)
+        # Move the entries in bulk without loading them; as positions overlap, this Player's entries are parked
+        # under the complement of their ID first, which is negative, and no Discord ID is
+        entries = SQLBase.metadata.tables["tf_entry"]
+        for old, new in ((self.user_id, ~self.user_id), (other.user_id, self.user_id), (~self.user_id, other.user_id)):
+            session.execute(update(entries).where(entries.c.game_id == self.game_id, entries.c.user_id == old).values(user_id = new))
+        session.expire(self, ["tf_entries"])
+        session.expire(other, ["tf_entries"])
+
+        self.tf_next, other.tf_next = other.tf_next, self.tf_next
+        self.tf_owed, other.tf_owed = other.tf_owed, self.tf_owed
         session.commit()
-    
+
     def add_tf_entry(self, session: Session, desc: str, cost: int, type: int) -> None:
         """Adds an entry to the list of tfs on the player
 
@@ -516,9 +950,10 @@ class Player(SQLBase):
             Type of chips cost
         """
 
-        tfs: list[list] = loads(self.tfs)
-        tfs.append([desc, cost, type, False])
-        self.tfs = dumps(tfs)
+        session.add(TFEntry(game_id = self.game_id, user_id = self.user_id, position = self.tf_next,
+            description = desc, cost = cost, cost_type = type, done = False))
+        self.tf_next += 1
+        self.tf_owed += ChipVector.of(type, cost)
 
         session.commit()
 
@@ -533,14 +968,15 @@ class Player(SQLBase):
 
         ### Raises
         InvalidArgumentError
-            Index out of bounds
+            No entry at that index
         """
 
-        tfs: list[list] = loads(self.tfs)
-        if index >= len(tfs):
+        entry = session.get(TFEntry, (self.game_id, self.user_id, index))
+        if entry is None:
             raise InvalidArgumentError
-        tfs.pop(index)
-        self.tfs = dumps(tfs)
+        if not entry.done:
+            self.tf_owed -= entry.get_cost()
+        session.delete(entry)
 
         session.commit()
 
@@ -555,17 +991,104 @@ class Player(SQLBase):
 
         ### Raises
         InvalidArgumentError
-            Index out of bounds
+            No entry at that index
         """
 
-        tfs: list[list] = loads(self.tfs)
-        if index >= len(tfs):
+        entry = session.get(TFEntry, (self.game_id, self.user_id, index))
+        if entry is None:
             raise InvalidArgumentError
-        tfs[index][3] = not tfs[index][3]
-        self.tfs = dumps(tfs)
+        entry.done = not entry.done
+        if entry.done:
+            self.tf_owed -= entry.get_cost()
+        else:
+            self.tf_owed += entry.get_cost()
 
         session.commit()
 
+    def archive(self, session: Session, history: "GameHistory", place: int | None) -> None:
+        """Copy the Player's final standing into the history of the game; committed by the caller
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        history: GameHistory
+            History of the Player's game
+        place: int | None
+            1 for the winner, 2 for the last to concede, and so on; None if the game ended without placing the Player
+        """
+
+        session.add(PlayerHistory(
+            history = history,
+            user_id = self.user_id,
+            time = int(time()),
+            name = self.name,
+            place = place,
+            chips = self.chips,
+            used = self.used,
+            tfs = dumps([[entry.description, entry.cost, entry.cost_type, entry.done] for entry in self.tf_entries])
+        ))
+
+
+class TFEntry(SQLBase):
+    """A TF planned on a Player
+
+    ### Attributes
+    [PRIMARY, FOREIGN] game_id: int
+        ID of the Game the Player is playing in
+    [PRIMARY, FOREIGN] user_id: int
+        User ID of the Player
+    [PRIMARY] position: int
+        Index of the entry among the Player's; kept when earlier entries are removed
+    description: str
+        Description of the tf
+    cost: int
+        Chip cost of the tf
+    cost_type: int
+        Type of chips cost
+    done: bool
+        Whether the tf has been done
+
+    ### Methods
+    get_cost() -> ChipVector
+        Return the cost as chips
+    """
+
+    __tablename__ = "tf_entry"
+    __table_args__ = (
+        ForeignKeyConstraint(["user_id", "game_id"], ["player.user_id", "player.game_id"], ondelete = "CASCADE"),
+        )
+
+    game_id: Mapped[int] = mapped_column(primary_key = True)
+    """ID of the Game the Player is playing in"""
+
+    user_id: Mapped[int] = mapped_column(primary_key = True)
+    """User ID of the Player"""
+
+    position: Mapped[int] = mapped_column(primary_key = True)
+    """Index of the entry among the Player's; kept when earlier entries are removed"""
+
+    description: Mapped[str]
+    """Description of the tf"""
+
+    cost: Mapped[int]
+    """Chip cost of the tf"""
+
+    cost_type: Mapped[int]
+    """Type of chips cost"""
+
+    done: Mapped[bool] = mapped_column(default = False)
+    """Whether the tf has been done"""
+
+    def get_cost(self) -> ChipVector:
+        """Return the cost as chips
+
+        ### Returns
+        ChipVector
+            The cost in its chip type
+        """
+
+        return ChipVector.of(self.cost_type, self.cost)
+
 
 class Game(SQLBase):
     """Represents a currently running game for a channel/thread.
@@ -581,16 +1104,26 @@ class Game(SQLBase):
         Player subclass that corresponds to this Game subclass
     [CLASS] max_players: int
         Max amount of players the game of this type can handle; 0 means infinite
-    [CLASS] bet_cap: list[int]
+    [CLASS] bet_cap: ChipVector
         The maximum amount of chips that can be bet in a Game
     stake: int
         0 - low stakes, 1 - normal stakes, 2 - high stakes
     bet_turn: int
         Player index whose turn it is to bet
-    current_bet: str
+    current_bet: ChipVector
         The current bet for the round within the game
+    bets_matching: int
+        How many players' bets match the nonzero bet of the player whose turn it is to bet
+    turn_deadline: int | None
+        Unix time the current turn times out at; None if no turn is running
     started: bool
         Whether or not the game's first round has begun
+    rng_seed: int
+        Seed of the game's random stream
+    rng_counter: int
+        How many times the game has used its randomness
+    last_active: int
+        Unix time of the last change to the game
 
     ### Methods
     [CLASS] create_game(session: sqlalchemy.orm.Session, channel_id: int) -> None
@@ -599,17 +1132,17 @@ class Game(SQLBase):
         Return object of Game subclass for a channel, if any
     join_game(session: sqlalchemy.orm.Session, user: int, name: str) -> Player | None
         Attempt to add a Player to this game; does not check max players, see Game.is_full()
-    end(session: sqlalchemy.orm.Session) -> None
-        Wipe the Game from the database
+    end(session: sqlalchemy.orm.Session, cash_out: bool = False) -> list[tuple[str, str, ChipVector]]
+        Wipe the Game from the database, keeping its history if it started, and optionally cashing out every player
     set_stake(session: sqlalchemy.orm.Session, bet: list[int], stake: int = 1) -> None
         Set the current bet for the round
     get_bet_turn() -> Player
         Return the player who will initiate the bet for the round
     advance_bet_turn(session: sqlalchemy.orm.Session, target: int = -1) -> Player
         Advances the bet turn
-    get_bet() -> list[int]
-        Return the current bet for the round unjsonified
-    set_bet(session: sqlalchemy.orm.Session, bet: list[int]) -> None
+    get_bet() -> ChipVector
+        Return the current bet for the round
+    set_bet(session: sqlalchemy.orm.Session, bet: ChipVector) -> None
         Set the current bet for the round
     is_midround() -> bool
         Test if the game is currently in the middle of a round; i.e. bets have been set
@@ -619,8 +1152,24 @@ class Game(SQLBase):
         Return Player of current game if it actually exists
     bets_aligned() -> bool:
         Test if all players' bets are aligned and set
+    count_matching_bets(players: list[Player] | None = None) -> None
+        Recount how many players' bets match that of the player whose turn it is to bet
     end_round(session: sqlalchemy.orm.Session):
         Do general round end logic
+    tally_round(session: sqlalchemy.orm.Session, winner: Player, won: ChipVector, win_con: int = 0) -> None
+        Count the round being ended into every player's statistics
+    player_accounts(session: sqlalchemy.orm.Session) -> dict[int, ChipAccount]
+        Return the chip account each player keeps under their name, if any
+    start_turn_timer(session: sqlalchemy.orm.Session) -> None
+        Give the turn starting now the full turn timeout
+    stop_turn_timer(session: sqlalchemy.orm.Session) -> None
+        Stop timing the current turn
+    is_secure() -> bool
+        Whether the game draws from OS entropy instead of its seed
+    shuffle_cards(session: sqlalchemy.orm.Session, cards: list[int]) -> list[int]
+        Shuffle cards with the game's next generator, logging the shuffle
+    rng() -> random.Random
+        Get the generator for the game's next use of randomness
     """
 
     __tablename__ = "game"
@@ -647,7 +1196,7 @@ class Game(SQLBase):
     Overwritten per child class
     """
 
-    bet_cap: list[int] = [100, 20, 2, 20, 3, 25]
+    bet_cap: ChipVector = rules.BET_CAP
     """The maximum amount of chips that can be bet in a Game"""
 
     bet_turn: Mapped[int] = mapped_column(default = 0)
@@ -656,15 +1205,39 @@ class Game(SQLBase):
     stake: Mapped[int] = mapped_column(default = 1)
     """0 - low stakes, 1 - normal stakes, 2 - high stakes"""
 
-    current_bet: Mapped[str] = mapped_column(default = "[0, 0, 0, 0, 0, 0]")
+    current_bet: Mapped[ChipVector] = mapped_column(ChipColumn, default = ChipVector.ZERO)
     """The current bet for the round within the game
 
     If bet is all zeroes, then round hasn't started yet.
     """
 
+    bets_matching: Mapped[int] = mapped_column(default = 0)
+    """How many players' bets match the nonzero bet of the player whose turn it is to bet
+
+    Kept up to date by Player.set_bet(); bets are aligned once it counts every player.
+    """
+
+    turn_deadline: Mapped[int | None] = mapped_column(default = None)
+    """Unix time the current turn times out at; None if no turn is running
+
+    Kept for restarts; see modules.base.timers.
+    """
+
     started: Mapped[bool] = mapped_column(default = False)
     """Whether or not the game's first round has begun"""
 
+    rng_seed: Mapped[int] = mapped_column(default = new_seed)
+    """Seed of the game's random stream; with rng_counter, reproduces every shuffle of the game"""
+
+    rng_counter: Mapped[int] = mapped_column(default = 0)
+    """How many times the game has used its randomness"""
+
+    last_active: Mapped[int] = mapped_column(index = True, default = lambda: int(time()))
+    """Unix time of the last change to the game; updated with every event recorded, see modules.base.events
+
+    Games idle for long enough are cleaned up by modules.base.sweeper.
+    """
+
     @classmethod
     def create_game(cls, session: Session, channel_id: int, stake: int = 1) -> None:
         """Create a game if there isn't one in the channel already
@@ -681,8 +1254,10 @@ class Game(SQLBase):
         if session.get(Game, channel_id) is not None:
             return
         
-        new_game = cls(id = channel_id, stake = stake)
+        new_game = cls(id = channel_id, stake = stake, rng_seed = new_seed())
         session.add(new_game)
+        record(session, channel_id, EventKind.CREATE, type = cls.__mapper_args__["polymorphic_identity"],
+            stake = stake, seed = new_game.rng_seed)
 
         session.commit()
 
@@ -726,21 +1301,51 @@ class Game(SQLBase):
         
         player = self.player_class(user_id = user, game_id = self.id, name = name)
         session.add(player)
+        record(session, self.id, EventKind.JOIN, user, name = name)
         
         session.commit()
         return player
 
-    def end(self, session: Session) -> None:
-        """Wipe the Game from the database
+    def end(self, session: Session, cash_out: bool = False) -> list[tuple[str, str, ChipVector]]:
+        """Wipe the Game from the database, keeping its history if it started; see GameHistory
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
+        cash_out: bool = False
+            Whether to move every player's chips into their chip account, i.e. the account they own under their name,
+            in the same transaction
+
+        ### Returns
+        list[tuple[str, str, ChipVector]]
+            Name, account name and chips of every player cashed out
         """
 
+        if self.started:
+            history = GameHistory.for_game(session, self)
+            history.ended = int(time())
+            # Only the last player standing is placed; games ended otherwise, e.g. by an admin, have no winner
+            place = 1 if len(self.players) == 1 else None
+            for player in self.players:
+                player.archive(session, history, place)
+
+        cashed = []
+        if cash_out:
+            accounts = self.player_accounts(session)
+            for player in self.players:
+                account = accounts.get(player.user_id)
+                chips = player.chips
+                # A player whose chips kept changing while they were read, i.e. by another process, is left out
+                if account is not None and not chips.is_zero() and player.move_to_account(session, account, chips):
+                    cashed.append((player.name, account.name, chips))
+
+        record(session, self.id, EventKind.END)
+        self.stop_turn_timer(session)
         session.delete(self)
         session.commit()
 
+        return cashed
+
     def set_stake(self, session: Session, stake: int) -> None:
         """Set the game's stake
         
@@ -759,6 +1364,7 @@ class Game(SQLBase):
             raise InvalidArgumentError
         
         self.stake = stake
+        record(session, self.id, EventKind.STAKE, stake = stake)
 
         session.commit()
 
@@ -795,29 +1401,32 @@ class Game(SQLBase):
             raise InvalidArgumentError
         else:
             self.bet_turn = target
+        self.count_matching_bets()
 
+        record(session, self.id, EventKind.BET_TURN, turn = self.bet_turn)
         session.commit()
         return self.get_bet_turn()
 
-    def get_bet(self) -> list[int]:
-        """Return the current bet for the round unjsonified
+    def get_bet(self) -> ChipVector:
+        """Return the current bet for the round
         
         ### Returns
-        List of ints corresponding to chip amounts
+        ChipVector of chip amounts
         """
-        return loads(self.current_bet)
+        return self.current_bet
 
-    def set_bet(self, session: Session, bet: list[int]) -> None:
+    def set_bet(self, session: Session, bet: ChipVector) -> None:
         """Set the current bet for the round
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
-        bet: list[int]
-            List of chip amounts to bet for each chip type
+        bet: ChipVector
+            Chip amounts to bet for each chip type
         """
 
-        self.current_bet = dumps(bet)
+        self.current_bet = ChipVector(bet)
+        record(session, self.id, EventKind.ROUND_BET, bet = bet)
 
         # Setting bet equivalent to starting round
         if not self.started:
@@ -835,7 +1444,7 @@ class Game(SQLBase):
             Game not in round (no bet)
         """
 
-        return self.current_bet != "[0, 0, 0, 0, 0, 0]"
+        return not self.current_bet.is_zero()
     
     def is_full(self) -> bool:
         """Test if the max amount of players have joined
@@ -874,20 +1483,25 @@ class Game(SQLBase):
         """
 
         # No point in checking if only 1 player
-        if len(self.players) < 2:
-            return False
+        return len(self.players) >= 2 and self.bets_matching == len(self.players)
 
-        # Make sure bets are nonzero, i.e. bets have actually been placed
-        for player in self.players:
-            if player.bet == "[0, 0, 0, 0, 0, 0]":
-                return False
+    def count_matching_bets(self, players: "list[Player] | None" = None) -> None:
+        """Recount how many players' bets match that of the player whose turn it is to bet;
+        for when that player's bet changes or another player's turn begins
 
-        # Associative property; only need to check consecutive pairs
-        for i in range(len(self.players) - 1):
-            if self.players[i].bet != self.players[i + 1].bet:
-                return False
+        ### Parameters
+        players: list[Player] | None = None
+            Players of the game, if they differ from the players relationship yet, e.g. while one is leaving
+        """
 
-        return True
+        if players is None:
+            players = self.players
+        if len(players) == 0:
+            self.bets_matching = 0
+            return
+
+        leading = players[self.bet_turn].bet
+        self.bets_matching = 0 if leading.is_zero() else sum(player.bet == leading for player in players)
 
     def end_round(self, session: Session):
         """Do general round end logic;
@@ -900,11 +1514,134 @@ class Game(SQLBase):
             Database session scope
         """
 
-        self.current_bet = "[0, 0, 0, 0, 0, 0]"
+        self.current_bet = ChipVector.ZERO
         for player in self.players:
-            player.bet = "[0, 0, 0, 0, 0, 0]"
+            player.bet = ChipVector.ZERO
+        self.bets_matching = 0
+        self.stop_turn_timer(session)
         self.advance_bet_turn(session)
 
+    def tally_round(self, session: Session, winner: Player, won: ChipVector, win_con: int = 0) -> None:
+        """Count the round being ended into every player's statistics, by user and by chip account; does not commit
+
+        To be called before end_round(), while the round's bet is still set.
+        Only players with an account under their name, see player_accounts(), have account statistics.
+        Every row counts the round once: seats sharing a key count as one, which won if any of them won.
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        winner: Player
+            The Player who won the round
+        won: ChipVector
+            Chips paid to the winner
+        win_con: int = 0
+            Win condition; 0 = norm, 1 = blackjack, 2 = five card charlie
+        """
+
+        held = self.player_accounts(session)
+        user_ids = {player.user_id for player in self.players}
+        account_ids = {account.id for account in held.values()}
+        winner_account = held[winner.user_id].id if winner.user_id in held else None
+        users = UserStats.rows(session, user_ids)
+        accounts = AccountStats.rows(session, account_ids)
+
+        for period in stat_periods():
+            for rows, keys, winner_key in ((users, user_ids, winner.user_id), (accounts, account_ids, winner_account)):
+                for key in keys:
+                    if key == winner_key:
+                        rows[period, key].add_round(True, won, win_con)
+                    else:
+                        rows[period, key].add_round(False, self.current_bet)
+
+    def player_accounts(self, session: Session) -> dict[int, ChipAccount]:
+        """Return the chip account each player keeps under their name, if any; i.e. one they own, named alike in any case
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+
+        ### Returns
+        dict[int, ChipAccount]
+            Accounts by user ID of the player; players without one are left out
+        """
+
+        if not self.players:
+            return {}
+
+        accounts = {
+            (account.owner_id, account.name_key): account
+            for account in session.scalars(select(ChipAccount).where(ChipAccount.owner_id.in_([player.user_id for player in self.players])))
+        }
+        return {
+            player.user_id: accounts[player.user_id, player.name.casefold()]
+            for player in self.players
+            if (player.user_id, player.name.casefold()) in accounts
+        }
+
+    def start_turn_timer(self, session: Session) -> None:
+        """Give the turn starting now the full turn timeout; does not commit
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        """
+
+        self.turn_deadline = new_deadline()
+        schedule(session, self.id, self.turn_deadline)
+
+    def stop_turn_timer(self, session: Session) -> None:
+        """Stop timing the current turn, i.e. once the round is over; does not commit
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        """
+
+        if self.turn_deadline is not None:
+            self.turn_deadline = None
+            schedule(session, self.id, None)
+
+    def is_secure(self) -> bool:
+        """Whether the game draws from OS entropy instead of its seed; true for stakes listed in the config"""
+
+        return self.stake in config["rng"]["secure_stakes"]
+
+    def shuffle_cards(self, session: Session, cards: list[int]) -> list[int]:
+        """Shuffle cards with the game's next generator, logging the shuffle; does not commit
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        cards: list[int]
+            Cards to shuffle
+
+        ### Returns
+        list[int]
+            New list of the cards in shuffled order
+        """
+
+        result = shuffled(self.rng(), cards)
+
+        # A seeded shuffle can be redone from the counter; a secure one can only be kept
+        if self.is_secure():
+            record(session, self.id, EventKind.SHUFFLE, counter = self.rng_counter, cards = result)
+        else:
+            record(session, self.id, EventKind.SHUFFLE, counter = self.rng_counter, size = len(cards))
+
+        return result
+
+    def rng(self) -> Random:
+        """Get the generator for the game's next use of randomness, e.g. a shuffle; does not commit
+
+        ### Returns
+        random.Random
+            Generator derived from the game's seed and counter, or from OS entropy for secure games
+        """
+
+        self.rng_counter += 1
+        return game_rng(self.rng_seed, self.rng_counter, self.is_secure())
+
 
 class MiscPlayer(Player):
     """Represents a player of a Misc game. Inherits most attributes of Player.
@@ -953,6 +1690,8 @@ class Misc(Game):
         Get the current deck unjsonified
     draw(session: sqlalchemy.orm.Session, amount: int) -> list[int]
         Draw a single or multiple cards
+    roll(session: sqlalchemy.orm.Session, user: int, amount: int, sides: int) -> list[int]
+        Roll dice with the game's next generator, logging the roll
     end_round(session: sqlalchemy.orm.Session) -> tuple[str, list[tuple[int, str]]]:
         Give the winner the winnings, returning index/name of winner(s); more than 1 means tie
     """
@@ -982,7 +1721,7 @@ class Misc(Game):
             Database session scope
         """
 
-        self.deck = dumps(sample(range(52), 52))
+        self.deck = dumps(self.shuffle_cards(session, list(range(52))))
         session.commit()
 
     def get_deck(self) -> list[int]:
@@ -995,6 +1734,36 @@ class Misc(Game):
         
         return loads(self.deck)
 
+    def roll(self, session: Session, user: int, amount: int, sides: int) -> list[int]:
+        """Roll dice with the game's next generator, logging the roll like a shuffle, so that it can be reproduced
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        user: int
+            ID of the user rolling
+        amount: int
+            Amount of dice to roll
+        sides: int
+            Amount of sides of each die
+
+        ### Returns
+        list[int]
+            Result of each die
+        """
+
+        rng = self.rng()
+        dice = [rng.randint(1, sides) for i in range(amount)]
+
+        # A seeded roll can be redone from the counter; a secure one can only be kept
+        if self.is_secure():
+            record(session, self.id, EventKind.ROLL, user, counter = self.rng_counter, amount = amount, sides = sides, dice = dice)
+        else:
+            record(session, self.id, EventKind.ROLL, user, counter = self.rng_counter, amount = amount, sides = sides)
+        session.commit()
+
+        return dice
+
     def draw(self, session: Session, amount: int = 1) -> list[int]:
         """Draw a single or multiple cards
         
@@ -1021,6 +1790,7 @@ class Misc(Game):
         cards: list[int] = current_deck[:-(amount + 1):-1]
         del current_deck[-amount:]
         self.deck = dumps(current_deck)
+        record(session, self.id, EventKind.DRAW, cards = cards)
 
         session.commit()
         return cards
@@ -1037,9 +1807,11 @@ class Misc(Game):
 
         for player in self.players:
             if player.user_id == winner:
-                player.pay_chips(session, loads(self.current_bet))
+                player.add_chips(session, self.current_bet)
+                self.tally_round(session, player, self.current_bet)
                 break
 
+        record(session, self.id, EventKind.ROUND_END, winners = [winner], bet = ChipVector.ZERO)
         super().end_round(session)
 
 
@@ -1053,12 +1825,26 @@ class BlackjackPlayer(Player):
         ID of the game the Player is playing in
     hand: str
         Jsonified list of cards within player's hand
-    state: str
-        Either 'hit', 'stand', or 'bust'; represents state of player's hand
+    state: rules.HandState
+        Whether the player's hand is hitting, standing, or busted
+    hand_total: int
+        Running value of the hand, aces applicable
+    soft_aces: int
+        Aces in the hand still counted as 11
+    hand_size: int
+        Amount of cards in the hand
+    next_hitter: int
+        Index of the next player still hitting this round, in turn order
+    prev_hitter: int
+        Index of the previous player still hitting this round, in turn order
 
     ### Methods
     get_hand(hidden: bool = False) -> list[int]
         Parses hand to list of ints
+    get_state(cards: bool = False) -> rules.BlackjackHand
+        Loads the hand's running totals into the rules engine's state object
+    set_state(state: rules.BlackjackHand) -> None
+        Stores the rules engine's state object into the hand
     stand(session: sqlalchemy.orm.Session) -> None
         Set state to standing
     add_card(session: sqlalchemy.orm.Session, card: int) -> bool
@@ -1067,6 +1853,8 @@ class BlackjackPlayer(Player):
         Calculate the value of the hand for direct comparison
     busted() -> bool
         Returns whether the player has busted
+    leave(session: sqlalchemy.orm.Session) -> None
+        Remove Player from Game, keeping the game's turn tracking consistent
     """
 
     __tablename__ = "blackjack_player"
@@ -1086,8 +1874,23 @@ class BlackjackPlayer(Player):
     hand: Mapped[str] = mapped_column(default = "[]")
     """Jsonified list of cards within player's hand"""
 
-    state: Mapped[str] = mapped_column(default = "hit")
-    """Either 'hit', 'stand', or 'bust'; represents state of player's hand"""
+    state: Mapped[int] = mapped_column("hand_state", default = rules.HandState.HIT)
+    """rules.HandState of the player's hand; only to be changed through Blackjack.move_hand() mid-round"""
+
+    hand_total: Mapped[int] = mapped_column(default = 0)
+    """Running value of the hand, aces applicable; kept up to date with the hand"""
+
+    soft_aces: Mapped[int] = mapped_column(default = 0)
+    """Aces in the hand still counted as 11"""
+
+    hand_size: Mapped[int] = mapped_column(default = 0)
+    """Amount of cards in the hand"""
+
+    next_hitter: Mapped[int] = mapped_column(default = -1)
+    """Index of the next player still hitting this round, in turn order; kept after this player stops hitting"""
+
+    prev_hitter: Mapped[int] = mapped_column(default = -1)
+    """Index of the previous player still hitting this round, in turn order"""
 
     def get_hand(self, hidden: bool = False) -> list[int]:
         """Parses hand to list of ints
@@ -1103,9 +1906,41 @@ class BlackjackPlayer(Player):
 
         hand = loads(self.hand)
         if hidden and len(hand) >= 2:
-            hand[1] = 52
+            hand[1] = rules.HIDDEN_CARD
 
         return hand
+
+    def get_state(self, cards: bool = False) -> rules.BlackjackHand:
+        """Loads the hand's running totals into the rules engine's state object
+
+        ### Parameters
+        cards: bool = False
+            Whether to also parse the cards, i.e. to add more to the hand
+
+        ### Returns
+        rules.BlackjackHand
+            Value and state of the hand
+        """
+
+        return rules.BlackjackHand.restore(rules.HandState(self.state), self.hand_total, self.soft_aces, self.hand_size,
+            self.get_hand() if cards else None)
+
+    def set_state(self, state: rules.BlackjackHand) -> None:
+        """Stores the rules engine's state object into the hand; does not commit
+
+        Mid-round, state changes must go through Blackjack.move_hand() first so that the game's counts stay right
+
+        ### Parameters
+        state: rules.BlackjackHand
+            Hand to store; its cards are only written if they were loaded
+        """
+
+        if state.cards is not None:
+            self.hand = dumps(state.cards)
+        self.state = state.state
+        self.hand_total = state.total
+        self.soft_aces = state.soft_aces
+        self.hand_size = state.size
     
     def stand(self, session: Session) -> None:
         """Set state to standing
@@ -1115,7 +1950,8 @@ class BlackjackPlayer(Player):
             Database session scope
         """
 
-        self.state = "stand"
+        self.game.move_hand(self, rules.HandState.STAND)
+        record(session, self.game_id, EventKind.STAND, self.user_id)
         session.commit()
     
     def add_card(self, session: Session, card: int) -> bool:
@@ -1134,17 +1970,14 @@ class BlackjackPlayer(Player):
             If hand busted from adding the card
         """
 
-        hand = self.get_hand()
-        hand.append(card)
-        self.hand = dumps(hand)
-
-        # Calculate hand value
-        hand_value = self.hand_value()
-        if hand_value == 0:
-            self.state = "bust"
+        hand = self.get_state(True)
+        unbusted = rules.hit(hand, card)
+        self.game.move_hand(self, hand.state)
+        self.set_state(hand)
+        record(session, self.game_id, EventKind.HIT, self.user_id, card = card)
 
         session.commit()
-        return bool(hand_value)
+        return unbusted
 
     def hand_value(self, hidden: bool = False, raw: bool = False) -> int:
         """Calculate the value of the hand for direct comparison
@@ -1166,41 +1999,48 @@ class BlackjackPlayer(Player):
             5-Card Charlie: 4
         """
 
-        hand = self.get_hand(hidden)
-
-        # Remove suits and convert to direct value
-        # 52 is hidden card; value is at least 1
-        hand = [
-            1 if i == 52
-            else 11 if i % 13 + 2 == 14
-            else min(i % 13 + 2, 10)
-            for i in hand
-        ]
-        val = sum(hand)
-        
-        # Try to reduce aces if busting
-        while val > 21 and 11 in hand:
-            hand[hand.index(11)] = 1
-            val -= 10
-
-        if raw:
-            return val
-        
-        if len(hand) == 0:
-            return 1
-        elif len(hand) >= 5:
-            return 4
-        elif val > 21:
-            return 0
-        elif val == 21:
-            return 3
-        else:
-            return 2
+        # The face-down card can't be taken back out of the running total
+        if hidden and self.hand_size >= 2:
+            return rules.hand_value(self.get_hand(True), raw)
+
+        return self.get_state().value(raw)
         
     def busted(self) -> bool:
         """Returns whether the player has busted"""
 
-        return self.state == "bust"
+        return self.state == rules.HandState.BUST
+
+    def leave(self, session: Session) -> None:
+        """Remove Player from Game, i.e. delete Player from database
+
+        Also handle turn tracking as a result of leaving, i.e. if removed by an admin mid-round
+        
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        """
+
+        game: Blackjack = self.game
+        index = self.get_index()
+
+        if game.is_midround():
+            if index == game.curr_turn and game.hitting > 1:
+                game.curr_turn = self.next_hitter
+                game.start_turn_timer(session)
+            game.move_hand(self, rules.HandState.BUST)
+            game.busted -= 1
+
+            # Every later index shifts down by one once this player is gone
+            for player in game.players:
+                if player.next_hitter > index:
+                    player.next_hitter -= 1
+                if player.prev_hitter > index:
+                    player.prev_hitter -= 1
+
+        if index < game.curr_turn:
+            game.curr_turn -= 1
+
+        super().leave(session)
 
 
 class Blackjack(Game):
@@ -1217,18 +2057,30 @@ class Blackjack(Game):
         The first turn of the round; determines ordering of the hands in first post
     curr_turn: int
         The current turn of the round; corresponds to index of player list
-    deck: str
-        The current deck to be pulled from; jsonified array of ints where each int corresponds to default deck index
+    hitting: int
+        Amount of hands still hitting this round
+    standing: int
+        Amount of hands standing this round
+    busted: int
+        Amount of hands busted this round, including players not dealt into a tie round
+    shoe: bytes
+        Every card of the shoe in shuffled order, one byte each holding the standard deck index
+    shoe_pos: int
+        Position of the next card to be drawn from the shoe
 
     ### Methods
     shuffle(session: sqlalchemy.orm.Session) -> None
-        Shuffle all cards back into the deck
-    draw(session: sqlalchemy.orm.Session, amount: int = 1) -> list[int] | int
+        Shuffle all cards back into the shoe
+    draw(session: sqlalchemy.orm.Session, amount: int = 1) -> list[int]
         Draw a single or multiple cards
+    cards_left() -> int
+        Amount of cards left in the shoe
     start_round(session: sqlalchemy.orm.Session, players: list[BlackjackPlayer] = None) -> bool
         Deal the initial two cards to each player given and rotate turn order
     get_turn() -> BlackjackPlayer
         Get player whose turn it is
+    move_hand(player: BlackjackPlayer, state: rules.HandState) -> None
+        Change the state of a player's hand mid-round, updating counts and turn order
     is_all_done() -> bool:
         Test whether every player has stood/busted
     next_turn(session: sqlalchemy.orm.Session) -> None
@@ -1236,7 +2088,7 @@ class Blackjack(Game):
     end_round(session: sqlalchemy.orm.Session) -> tuple[int, tuple[BlackjackPlayer]]:
         Give the winner the winnings, returning winner(s); more than 1 means tie
     get_deck() -> list[int]
-        Get the current deck unjsonified
+        Get the cards left in the shoe, in drawing order
     """
 
     __tablename__ = "blackjack"
@@ -1250,29 +2102,54 @@ class Blackjack(Game):
     player_class = BlackjackPlayer
     """Player subclass that corresponds to this Game subclass"""
 
-    max_players: int = 4
+    max_players: int = config["blackjack"]["max_players"]
     """Max amount of players the game of this type can handle"""
 
+    decks: int = config["blackjack"]["decks"]
+    """Amount of decks shuffled together into the shoe"""
+
+    penetration: float = config["blackjack"]["penetration"]
+    """Share of the shoe dealt before it is reshuffled at the start of a round"""
+
     round_turn: Mapped[int] = mapped_column(default = -1)
     """The first turn of the round; determines ordering of the hands in first post"""
 
     curr_turn: Mapped[int] = mapped_column(default = 0)
     """The current turn of the round; corresponds to index of player list"""
 
-    deck: Mapped[str] = mapped_column(default = "[]")
-    """The current deck to be pulled from; jsonified array of ints where each int corresponds to default deck index"""
+    hitting: Mapped[int] = mapped_column(default = 0)
+    """Amount of hands still hitting this round"""
+
+    standing: Mapped[int] = mapped_column(default = 0)
+    """Amount of hands standing this round"""
+
+    busted: Mapped[int] = mapped_column(default = 0)
+    """Amount of hands busted this round, including players not dealt into a tie round"""
+
+    shoe: Mapped[bytes] = mapped_column(default = b"")
+    """Every card of the shoe in shuffled order, one byte each holding the standard deck index"""
+
+    shoe_pos: Mapped[int] = mapped_column(default = 0)
+    """Position of the next card to be drawn from the shoe"""
 
     def shuffle(self, session: Session) -> None:
-        """Shuffle all cards back into the deck
+        """Shuffle all cards back into the shoe
         
         ### Parameters
         session: sqlalchemy.orm.Session
             Database session scope
         """
 
-        self.deck = dumps(sample(range(52), 52))
+        cards = list(range(rules.DECK_SIZE)) * self.decks
+        self.shoe = bytes(self.shuffle_cards(session, cards))
+        self.shoe_pos = 0
         session.commit()
 
+    def cards_left(self) -> int:
+        """Amount of cards left in the shoe"""
+
+        return len(self.shoe) - self.shoe_pos
+
     def draw(self, session: Session, amount: int = 1) -> list[int]:
         """Draw a single or multiple cards
         
@@ -1282,16 +2159,21 @@ class Blackjack(Game):
         amount: int = 1
             Amount of cards to draw
         
+        ### Raises
+        InvalidArgumentError
+            More cards to be drawn than there are in the shoe
+
         ### Returns
         list[int]
             Cards indices drawn
         """
 
-        current_deck: list[int] = loads(self.deck)
+        if self.cards_left() < amount:
+            raise InvalidArgumentError
 
-        cards: list[int] = current_deck[:-(amount + 1):-1]
-        del current_deck[-amount:]
-        self.deck = dumps(current_deck)
+        cards = list(self.shoe[self.shoe_pos:self.shoe_pos + amount])
+        self.shoe_pos += amount
+        record(session, self.id, EventKind.DRAW, cards = cards)
 
         session.commit()
         return cards
@@ -1312,26 +2194,47 @@ class Blackjack(Game):
             Deck was not shuffled
         """
 
-        # Store shuffled bool to return later
-        if shuffled := (len(loads(self.deck)) <= 26):
-            self.shuffle(session)
-
         if players is None:
             players = self.players
 
+        # Store shuffled bool to return later; also reshuffle if the round could run out of cards,
+        # as no hand ever takes more than 5
+        if shuffled := (
+            self.cards_left() <= len(self.shoe) * (1 - self.penetration)
+            or self.cards_left() < 5 * len(players)
+        ):
+            self.shuffle(session)
+
         drawn: list[int] = self.draw(session, 2 * len(players))
+        hands = []
         for player in self.players:
             if player in players:
                 # Draw two cards off the deck and delete them
-                player.state = "hit"
-                player.hand = dumps(drawn[-2:])
+                player.set_state(rules.BlackjackHand(drawn[-2:], rules.HandState.HIT))
+                hands.append([player.user_id, drawn[-2:]])
                 del drawn[-2:]
             else:
                 # Don't give a hand; it's a tie round and this player's not part of it
-                player.state = "bust"
-                player.hand = "[]"
-
-        self.next_turn(session)
+                player.set_state(rules.BlackjackHand([], rules.HandState.BUST))
+
+        # Link every dealt player into a ring in turn order
+        hitters = [i for i, player in enumerate(self.players) if player.state == rules.HandState.HIT]
+        for j, i in enumerate(hitters):
+            self.players[i].next_hitter = hitters[(j + 1) % len(hitters)]
+            self.players[i].prev_hitter = hitters[j - 1]
+        self.hitting = len(hitters)
+        self.standing = 0
+        self.busted = len(self.players) - len(hitters)
+        record(session, self.id, EventKind.DEAL, hands = hands)
+
+        # First turn goes to the first dealt player after whoever last had the turn
+        count = len(self.players)
+        self.curr_turn = next(
+            (self.curr_turn + k) % count
+            for k in range(1, count + 1)
+            if self.players[(self.curr_turn + k) % count].state == rules.HandState.HIT
+        )
+        self.start_turn_timer(session)
 
         session.commit()
 
@@ -1345,6 +2248,32 @@ class Blackjack(Game):
         """
 
         return self.players[self.curr_turn]
+
+    def move_hand(self, player: BlackjackPlayer, state: rules.HandState) -> None:
+        """Change the state of a player's hand mid-round, updating counts and turn order; does not commit
+
+        A player who stops hitting is unlinked from the ring of hitters, but keeps their own links,
+        so that the turn can still advance from them.
+
+        ### Parameters
+        player: BlackjackPlayer
+            Player in this game whose hand changes
+        state: rules.HandState
+            New state of the hand
+        """
+
+        if player.state == state:
+            return
+
+        counts = ("hitting", "standing", "busted")
+        setattr(self, counts[player.state], getattr(self, counts[player.state]) - 1)
+        setattr(self, counts[state], getattr(self, counts[state]) + 1)
+
+        if player.state == rules.HandState.HIT:
+            self.players[player.prev_hitter].next_hitter = player.next_hitter
+            self.players[player.next_hitter].prev_hitter = player.prev_hitter
+
+        player.state = state
     
     def is_all_done(self) -> bool:
         """Test whether every player has stood/busted
@@ -1356,23 +2285,7 @@ class Blackjack(Game):
             At least one player is still Hitting
         """
 
-        states = [0, 0, 0]
-        for player in self.players:
-            if player.state == "hit":
-                states[0] += 1
-            elif player.state == "stand":
-                states[1] += 1
-            elif player.state == "bust":
-                states[2] += 1
-
-        # If all but one player have busted, that player auto wins
-        if states[2] == len(self.players) - 1:
-            return True
-        # Otherwise, more than 1 player is still hitting/standing; end play when all are standing/busting
-        if states[0] == 0:
-            return True
-        
-        return False
+        return rules.tally_over(self.hitting, self.busted, len(self.players))
     
     def next_turn(self, session: Session) -> None:
         """Advance the turn counter
@@ -1382,10 +2295,10 @@ class Blackjack(Game):
             Database session scope
         """
 
-        self.curr_turn = (self.curr_turn + 1) % len(self.players)
-        # Don't let it land on someone who can't hit to advance the turn
-        while self.players[self.curr_turn].state != "hit":
-            self.curr_turn = (self.curr_turn + 1) % len(self.players)
+        # Players who just stopped hitting still point to the next hitter
+        if self.hitting > 0:
+            self.curr_turn = self.get_turn().next_hitter
+        self.start_turn_timer(session)
 
         session.commit()
 
@@ -1407,54 +2320,34 @@ class Blackjack(Game):
         """
 
         # Compare final hands
-        end_vals: list[int] = [player.hand_value() for player in self.players]
-        winner_val = max(end_vals)
-        win_con = winner_val - 2
-
-        # Test for the need for a normal value test, if no blackjack or 5-card
-        if winner_val == 2:
-            end_vals = [
-                player.hand_value(raw = True) 
-                    if not player.busted() 
-                    else 0 
-                for player in self.players
-            ]
-            winner_val = max(end_vals)
-
-        winners = [self.players[i] for i in range(len(end_vals)) if end_vals[i] == winner_val]
+        win_con, winners = rules.blackjack_winners([player.get_state() for player in self.players])
+        winners = [self.players[i] for i in winners]
 
         # If more than 1 winner, then tie occurred
         if len(winners) == 1:
             # Give winner the bet value, then reset bets
-            winners[0].pay_chips(session, loads(self.current_bet))
+            # Paid in the same commit as the statistics, by super().end_round()
+            winners[0].add_chips(session, self.current_bet)
+            self.tally_round(session, winners[0], self.current_bet, win_con)
+            record(session, self.id, EventKind.ROUND_END, winners = [winners[0].user_id], bet = ChipVector.ZERO)
             super().end_round(session)
         else:
-            # Multiply bet
-            bet = loads(self.current_bet)
-            if win_con > 0:
-                for i in range(len(bet)):
-                    bet[i] *= 9
-            else:
-                for i in range(len(bet)):
-                    bet[i] *= 3
-
-            # Conform to bet cap
-            clamp(bet, self.bet_cap)
-
-            self.current_bet = dumps(bet)
+            # Multiply bet, conforming to bet cap
+            self.current_bet = rules.tie_bet(self.current_bet, win_con, self.bet_cap)
+            record(session, self.id, EventKind.ROUND_END, winners = [player.user_id for player in winners], bet = self.get_bet())
             session.commit()
         
         return (win_con, tuple(winners))
 
     def get_deck(self) -> list[int]:
-        """Get the current deck unjsonified
+        """Get the cards left in the shoe, in drawing order
         
         ### Returns
         list[int]
-            List of card indices in the deck
+            List of card indices in the shoe
         """
         
-        return loads(self.deck)
+        return list(self.shoe[self.shoe_pos:])
 
 
 class TourneyPlayer(Player):
@@ -1475,6 +2368,10 @@ class TourneyPlayer(Player):
     ### Methods
     get_hand() -> list[list[int | bool]]
         Parses hand to list of pairs of cards and whether they've been played or not
+    get_state() -> rules.TourneyHand
+        Loads the hand into the rules engine's state object
+    set_state(state: rules.TourneyHand) -> None
+        Stores the rules engine's state object; does not commit
     play_card(session: sqlalchemy.orm.Session, index: int) -> bool
         Present a card to be evaluated against other players' cards
     tiebreaker() -> int
@@ -1513,6 +2410,29 @@ class TourneyPlayer(Player):
         """
 
         return loads(self.hand)
+
+    def get_state(self) -> rules.TourneyHand:
+        """Loads the hand into the rules engine's state object
+
+        ### Returns
+        rules.TourneyHand
+            Cards, played cards and points of the player
+        """
+
+        hand = loads(self.hand)
+        return rules.TourneyHand([card[0] for card in hand], [card[1] for card in hand], self.played, self.points)
+
+    def set_state(self, state: rules.TourneyHand) -> None:
+        """Stores the rules engine's state object; does not commit
+
+        ### Parameters
+        state: rules.TourneyHand
+            Cards, played cards and points of the player
+        """
+
+        self.hand = dumps([[card, used] for card, used in zip(state.cards, state.used)])
+        self.played = state.played
+        self.points = state.points
     
     def play_card(self, session: Session, index: int) -> bool:
         """Present a card to be evaluated against other players' cards
@@ -1541,6 +2461,7 @@ class TourneyPlayer(Player):
             return False
         
         self.played = index
+        record(session, self.game_id, EventKind.PLAY, self.user_id, index = index)
 
         session.commit()
         return True
@@ -1553,11 +2474,7 @@ class TourneyPlayer(Player):
             First card that is unplayed
         """
 
-        for card in loads(self.hand):
-            if not card[1]:
-                return card[0]
-        
-        return 0
+        return rules.tiebreaker(self.get_state())
 
 class Tourney(Game):
     """Represents a game of Tourney. Inherits most attributes of Game.
@@ -1594,8 +2511,8 @@ class Tourney(Game):
     player_class = TourneyPlayer
     """Player subclass that corresponds to this Game subclass"""
 
-    max_players: int = 6
-    """Max amount of players the game of this type can handle"""
+    max_players: int = config["tourney"]["max_players"]
+    """Max amount of players the game of this type can handle; past 6, cards are dealt from multiple decks"""
 
     turn: Mapped[int] = mapped_column(default = 1)
     """The current turn of the round"""
@@ -1608,18 +2525,24 @@ class Tourney(Game):
             Database session scope
         """
 
-        draw = sample(range(52), len(self.players) * (len(self.players) + 2))
+        # Each card is distinct even when decks are shuffled together, as the deck is part of its index
+        cards = len(self.players) * (len(self.players) + 2)
+        draw = self.shuffle_cards(session, list(range(rules.decks_needed(cards) * rules.DECK_SIZE)))[:cards]
 
+        hands = []
         player: TourneyPlayer
         for player in self.players:
             player.played = -1
             player.points = 0
             # Cards added to hand equal to number of players plus 2
-            player.hand = dumps([[card, False] for card in draw[:-(len(self.players) + 3):-1]])
+            hands.append([player.user_id, draw[:-(len(self.players) + 3):-1]])
+            player.hand = dumps([[card, False] for card in hands[-1][1]])
             del draw[-(len(self.players) + 2):]
+        record(session, self.id, EventKind.DEAL, hands = hands)
 
         # Reset turn counter
         self.turn = 1
+        self.start_turn_timer(session)
 
         session.commit()
 
@@ -1654,37 +2577,23 @@ class Tourney(Game):
             At least one player has not played a card
         """
 
-        # Load played cards, set played flag to True for each card, and reset played for next turn
-        played = []
-        player: TourneyPlayer
-        for player in self.players:
-            if player.played == -1:
-                session.rollback()
-                raise InvalidArgumentError
-            hand = loads(player.hand)
-            card = hand[player.played][0]
-            played.append(card)
-            hand[player.played] = [card, True]
-            player.hand = dumps(hand)
-            player.played = -1
-
-        # Evaluate card values in terms of value before suit
-        played = [((card % 13) * 4) + (card // 13) for card in played]
-
-        # Compare cards
-        max = -1
-        winner = 0
-        for i in range(len(played)):
-            if played[i] > max:
-                winner = i
-                max = played[i]
+        # Compare played cards, award point, set played flag to True for each card, and reset played for next turn
+        hands = [player.get_state() for player in self.players]
+        try:
+            winner = rules.tourney_match(hands)
+        except ValueError:
+            session.rollback()
+            raise InvalidArgumentError
 
-        # Award point
+        player: TourneyPlayer
+        for player, hand in zip(self.players, hands):
+            player.set_state(hand)
         winner: TourneyPlayer = self.players[winner]
-        winner.points += 1
+        record(session, self.id, EventKind.MATCH, winner = winner.user_id)
 
         # Advance turn counter
         self.turn += 1
+        self.start_turn_timer(session)
 
         session.commit()
         return winner
@@ -1701,30 +2610,344 @@ class Tourney(Game):
             All players that tied for winner in ascending order by tiebreaker
         """
 
-        # Evaluate winners, or ties
-        # First get top points
-        max = 0
-        player: TourneyPlayer
-        for player in self.players:
-            if player.points > max:
-                max = player.points
-        # Then get all winners
-        winners: list[TourneyPlayer] = []
-        for player in self.players:
-            if player.points == max:
-                winners.append(player)
+        # Evaluate winners, or ties; ties broken by looking at final card, as all players should have 1 card unplayed at end of round
+        winners: list[TourneyPlayer] = [self.players[i] for i in rules.tourney_winners([player.get_state() for player in self.players])]
 
-        # Break ties by looking at final card; all players should have 1 card unplayed at end of round
-        winners.sort(reverse = True, key = lambda player: ((player.tiebreaker() % 13) * 4) + (player.tiebreaker() // 13))
-
-        # Reward winner; in general scenario, 1 player wins minimum 2 pts, so bet multiplied by pts - 1
-        reward = self.get_bet()
-        reward = [chip * (max - 1) for chip in reward]
-        # Clamp reward
-        clamp(reward, self.bet_cap)
-        winners[0].pay_chips(session, reward)
+        # Reward winner, clamped
+        reward = rules.tourney_reward(self.get_bet(), winners[0].points, self.bet_cap)
+        winners[0].add_chips(session, reward)
+        self.tally_round(session, winners[0], reward)
+        record(session, self.id, EventKind.ROUND_END, winners = [player.user_id for player in winners], bet = ChipVector.ZERO)
 
         # General end round logic
         super().end_round(session)
 
         return winners
+
+
+class GameEvent(SQLBase):
+    """A single entry of the append-only log of a game; see modules.base.events
+
+    Not tied to the game row, so the log survives the game being ended.
+
+    ### Attributes
+    [PRIMARY] id: int
+        Order in which events happened, across every game
+    game_id: int
+        ID of the game, i.e. its channel; channels can have several games in a row, each starting with a CREATE event
+    time: int
+        Unix time in milliseconds of the event
+    kind: int
+        events.EventKind of the event
+    user_id: int | None
+        ID of the user the event concerns, if any
+    data: str
+        Jsonified details of the event; empty if none
+    """
+
+    __tablename__ = "game_event"
+
+    id: Mapped[int] = mapped_column(primary_key = True)
+    """Order in which events happened, across every game"""
+
+    game_id: Mapped[int] = mapped_column(index = True)
+    """ID of the game, i.e. its channel"""
+
+    time: Mapped[int]
+    """Unix time in milliseconds of the event"""
+
+    kind: Mapped[int]
+    """events.EventKind of the event"""
+
+    user_id: Mapped[int | None]
+    """ID of the user the event concerns, if any"""
+
+    data: Mapped[str] = mapped_column(default = "")
+    """Jsonified details of the event; empty if none"""
+
+
+class GameHistory(SQLBase):
+    """Summary of a finished game, kept after the game itself is deleted; see PlayerHistory for its players
+
+    Opened once the first player leaves the game in progress, and closed when the game ends.
+
+    ### Attributes
+    [PRIMARY] id: int
+        Order in which games were archived
+    game_id: int
+        ID of the game, i.e. its channel; channels can have several games in a row
+    type: str
+        The type of game
+    stake: int
+        0 - low stakes, 1 - normal stakes, 2 - high stakes
+    ended: int | None
+        Unix time the game ended at; None while it is still running
+    [BACKREF] players: list[PlayerHistory]
+        Final standings of every player of the game
+
+    ### Methods
+    [CLASS] for_game(session: sqlalchemy.orm.Session, game: Game) -> GameHistory
+        Return the open history of a game, opening it if needed
+    """
+
+    __tablename__ = "game_history"
+
+    id: Mapped[int] = mapped_column(primary_key = True)
+    """Order in which games were archived"""
+
+    game_id: Mapped[int] = mapped_column(index = True)
+    """ID of the game, i.e. its channel"""
+
+    type: Mapped[str]
+    """The type of game"""
+
+    stake: Mapped[int]
+    """0 - low stakes, 1 - normal stakes, 2 - high stakes"""
+
+    ended: Mapped[int | None] = mapped_column(index = True, default = None)
+    """Unix time the game ended at; None while it is still running"""
+
+    players: Mapped[list["PlayerHistory"]] = relationship(back_populates = "history")
+    """Final standings of every player of the game"""
+
+    @classmethod
+    def for_game(cls, session: Session, game: Game) -> "GameHistory":
+        """Return the open history of a game, opening it if needed
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        game: Game
+            The running game
+
+        ### Returns
+        GameHistory
+            The history of the game, not ended yet
+        """
+
+        history = session.scalars(select(cls).where(cls.game_id == game.id, cls.ended.is_(None))).first()
+        if history is None:
+            history = cls(game_id = game.id, type = game.type, stake = game.stake)
+            session.add(history)
+
+        return history
+
+
+class PlayerHistory(SQLBase):
+    """Final standing of a player in a finished game
+
+    ### Attributes
+    [PRIMARY] id: int
+        Order in which players were archived
+    [FOREIGN] history_id: int
+        ID of the GameHistory of the player's game
+    [BACKREF] history: GameHistory
+        Direct reference to corresponding GameHistory
+    user_id: int
+        User ID of the player
+    time: int
+        Unix time the player left the game, or the game ended at
+    name: str
+        Name the player went by
+    place: int | None
+        1 for the winner, 2 for the last to concede, and so on; None if the game ended without placing the player
+    chips: ChipVector
+        Chips of each type the player was left with
+    used: ChipVector
+        Chips of each type the player used over the game
+    tfs: str
+        Jsonified array of TFs planned on the player; each entry is desc, cost, type, done
+    """
+
+    __tablename__ = "player_history"
+    __table_args__ = (
+        Index("ix_player_history_user_time", "user_id", "time"),
+        )
+
+    id: Mapped[int] = mapped_column(primary_key = True)
+    """Order in which players were archived"""
+
+    history_id: Mapped[int] = mapped_column(ForeignKey("game_history.id"), index = True)
+    """ID of the GameHistory of the player's game"""
+
+    history: Mapped[GameHistory] = relationship(back_populates = "players")
+    """Direct reference to corresponding GameHistory"""
+
+    user_id: Mapped[int]
+    """User ID of the player"""
+
+    time: Mapped[int]
+    """Unix time the player left the game, or the game ended at"""
+
+    name: Mapped[str]
+    """Name the player went by"""
+
+    place: Mapped[int | None]
+    """1 for the winner, 2 for the last to concede, and so on; None if the game ended without placing the player"""
+
+    chips: Mapped[ChipVector] = mapped_column(ChipColumn)
+    """Chips of each type the player was left with"""
+
+    used: Mapped[ChipVector] = mapped_column(ChipColumn)
+    """Chips of each type the player used over the game"""
+
+    tfs: Mapped[str]
+    """Jsonified array of TFs planned on the player; each entry is desc, cost, type, done"""
+
+
+ALL_TIME = "all"
+"""Period of statistics that are never reset"""
+
+def stat_periods() -> tuple[str, str]:
+    """Periods that rounds ending now count towards; the current month in UTC, e.g. "2024-05", and ALL_TIME"""
+
+    return (strftime("%Y-%m", gmtime()), ALL_TIME)
+
+
+class RoundStats:
+    """Columns and upkeep shared by UserStats and AccountStats; not a table itself
+
+    Statistics are kept per period, see stat_periods(), and only ever added to as rounds end,
+    so a leaderboard is a walk down the (period, wins) index instead of an aggregate over every round.
+
+    ### Attributes
+    [PRIMARY] period: str
+        Month the statistics cover, e.g. "2024-05", or ALL_TIME
+    rounds: int
+        Rounds played to the end
+    wins: int
+        Rounds won
+    won: ChipVector
+        Chips of each type won
+    lost: ChipVector
+        Chips of each type bet in rounds lost
+    blackjacks: int
+        Blackjack rounds won with a natural blackjack
+    charlies: int
+        Blackjack rounds won with a five card charlie
+    [CLASS] key: str
+        Name of the attribute that, with period, identifies the statistics
+
+    ### Methods
+    [CLASS] rows(session: sqlalchemy.orm.Session, keys: set) -> dict
+        Return the statistics of the current periods for some keys, adding any missing
+    add_round(won: bool, chips: ChipVector, win_con: int = 0) -> None
+        Count a round that was played to the end
+    """
+
+    period: Mapped[str] = mapped_column(primary_key = True)
+    """Month the statistics cover, e.g. "2024-05", or ALL_TIME"""
+
+    rounds: Mapped[int] = mapped_column(default = 0)
+    """Rounds played to the end"""
+
+    wins: Mapped[int] = mapped_column(default = 0)
+    """Rounds won"""
+
+    won: Mapped[ChipVector] = mapped_column(ChipColumn, default = ChipVector.ZERO)
+    """Chips of each type won"""
+
+    lost: Mapped[ChipVector] = mapped_column(ChipColumn, default = ChipVector.ZERO)
+    """Chips of each type bet in rounds lost"""
+
+    blackjacks: Mapped[int] = mapped_column(default = 0)
+    """Blackjack rounds won with a natural blackjack"""
+
+    charlies: Mapped[int] = mapped_column(default = 0)
+    """Blackjack rounds won with a five card charlie"""
+
+    key: str
+    """Name of the attribute that, with period, identifies the statistics"""
+
+    @classmethod
+    def rows(cls, session: Session, keys: set) -> dict:
+        """Return the statistics of the current periods for some keys, adding any missing; does not commit
+
+        ### Parameters
+        session: sqlalchemy.orm.Session
+            Database session scope
+        keys: set
+            Values of the key attribute to get statistics for
+
+        ### Returns
+        dict
+            Statistics by period and key
+        """
+
+        periods = stat_periods()
+        column = getattr(cls, cls.key)
+        rows = {
+            (stats.period, getattr(stats, cls.key)): stats
+            for stats in session.scalars(select(cls).where(cls.period.in_(periods), column.in_(keys)))
+        }
+
+        for period in periods:
+            for key in keys:
+                if (period, key) not in rows:
+                    stats = cls(period = period, rounds = 0, wins = 0, won = ChipVector.ZERO, lost = ChipVector.ZERO,
+                        blackjacks = 0, charlies = 0, **{cls.key: key})
+                    session.add(stats)
+                    rows[period, key] = stats
+
+        return rows
+
+    def add_round(self, won: bool, chips: ChipVector, win_con: int = 0) -> None:
+        """Count a round that was played to the end
+
+        ### Parameters
+        won: bool
+            Whether the round was won
+        chips: ChipVector
+            Chips won, or the bet lost
+        win_con: int = 0
+            Win condition of a won round; 0 = norm, 1 = blackjack, 2 = five card charlie
+        """
+
+        self.rounds += 1
+        if won:
+            self.wins += 1
+            self.won += chips
+            self.blackjacks += win_con == 1
+            self.charlies += win_con == 2
+        else:
+            self.lost += chips
+
+
+class UserStats(RoundStats, SQLBase):
+    """Statistics of a Discord user over every game they played in a period; see RoundStats
+
+    ### Attributes
+    [PRIMARY] user_id: int
+        User ID of the player
+    """
+
+    __tablename__ = "user_stats"
+    __table_args__ = (
+        Index("ix_user_stats_period_wins", "period", "wins"),
+        )
+
+    user_id: Mapped[int] = mapped_column(primary_key = True)
+    """User ID of the player"""
+
+    key = "user_id"
+
+
+class AccountStats(RoundStats, SQLBase):
+    """Statistics of a character over every game played under the name of their chip account in a period; see RoundStats
+
+    Kept by account ID, so names differing only in case share their statistics, which follow the account when renamed.
+
+    ### Attributes
+    [PRIMARY, FOREIGN] account_id: int
+        ID of the ChipAccount of the character
+    """
+
+    __tablename__ = "account_stats"
+    __table_args__ = (
+        Index("ix_account_stats_period_wins", "period", "wins"),
+        )
+
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id"), primary_key = True)
+    """ID of the ChipAccount of the character"""
+
+    key = "account_id"
@@ -0,0 +1,117 @@
+"""Append-only log of everything that happens in a game, kept after the game itself is deleted
+
+Events are buffered on the session as they are recorded, and written in a single batched insert when it commits,
+so logging doesn't add a write per change. See modules.base.replay for rebuilding a game's state from its events.
+Every event also counts as activity of its game, which keeps game.last_active current for modules.base.sweeper.
+"""
+
+print("Loading module 'events'...")
+
+from enum import IntEnum
+from json import dumps
+from time import time
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from .bot import SQLBase
+
+class EventKind(IntEnum):
+    """Type of a game event; stored as its int value, so only ever append to this"""
+
+    CREATE = 0
+    """Game created; stake, type, seed"""
+    JOIN = 1
+    """Player joined; name"""
+    LEAVE = 2
+    """Player left or was removed; bet_turn after leaving"""
+    RENAME = 3
+    """Player renamed; name"""
+    END = 4
+    """Game ended and deleted"""
+    STAKE = 5
+    """Stake changed; stake"""
+    BET_TURN = 6
+    """Bet turn moved; turn"""
+    BET = 7
+    """Player set their bet; bet"""
+    ROUND_BET = 8
+    """Bet of the round set, starting it; bet"""
+    ROUND_END = 9
+    """Round ended; winners, and bet afterwards, which is nonzero only if tied"""
+    SET_CHIPS = 10
+    """Player's chips set directly; chips"""
+    SET_USED = 11
+    """Player's used chips set directly; chips"""
+    PAY = 12
+    """Chips given to a player; chips"""
+    USE = 13
+    """Chips taken from a player; chips, and whether they count as used"""
+    CONVERT = 14
+    """Player converted chips; consumed, produced"""
+    SHUFFLE = 15
+    """Cards shuffled; rng counter and amount of cards, or the cards themselves if the game is secure"""
+    DRAW = 16
+    """Cards drawn off the deck; cards"""
+    DEAL = 17
+    """Hands dealt at the start of a round; hands, as pairs of user ID and cards"""
+    HIT = 18
+    """Card added to a Blackjack hand; card"""
+    STAND = 19
+    """Blackjack hand stood"""
+    PLAY = 20
+    """Tourney card presented; index"""
+    MATCH = 21
+    """Tourney cards compared; winner"""
+    ADMIN = 22
+    """Admin command run in the game's channel; command, options. Its changes follow as their own events"""
+    ROLL = 23
+    """Dice rolled at a Misc table; rng counter, amount and sides, and the dice themselves if the game is secure"""
+
+BUFFER_KEY = "game_events"
+"""Key of the pending events in Session.info"""
+
+def record(session: Session, game_id: int, kind: EventKind, user_id: int | None = None, **data) -> None:
+    """Add an event to the session's buffer; it is written with the session's next commit, or dropped on rollback
+
+    ### Parameters
+    session: sqlalchemy.orm.Session
+        Database session scope
+    game_id: int
+        ID of the game, i.e. its channel
+    kind: EventKind
+        Type of the event
+    user_id: int | None = None
+        ID of the user the event concerns, if any
+    **data
+        Details of the event; must be serializable to JSON
+    """
+
+    session.info.setdefault(BUFFER_KEY, []).append({
+        "game_id": game_id,
+        "time": int(time() * 1000),
+        "kind": kind,
+        "user_id": user_id,
+        "data": dumps(data, separators = (",", ":")) if data else "",
+    })
+
+@event.listens_for(Session, "before_commit")
+def write_events(session: Session) -> None:
+    """Write every buffered event in one executemany insert, and mark their games active,
+    as part of the transaction being committed"""
+
+    if rows := session.info.pop(BUFFER_KEY, None):
+        session.execute(insert(SQLBase.metadata.tables["game_event"]), rows)
+
+        games = SQLBase.metadata.tables["game"]
+        session.execute(
+            update(games)
+            .where(games.c.id.in_({row["game_id"] for row in rows}))
+            .values(last_active = rows[-1]["time"] // 1000)
+        )
+
+@event.listens_for(Session, "after_rollback")
+def drop_events(session: Session) -> None:
+    """Events of rolled back changes never happened"""
+
+    session.info.pop(BUFFER_KEY, None)
@@ -0,0 +1,91 @@
+"""Periodically compacts chip account ledgers, so that reading a balance stays quick however long a ledger grows
+
+A balance is the account's latest BalanceSnapshot plus the ledger entries after it (see modules.base.dbmodels).
+Every ledger.interval seconds (settings/config.json), accounts with ledger.snapshot_after or more entries
+since their latest snapshot get a new one. Entries are never changed or deleted, so the ledger remains a full history.
+"""
+
+print("Loading module 'ledger'...")
+
+from asyncio import Task, get_running_loop, sleep
+from traceback import format_exception
+
+from sqlalchemy import func, select
+
+from .bot import bot_client, database_connector
+from .auxiliary import log, get_time, loc, config
+from .dbmodels import ChipAccount, LedgerEntry, BalanceSnapshot
+from . import shutdown
+
+compactor_task: Task | None = None
+"""Reference to the compaction task, so that it doesn't get garbage collected"""
+
+checked_up_to = 0
+"""ID of the last ledger entry seen by a compaction; only accounts with entries after it can need a snapshot"""
+
+def compact(snapshot_after: int) -> int:
+    """Snapshot every account with a long enough ledger since its latest snapshot
+
+    ### Parameters
+    snapshot_after: int
+        Amount of entries since the latest snapshot that calls for a new one
+
+    ### Returns
+    int
+        Amount of snapshots taken
+    """
+
+    global checked_up_to
+
+    session = database_connector()
+    last = session.scalar(select(func.max(LedgerEntry.id))) or 0
+
+    # Only accounts changed since the last compaction, found through the primary key
+    changed = select(LedgerEntry.account_id).where(LedgerEntry.id > checked_up_to).distinct().subquery()
+    latest = (
+        select(func.max(BalanceSnapshot.ledger_id))
+        .where(BalanceSnapshot.account_id == LedgerEntry.account_id)
+        .scalar_subquery()
+    )
+    due = session.scalars(
+        select(LedgerEntry.account_id)
+        .where(LedgerEntry.account_id.in_(select(changed.c.account_id)), LedgerEntry.id > latest)
+        .group_by(LedgerEntry.account_id)
+        .having(func.count() >= snapshot_after)
+    ).all()
+
+    for account_id in due:
+        session.get(ChipAccount, account_id).snapshot(session)
+    session.commit()
+    session.close()
+
+    # Accounts not due yet are checked again once they change
+    checked_up_to = last
+    return len(due)
+
+async def run_compactor() -> None:
+    """Compact ledgers every interval; runs for as long as the bot does"""
+
+    while not shutdown.shutting_down:
+        settings = config["ledger"]
+        try:
+            if (taken := compact(settings["snapshot_after"])) > 0:
+                log(loc("ledger.log", get_time(), taken))
+        except Exception as err:
+            log(loc("ledger.error.log", get_time(), "".join(format_exception(err))))
+
+        await sleep(settings["interval"])
+
+@bot_client.listen()
+async def on_ready():
+    # on_ready fires again after reconnecting; only one compactor may run
+    global compactor_task
+    if compactor_task is None:
+        compactor_task = get_running_loop().create_task(run_compactor())
+
+@shutdown.on_shutdown
+def stop_compactor() -> None:
+    """Stop compacting once commands have drained"""
+
+    if compactor_task is not None:
+        compactor_task.cancel()
@@ -0,0 +1,134 @@
+"""In-memory prefix index of chip account names, partitioned by owner, for autocompleting them
+
+Each owner has their own trie over the case-folded names of their accounts, so a suggestion only walks
+the prefix typed and the names under it, and never queries the database.
+The index is filled from the database once the bot is ready, and kept up to date by ChipAccount
+as accounts are opened and renamed.
+"""
+
+print("Loading module 'nameindex'...")
+
+from sqlalchemy import select
+
+from .bot import SQLBase, bot_client, database_connector
+
+SUGGESTIONS = 25
+"""Most suggestions Discord shows for an option"""
+
+class TrieNode:
+    """A node of a name trie; names ending here are kept by their case-folded form"""
+
+    __slots__ = ("children", "names")
+
+    def __init__(self):
+        self.children: dict[str, TrieNode] = {}
+        """Next node by the next character of the folded name"""
+
+        self.names: dict[str, str] = {}
+        """Names ending at this node, by folded name; only ever one, unless names fold alike"""
+
+tries: dict[int, TrieNode] = {}
+"""Root of each owner's trie, by owner ID"""
+
+loaded = False
+"""Whether the index has been filled from the database yet"""
+
+def add(owner_id: int, name: str) -> None:
+    """Index a name under its owner
+
+    ### Parameters
+    owner_id: int
+        ID of the Discord user who owns the account
+    name: str
+        Name of the account
+    """
+
+    key = name.casefold()
+    node = tries.setdefault(owner_id, TrieNode())
+    for char in key:
+        node = node.children.setdefault(char, TrieNode())
+    node.names[key] = name
+
+def remove(owner_id: int, name: str) -> None:
+    """Drop a name from the index, pruning the branch it leaves empty; does nothing if it isn't indexed
+
+    ### Parameters
+    owner_id: int
+        ID of the Discord user who owns the account
+    name: str
+        Name of the account
+    """
+
+    key = name.casefold()
+    if (node := tries.get(owner_id)) is None:
+        return
+
+    path = [node]
+    for char in key:
+        if (node := node.children.get(char)) is None:
+            return
+        path.append(node)
+    node.names.pop(key, None)
+
+    # Prune from the leaf up, as long as nodes hold nothing
+    for depth in range(len(key), 0, -1):
+        if path[depth].names or path[depth].children:
+            break
+        del path[depth - 1].children[key[depth - 1]]
+    if not path[0].children and not path[0].names:
+        del tries[owner_id]
+
+def complete(owner_id: int, prefix: str, limit: int = SUGGESTIONS) -> list[str]:
+    """Names of an owner's accounts that start with a prefix, in any case
+
+    ### Parameters
+    owner_id: int
+        ID of the Discord user who owns the accounts
+    prefix: str
+        What has been typed so far
+    limit: int = SUGGESTIONS
+        Most names to return
+
+    ### Returns
+    list[str]
+        Matching names, shortest first, then alphabetically
+    """
+
+    if (node := tries.get(owner_id)) is None:
+        return []
+    for char in prefix.casefold():
+        if (node := node.children.get(char)) is None:
+            return []
+
+    # Breadth first, so that the closest matches come first and the walk stops early
+    found: list[str] = []
+    level = [node]
+    while level and len(found) < limit:
+        following: list[TrieNode] = []
+        for node in level:
+            found.extend(node.names[key] for key in sorted(node.names))
+            following.extend(node.children[char] for char in sorted(node.children))
+        level = following
+
+    return found[:limit]
+
+def load() -> None:
+    """Fill the index with every account in the database"""
+
+    global loaded
+
+    accounts = SQLBase.metadata.tables["account"]
+    session = database_connector()
+    rows = session.execute(select(accounts.c.owner_id, accounts.c.name)).all()
+    session.close()
+
+    tries.clear()
+    for owner_id, name in rows:
+        add(owner_id, name)
+    loaded = True
+
+@bot_client.listen()
+async def on_ready():
+    # on_ready fires again after reconnecting; the index is kept up to date since the first
+    if not loaded:
+        load()
@@ -0,0 +1,76 @@
+"""Optionally records every application command interaction to a file, for replaying offline with benchmarks.interactions
+
+Each interaction is one line of compact JSON, written once the command has finished:
+t (unix time received), cmd (full command name), opt (options given), user, ch (channel), guild, ms (time handled), ok (whether it completed).
+
+Only imported when recorder.enabled is set in settings/config.json.
+"""
+
+print("Loading module 'recorder'...")
+
+from json import dumps
+from time import time, perf_counter
+
+from discord import ApplicationContext
+
+from .bot import bot_client
+from .auxiliary import command_path, config
+from .shutdown import on_shutdown
+
+record_file = open(config["recorder"]["path"], "a", encoding = "utf-8", buffering = 1)
+"""File interactions are appended to; kept open, and flushed after every line so a crash loses nothing"""
+
+pending: dict[int, dict] = {}
+"""Interactions still being handled, by interaction ID"""
+
+async def start_record(context: ApplicationContext) -> bool:
+    """Global check that notes down an interaction as it arrives; always passes
+
+    Runs as a check, since command groups replace the interaction's data with their subcommand's once invoked.
+    """
+
+    name, options = command_path(context.interaction.data)
+    pending[context.interaction.id] = {
+        "t": round(time(), 3),
+        "cmd": name,
+        "opt": options,
+        "user": context.author.id,
+        "ch": context.channel_id,
+        "guild": context.guild_id,
+        "start": perf_counter(),
+    }
+
+    return True
+
+bot_client.add_check(start_record, call_once = True)
+
+def finish_record(context: ApplicationContext, ok: bool) -> None:
+    """Write out an interaction that has finished being handled
+
+    ### Parameters
+    context: discord.ApplicationContext
+        Application command context
+    ok: bool
+        Whether the command completed, or failed a check or raised
+    """
+
+    if (entry := pending.pop(context.interaction.id, None)) is None:
+        return
+
+    entry["ms"] = round((perf_counter() - entry.pop("start")) * 1000, 2)
+    entry["ok"] = ok
+    record_file.write(dumps(entry, separators = (",", ":")) + "\n")
+
+@bot_client.listen("on_application_command_completion")
+async def record_completion(context: ApplicationContext):
+    finish_record(context, True)
+
+@bot_client.listen("on_application_command_error")
+async def record_error(context: ApplicationContext, exception: Exception):
+    finish_record(context, False)
+
+@on_shutdown
+def close_record() -> None:
+    """Close the record file once commands have drained"""
+
+    record_file.close()
@@ -0,0 +1,273 @@
+"""Rebuilds the state of a game at any point from its event log; see modules.base.events
+
+Hands are rebuilt through the rules engine, and seeded shuffles are redone from the game's seed,
+so a replayed game matches what the players saw even after the game has been ended.
+
+Can be run from the repository root with: python -m modules.base.replay <channel ID> [event ID]
+"""
+
+print("Loading module 'replay'...")
+
+from json import loads
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import rules
+from .chipvector import ChipVector
+from .dbmodels import GameEvent
+from .events import EventKind
+from .rng import game_rng, shuffled
+
+class ReplayPlayer:
+    """State of a player, as rebuilt from events
+
+    ### Attributes
+    name: str
+        What name the player is referred to as
+    chips: ChipVector
+        Chips of each type the player holds
+    used: ChipVector
+        Chips of each type the player has used this game
+    bet: ChipVector
+        How many chips the player is currently willing to bet
+    hand: rules.BlackjackHand | rules.TourneyHand | None
+        Hand of the player this round, for Blackjack and Tourney
+    """
+
+    __slots__ = ("name", "chips", "used", "bet", "hand")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.chips = ChipVector.ZERO
+        self.used = ChipVector.ZERO
+        self.bet = ChipVector.ZERO
+        self.hand = None
+
+class ReplayGame:
+    """State of a game, as rebuilt from events
+
+    ### Attributes
+    type: str
+        The type of game; "misc", "blackjack" or "tourney"
+    stake: int
+        0 - low stakes, 1 - normal stakes, 2 - high stakes
+    seed: int
+        Seed of the game's random stream
+    bet_turn: int
+        Player index whose turn it is to bet
+    current_bet: ChipVector
+        The current bet for the round; all zeroes between rounds
+    deck: list[int]
+        Cards left in the deck, in the same order as get_deck() of the game; empty for Tourney
+    players: dict[int, ReplayPlayer]
+        Players by user ID, in turn order
+    rolls: list[tuple[int, list[int]]]
+        User ID and dice of every roll at a Misc table, in order
+    ended: bool
+        Whether the game has been ended
+    last_event: int
+        ID of the last event applied
+    """
+
+    __slots__ = ("type", "stake", "seed", "bet_turn", "current_bet", "deck", "players", "rolls", "ended", "last_event")
+
+    def __init__(self, type: str, stake: int, seed: int):
+        self.type = type
+        self.stake = stake
+        self.seed = seed
+        self.bet_turn = 0
+        self.current_bet = ChipVector.ZERO
+        self.deck: list[int] = []
+        self.players: dict[int, ReplayPlayer] = {}
+        self.rolls: list[tuple[int, list[int]]] = []
+        self.ended = False
+        self.last_event = -1
+
+    def apply(self, kind: EventKind, user_id: int | None, data: dict) -> None:
+        """Apply a single event to the state
+
+        ### Parameters
+        kind: EventKind
+            Type of the event
+        user_id: int | None
+            ID of the user the event concerns, if any
+        data: dict
+            Details of the event
+        """
+
+        player = self.players.get(user_id)
+
+        match kind:
+            case EventKind.JOIN:
+                self.players[user_id] = ReplayPlayer(data["name"])
+            case EventKind.LEAVE:
+                del self.players[user_id]
+                self.bet_turn = data["bet_turn"]
+            case EventKind.RENAME:
+                player.name = data["name"]
+            case EventKind.END:
+                self.ended = True
+            case EventKind.STAKE:
+                self.stake = data["stake"]
+            case EventKind.BET_TURN:
+                self.bet_turn = data["turn"]
+            case EventKind.BET:
+                player.bet = ChipVector(data["bet"])
+            case EventKind.ROUND_BET:
+                self.current_bet = ChipVector(data["bet"])
+            case EventKind.ROUND_END:
+                self.current_bet = ChipVector(data["bet"])
+                if self.current_bet.is_zero():
+                    for each in self.players.values():
+                        each.bet = ChipVector.ZERO
+            case EventKind.SET_CHIPS:
+                player.chips = ChipVector(data["chips"])
+            case EventKind.SET_USED:
+                player.used = ChipVector(data["chips"])
+            case EventKind.PAY:
+                player.chips += ChipVector(data["chips"])
+            case EventKind.USE:
+                player.chips -= ChipVector(data["chips"])
+                if data["track"]:
+                    player.used += ChipVector(data["chips"])
+            case EventKind.CONVERT:
+                player.chips = player.chips - ChipVector(data["consumed"]) + ChipVector(data["produced"])
+            case EventKind.SHUFFLE:
+                self.shuffle(data)
+            case EventKind.DRAW:
+                # Misc draws off the end of its deck, Blackjack off the front of its shoe
+                if self.type == "misc":
+                    del self.deck[len(self.deck) - len(data["cards"]):]
+                else:
+                    del self.deck[:len(data["cards"])]
+            case EventKind.DEAL:
+                self.deal(data["hands"])
+            case EventKind.HIT:
+                rules.hit(player.hand, data["card"])
+            case EventKind.STAND:
+                player.hand.state = rules.HandState.STAND
+            case EventKind.PLAY:
+                player.hand.played = data["index"]
+            case EventKind.MATCH:
+                rules.tourney_match([each.hand for each in self.players.values()])
+            case EventKind.ROLL:
+                self.roll(user_id, data)
+
+    def shuffle(self, data: dict) -> None:
+        """Redo a shuffle from the game's seed, unless its result was logged
+
+        ### Parameters
+        data: dict
+            Details of the SHUFFLE event
+        """
+
+        if self.type == "tourney":
+            # Every dealt card is logged, and the rest of a Tourney shoe is never used
+            return
+
+        if "cards" in data:
+            cards = data["cards"]
+        else:
+            cards = shuffled(game_rng(self.seed, data["counter"]), list(range(rules.DECK_SIZE)) * (data["size"] // rules.DECK_SIZE))
+
+        self.deck = cards
+
+    def roll(self, user_id: int, data: dict) -> None:
+        """Redo a roll of dice from the game's seed, unless its result was logged
+
+        ### Parameters
+        user_id: int
+            ID of the user who rolled
+        data: dict
+            Details of the ROLL event
+        """
+
+        if "dice" in data:
+            dice = data["dice"]
+        else:
+            rng = game_rng(self.seed, data["counter"])
+            dice = [rng.randint(1, data["sides"]) for i in range(data["amount"])]
+
+        self.rolls.append((user_id, dice))
+
+    def deal(self, hands: list[list]) -> None:
+        """Give every player their hand at the start of a round; Blackjack players not dealt in are busted
+
+        ### Parameters
+        hands: list[list]
+            Pairs of user ID and cards dealt
+        """
+
+        dealt = {user_id: cards for user_id, cards in hands}
+        for user_id, player in self.players.items():
+            if self.type == "tourney":
+                player.hand = rules.TourneyHand(dealt[user_id])
+            elif user_id in dealt:
+                player.hand = rules.BlackjackHand(dealt[user_id], rules.HandState.HIT)
+            else:
+                player.hand = rules.BlackjackHand([], rules.HandState.BUST)
+
+def replay(session: Session, channel_id: int, until: int | None = None) -> ReplayGame | None:
+    """Rebuild the state of the game in a channel from its events
+
+    A channel can host several games in a row; the one replayed is the last created by the given event.
+
+    ### Parameters
+    session: sqlalchemy.orm.Session
+        Database session scope
+    channel_id: int
+        ID of the channel the game is in
+    until: int | None = None
+        ID of the last event to apply; if omitted, the current state of the game is rebuilt
+
+    ### Returns
+    ReplayGame
+        State of the game right after the given event
+    None
+        No game had been created in the channel by then
+    """
+
+    query = select(GameEvent).where(GameEvent.game_id == channel_id)
+    if until is not None:
+        query = query.where(GameEvent.id <= until)
+
+    created = session.scalars(
+        query.where(GameEvent.kind == EventKind.CREATE).order_by(GameEvent.id.desc()).limit(1)
+    ).first()
+    if created is None:
+        return None
+
+    data = loads(created.data)
+    game = ReplayGame(data["type"], data["stake"], data["seed"])
+    game.last_event = created.id
+
+    for event in session.scalars(query.where(GameEvent.id > created.id).order_by(GameEvent.id)):
+        game.apply(EventKind(event.kind), event.user_id, loads(event.data) if event.data else {})
+        game.last_event = event.id
+
+    return game
+
+if __name__ == "__main__":
+    from sys import argv
+
+    from .bot import database_connector
+
+    session = database_connector()
+    game = replay(session, int(argv[1]), int(argv[2]) if len(argv) > 2 else None)
+    session.close()
+
+    if game is None:
+        print("No game was created in that channel")
+    else:
+        print(f"{game.type} game at stake {game.stake}, as of event {game.last_event}{' (ended)' if game.ended else ''}")
+        print(f"Bet {game.current_bet}, bet turn {game.bet_turn}, {len(game.deck)} cards in deck")
+        for user_id, player in game.players.items():
+            hand = ""
+            if isinstance(player.hand, rules.BlackjackHand):
+                hand = f", hand {player.hand.cards} ({rules.HandState(player.hand.state).name})"
+            elif isinstance(player.hand, rules.TourneyHand):
+                hand = f", hand {player.hand.cards}, {player.hand.points} points"
+            print(f"{user_id} {player.name}: chips {player.chips}, used {player.used}, bet {player.bet}{hand}")
+        for user_id, dice in game.rolls:
+            print(f"{user_id} rolled {dice}")
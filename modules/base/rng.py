@@ -0,0 +1,62 @@
+"""Random number generation for games; every game draws from its own seeded stream, or the OS entropy pool
+
+A seeded game's n-th shuffle is fully determined by its seed and n, so any outcome can be reproduced later.
+"""
+
+print("Loading module 'rng'...")
+
+from random import Random, SystemRandom
+from secrets import randbits
+
+unseeded = Random()
+"""Generator for anything outside of a game, e.g. flavor text; not reproducible"""
+
+def new_seed() -> int:
+    """Pick a fresh seed for a game; fits in a signed 64-bit database column"""
+
+    return randbits(63)
+
+def game_rng(seed: int, counter: int, secure: bool = False) -> Random:
+    """Get the generator for one use of a game's randomness
+
+    ### Parameters
+    seed: int
+        Seed of the game
+    counter: int
+        How many times the game has used its randomness before; each value gives an independent stream
+    secure: bool = False
+        Whether to draw from OS entropy instead; results then can't be reproduced
+
+    ### Returns
+    random.Random
+        Generator to use
+    """
+
+    if secure:
+        return SystemRandom()
+
+    return Random((seed << 64) | counter)
+
+def shuffled(rng: Random, cards: list[int]) -> list[int]:
+    """Shuffle cards using a single batch of random bits, instead of one call per card like random.shuffle()
+
+    Each card gets a random 64-bit key and the cards are sorted by key;
+    with SystemRandom this is a single read from the OS instead of one per card.
+
+    ### Parameters
+    rng: random.Random
+        Generator to draw the bits from
+    cards: list[int]
+        Cards to shuffle
+
+    ### Returns
+    list[int]
+        New list of the cards in shuffled order
+    """
+
+    if len(cards) < 2:
+        return list(cards)
+
+    keys = memoryview(rng.getrandbits(64 * len(cards)).to_bytes(8 * len(cards), "little")).cast("Q")
+    order = sorted(range(len(cards)), key = keys.__getitem__)
+    return [cards[i] for i in order]
@@ -0,0 +1,455 @@
+"""Contains the pure rules of Blackjack and Tourney, independent of Discord and the database
+
+Cards are ints in the same encoding as the standard deck; suit is card // 13 and face is card % 13 (0 = 2, 12 = Ace).
+Tourney deals from a shoe of several decks, where card // 52 is the deck and card % 52 the card within it.
+The ORM models in dbmodels persist the state objects here and call these functions for every rule decision,
+so the rules can also be run directly for simulations and benchmarks.
+"""
+
+print("Loading module 'rules'...")
+
+from enum import IntEnum
+
+from .chipvector import ChipVector
+
+DECK_SIZE = 52
+"""Cards in a single deck"""
+
+HIDDEN_CARD = 52
+"""Index of the face-down card in the standard deck; counts as worth 1"""
+
+BET_CAP = ChipVector((100, 20, 2, 20, 3, 25))
+"""The maximum amount of each chip type that can be bet in a game"""
+
+def stake_return(used: ChipVector, stake: int) -> ChipVector:
+    """Chips returned to the overall winner of a game; none at low stakes, half at normal stakes, all at high stakes
+
+    ### Parameters
+    used: ChipVector
+        Chips the winner has used on others
+    stake: int
+        Stake of the game; 0 - low, 1 - normal, 2 - high
+    """
+
+    return ChipVector(chips * stake // 2 for chips in used)
+
+
+# Blackjack
+
+class HandState(IntEnum):
+    """State of a Blackjack hand within a round; stored as its int value"""
+
+    HIT = 0
+    STAND = 1
+    BUST = 2
+
+def card_value(card: int) -> int:
+    """Blackjack value of a single card, with aces worth 11
+
+    ### Parameters
+    card: int
+        Index of the card in the standard deck
+    """
+
+    if card == HIDDEN_CARD:
+        return 1
+    face = card % 13 + 2
+    return 11 if face == 14 else min(face, 10)
+
+CARD_VALUES: tuple[int, ...] = tuple(card_value(card) for card in range(HIDDEN_CARD + 1))
+"""Blackjack value of every card in the standard deck, including the face-down card, by index"""
+
+def add_value(total: int, soft_aces: int, card: int) -> tuple[int, int]:
+    """Add a card to a running hand total, softening aces as soon as the hand would bust
+
+    Totals only ever grow, so softening early gives the same value as softening once all cards are in.
+
+    ### Parameters
+    total: int
+        Current value of the hand
+    soft_aces: int
+        Aces in the hand still counted as 11
+    card: int
+        Index of the card being added
+
+    ### Returns
+    A tuple:
+    Index 0
+        New value of the hand
+    Index 1
+        New amount of aces still counted as 11
+    """
+
+    value = CARD_VALUES[card]
+    total += value
+    if value == 11:
+        soft_aces += 1
+    while total > 21 and soft_aces > 0:
+        total -= 10
+        soft_aces -= 1
+
+    return (total, soft_aces)
+
+def value_class(total: int, size: int) -> int:
+    """Classify a hand for direct comparison from its value and amount of cards
+
+    ### Returns
+    Busted: 0
+    No Hand: 1
+    Normal: 2
+    Blackjack: 3
+    5-Card Charlie: 4
+    """
+
+    if size == 0:
+        return 1
+    elif size >= 5:
+        return 4
+    elif total > 21:
+        return 0
+    elif total == 21:
+        return 3
+    else:
+        return 2
+
+def hand_value(cards: list[int], raw: bool = False) -> int:
+    """Calculate the value of a list of cards for direct comparison
+
+    ### Parameters
+    cards: list[int]
+        Cards in the hand
+    raw: bool = False
+        Whether to give raw hand value without 5-card charlies or busting
+
+    ### Returns
+    If raw:
+        Total value of hand, aces applicable
+    If not raw:
+        See value_class()
+    """
+
+    total, soft_aces = 0, 0
+    for card in cards:
+        total, soft_aces = add_value(total, soft_aces, card)
+
+    return total if raw else value_class(total, len(cards))
+
+class BlackjackHand:
+    """State of a single Blackjack hand, with its value kept up to date as cards are added
+
+    ### Attributes
+    cards: list[int] | None
+        Cards in the hand, in the order they were dealt; None if restored from running totals only
+    state: HandState
+        Whether the hand is hitting, standing, or busted
+    total: int
+        Value of the hand, aces applicable
+    soft_aces: int
+        Aces in the hand still counted as 11
+    size: int
+        Amount of cards in the hand
+    """
+
+    __slots__ = ("cards", "state", "total", "soft_aces", "size")
+
+    def __init__(self, cards: list[int] | None = None, state: HandState = HandState.HIT):
+        self.cards = [] if cards is None else cards
+        self.state = state
+        self.total, self.soft_aces = 0, 0
+        for card in self.cards:
+            self.total, self.soft_aces = add_value(self.total, self.soft_aces, card)
+        self.size = len(self.cards)
+
+    @classmethod
+    def restore(cls, state: HandState, total: int, soft_aces: int, size: int, cards: list[int] | None = None) -> "BlackjackHand":
+        """Rebuild a hand from stored running totals without going through its cards
+
+        ### Parameters
+        state: HandState
+            Whether the hand is hitting, standing, or busted
+        total: int
+            Value of the hand, aces applicable
+        soft_aces: int
+            Aces in the hand still counted as 11
+        size: int
+            Amount of cards in the hand
+        cards: list[int] | None = None
+            Cards in the hand, only needed if more are to be added
+        """
+
+        hand = cls.__new__(cls)
+        hand.cards = cards
+        hand.state = state
+        hand.total = total
+        hand.soft_aces = soft_aces
+        hand.size = size
+        return hand
+
+    def value(self, raw: bool = False) -> int:
+        """Same as hand_value(), without going through the cards"""
+
+        return self.total if raw else value_class(self.total, self.size)
+
+def hit(hand: BlackjackHand, card: int) -> bool:
+    """Add a card to a hand, busting it if needed
+
+    ### Parameters
+    hand: BlackjackHand
+        Hand to add to (MODIFIED IN-PLACE)
+    card: int
+        Card to add
+
+    ### Returns
+    True
+        If hand has not busted from adding the card
+    False
+        If hand busted from adding the card
+    """
+
+    if hand.cards is not None:
+        hand.cards.append(card)
+    hand.total, hand.soft_aces = add_value(hand.total, hand.soft_aces, card)
+    hand.size += 1
+    if hand.value() == 0:
+        hand.state = HandState.BUST
+        return False
+
+    return True
+
+def round_over(hands: list[BlackjackHand]) -> bool:
+    """Test whether every hand has stood/busted
+
+    ### Returns
+    True
+        Every hand except one has busted, or every hand is standing/busted
+    False
+        At least one hand is still hitting
+    """
+
+    hitting = 0
+    busted = 0
+    for hand in hands:
+        if hand.state == HandState.HIT:
+            hitting += 1
+        elif hand.state == HandState.BUST:
+            busted += 1
+
+    return tally_over(hitting, busted, len(hands))
+
+def tally_over(hitting: int, busted: int, hands: int) -> bool:
+    """Same as round_over(), from counts of hands already kept
+
+    ### Parameters
+    hitting: int
+        Amount of hands still hitting
+    busted: int
+        Amount of hands busted, including those not dealt into the round
+    hands: int
+        Amount of hands at the table
+    """
+
+    # If all but one hand has busted, that hand auto wins; otherwise end play when none are hitting
+    return busted == hands - 1 or hitting == 0
+
+def blackjack_winners(hands: list[BlackjackHand]) -> tuple[int, list[int]]:
+    """Compare final hands
+
+    ### Returns
+    A tuple:
+    Index 0
+        Win condition; 0 = norm, 1 = blackjack, 2 = five card charlie
+    Index 1
+        Indices of winning hands; more than 1 means tie
+    """
+
+    end_vals = [hand.value() for hand in hands]
+    winner_val = max(end_vals)
+    win_con = winner_val - 2
+
+    # Test for the need for a normal value test, if no blackjack or 5-card
+    if winner_val == 2:
+        end_vals = [
+            hand.total
+                if hand.state != HandState.BUST
+                else 0
+            for hand in hands
+        ]
+        winner_val = max(end_vals)
+
+    return (win_con, [i for i, val in enumerate(end_vals) if val == winner_val])
+
+def tie_bet(bet: ChipVector, win_con: int, cap: ChipVector) -> ChipVector:
+    """Multiply a bet after a tie; by 3, or 9 on blackjack/5-card tie, then apply bet limits
+
+    ### Parameters
+    bet: ChipVector
+        Current bet
+    win_con: int
+        Win condition of the tie, as given by blackjack_winners()
+    cap: ChipVector
+        Maximum amount of each chip type that can be bet
+
+    ### Returns
+    ChipVector
+        The new bet
+    """
+
+    multiplier = 9 if win_con > 0 else 3
+    return (bet * multiplier).clamp(cap)
+
+
+# Tourney
+
+MAX_DECKS = 64
+"""Most decks a Tourney shoe may hold; between identical cards, the one from the lowest deck wins"""
+
+def decks_needed(cards: int) -> int:
+    """Amount of decks to shuffle together to deal a number of distinct cards
+
+    ### Parameters
+    cards: int
+        Cards to be dealt
+
+    ### Raises
+    ValueError
+        More cards than the largest shoe can hold
+    """
+
+    decks = max(1, -(-cards // DECK_SIZE))
+    if decks > MAX_DECKS:
+        raise ValueError("Too many cards for a single shoe")
+
+    return decks
+
+def card_face(card: int) -> int:
+    """Index in the standard deck of a card from any deck of a shoe, e.g. for display
+
+    ### Parameters
+    card: int
+        Index of the card in the shoe
+    """
+
+    return card % DECK_SIZE
+
+class TourneyHand:
+    """State of a single Tourney hand
+
+    ### Attributes
+    cards: list[int]
+        Cards in the hand
+    used: list[bool]
+        Whether each card in the hand has been played in an earlier match
+    played: int
+        Index of the card presented in the current match; -1 if none yet
+    points: int
+        Matches won this round
+    """
+
+    __slots__ = ("cards", "used", "played", "points")
+
+    def __init__(self, cards: list[int], used: list[bool] | None = None, played: int = -1, points: int = 0):
+        self.cards = cards
+        self.used = [False] * len(cards) if used is None else used
+        self.played = played
+        self.points = points
+
+def card_rank(card: int) -> int:
+    """Strength of a card in Tourney; face first, then suit, then the lowest deck between identical cards
+
+    ### Parameters
+    card: int
+        Index of the card in the shoe
+    """
+
+    deck, face = divmod(card, DECK_SIZE)
+    return ((face % 13) * 4 + face // 13) * MAX_DECKS + (MAX_DECKS - 1 - deck)
+
+def tourney_match(hands: list[TourneyHand]) -> int:
+    """Compare the presented cards, award the point, and mark the cards as used
+
+    ### Parameters
+    hands: list[TourneyHand]
+        Every hand at the table, each with a card presented (MODIFIED IN-PLACE)
+
+    ### Returns
+    int
+        Index of the hand that won the match
+
+    ### Raises
+    ValueError
+        At least one hand has not presented a card
+    """
+
+    best = -1
+    winner = 0
+    for i, hand in enumerate(hands):
+        if hand.played == -1:
+            raise ValueError("Not every hand has presented a card")
+        rank = card_rank(hand.cards[hand.played])
+        if rank > best:
+            winner = i
+            best = rank
+
+    for hand in hands:
+        hand.used[hand.played] = True
+        hand.played = -1
+
+    hands[winner].points += 1
+    return winner
+
+def tiebreaker(hand: TourneyHand) -> int:
+    """Get the first card that hasn't been played yet; 0 if none"""
+
+    for card, used in zip(hand.cards, hand.used):
+        if not used:
+            return card
+
+    return 0
+
+def tiebreak_rank(hand: TourneyHand) -> int:
+    """Rank of the first card that hasn't been played yet; -1 if none, so that it loses to every card"""
+
+    for card, used in zip(hand.cards, hand.used):
+        if not used:
+            return card_rank(card)
+
+    return -1
+
+def tourney_winners(hands: list[TourneyHand]) -> list[int]:
+    """Rank the hands tied for most points at the end of a round
+
+    ### Returns
+    list[int]
+        Indices of all hands tied for most points, best tiebreaker card first
+    """
+
+    # Single pass collecting the tied hands with their tiebreak ranks
+    top = -1
+    tied: list[tuple[int, int]] = []
+    for i, hand in enumerate(hands):
+        if hand.points > top:
+            top = hand.points
+            tied = []
+        if hand.points == top:
+            tied.append((tiebreak_rank(hand), i))
+
+    tied.sort(reverse = True, key = lambda entry: entry[0])
+    return [i for _, i in tied]
+
+def tourney_reward(bet: ChipVector, points: int, cap: ChipVector) -> ChipVector:
+    """Reward for the winner of a round; in general 1 player wins minimum 2 pts, so bet multiplied by pts - 1
+
+    ### Parameters
+    bet: ChipVector
+        Current bet
+    points: int
+        Points of the winner
+    cap: ChipVector
+        Maximum amount of each chip type that can be won
+
+    ### Returns
+    ChipVector
+        Chips to pay the winner
+    """
+
+    return (bet * (points - 1)).clamp(cap)
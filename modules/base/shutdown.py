@@ -0,0 +1,112 @@
+"""Coordinates a graceful shutdown: stop taking commands, drain in-flight ones, flush state, then close"""
+
+print("Loading module 'shutdown'...")
+
+from asyncio import Task, sleep, get_running_loop
+from time import monotonic
+from typing import Callable
+
+from discord import ApplicationContext
+from sqlalchemy import text
+
+from .bot import bot_client, database_engine, ShuttingDownError
+from .auxiliary import log, get_time, loc, ghost_reply, flush_logs, config
+
+shutting_down: bool = False
+"""Whether new commands are being refused"""
+
+in_flight: int = 0
+"""Amount of application commands currently being handled"""
+
+shutdown_hooks: list[Callable[[], None]] = []
+"""Functions to run once in-flight commands have drained, i.e. to flush cached state; see on_shutdown()"""
+
+shutdown_task: Task | None = None
+"""Reference to the running shutdown, so that it doesn't get garbage collected"""
+
+def on_shutdown(func: Callable[[], None]) -> Callable[[], None]:
+    """Decorator registering a function to run during shutdown, after commands have drained
+
+    ### Parameters
+    func: Callable[[], None]
+        Function to be run; exceptions are logged but do not stop the shutdown
+    """
+
+    shutdown_hooks.append(func)
+    return func
+
+async def accepting_commands(context: ApplicationContext) -> bool:
+    """Global check that turns away commands once shutdown has begun
+
+    ### Raises
+    ShuttingDownError
+        Shutdown has begun; the user has already been told
+    """
+
+    if shutting_down:
+        log(loc("shutdown.deny.log", get_time(), context.guild, context.channel, context.author))
+        await ghost_reply(context, loc("shutdown.deny"), True)
+        raise ShuttingDownError
+
+    return True
+
+bot_client.add_check(accepting_commands, call_once = True)
+
+@bot_client.listen()
+async def on_application_command(context: ApplicationContext):
+    global in_flight
+    in_flight += 1
+
+@bot_client.listen()
+async def on_application_command_completion(context: ApplicationContext):
+    global in_flight
+    in_flight -= 1
+
+@bot_client.listen("on_application_command_error")
+async def count_failed_command(context: ApplicationContext, exception: Exception):
+    global in_flight
+    in_flight -= 1
+
+def checkpoint_database() -> None:
+    """Fold any write-ahead log back into the main database file and close all pooled connections"""
+
+    with database_engine.connect() as connection:
+        connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    database_engine.dispose()
+
+async def graceful_shutdown(timeout: float) -> None:
+    """Shut the bot down without cutting off commands that are mid-transaction
+
+    ### Parameters
+    timeout: float
+        Maximum amount of seconds to wait for in-flight commands
+    """
+
+    global shutting_down
+    shutting_down = True
+
+    deadline = monotonic() + timeout
+    while in_flight > 0 and monotonic() < deadline:
+        await sleep(0.1)
+    if in_flight > 0:
+        log(loc("shutdown.timeout.log", get_time(), in_flight))
+
+    for hook in shutdown_hooks:
+        try:
+            hook()
+        except Exception as err:
+            log(loc("shutdown.hook.log", get_time(), hook.__qualname__, repr(err)))
+
+    checkpoint_database()
+    log(loc("shutdown.done.log", get_time()))
+    flush_logs()
+
+    await bot_client.close()
+
+def request_shutdown() -> None:
+    """Begin shutting down in the background, so that the calling command can finish first"""
+
+    global shutdown_task
+
+    if shutdown_task is None:
+        shutdown_task = get_running_loop().create_task(graceful_shutdown(config["shutdown"]["drain_timeout"]))
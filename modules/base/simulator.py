@@ -0,0 +1,316 @@
+"""Batch Monte Carlo simulator of Blackjack for balancing house rules; requires NumPy
+
+Thousands of games are dealt at once as arrays, with the same card encoding and hand values as the rules engine.
+Every player follows a fixed strategy: hit below a raw value, optionally always taking a 5th card for the charlie.
+Each round is dealt from a freshly shuffled deck, and ties are replayed between the tied players with the bet
+multiplied, exactly as Blackjack.end_round() does, until a single winner is found.
+
+Can be run from the repository root with: python -m modules.base.simulator --help
+"""
+
+print("Loading module 'simulator'...")
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from os import cpu_count
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import rules
+
+CHUNK_SIZE = 100000
+"""Maximum amount of games simulated at once by a single worker"""
+
+MAX_CARDS = 5
+"""No hand ever needs more cards than a 5-card charlie"""
+
+HIT, STAND, BUST = rules.HandState
+
+def raw_values(totals: "np.ndarray", aces: "np.ndarray") -> "np.ndarray":
+    """Vectorised rules.hand_value(raw = True); reduce as many aces as needed to not bust
+
+    ### Parameters
+    totals: np.ndarray
+        Sum of card values of each hand, with aces worth 11
+    aces: np.ndarray
+        Amount of aces in each hand
+    """
+
+    reductions = np.minimum(aces, (np.maximum(totals - 21, 0) + 9) // 10)
+    return totals - 10 * reductions
+
+def value_classes(raw: "np.ndarray", counts: "np.ndarray") -> "np.ndarray":
+    """Vectorised rules.hand_value(); 0 = busted, 1 = no hand, 2 = normal, 3 = 21, 4 = 5-card charlie
+
+    ### Parameters
+    raw: np.ndarray
+        Raw value of each hand
+    counts: np.ndarray
+        Amount of cards in each hand
+    """
+
+    return np.select(
+        [counts == 0, counts >= 5, raw > 21, raw == 21],
+        [1, 4, 0, 3],
+        2
+    )
+
+def play_round(
+    rng: "np.random.Generator", dealt: "np.ndarray", last: "np.ndarray", stand_on: int, chase_charlie: bool
+) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Play a single round of many games at once
+
+    Each hand is given its own 5-card segment of a shuffled deck; as players only decide from their own cards,
+    this deals the same distribution of hands as drawing from a shared deck in turn order.
+    As in Blackjack.start_round(), the first turn goes to the first dealt player after whoever last had the turn.
+
+    ### Parameters
+    rng: np.random.Generator
+        Source of the shuffles
+    dealt: np.ndarray
+        Boolean array of shape (games, players); whether each player is dealt into the round
+    last: np.ndarray
+        Seat that last had the turn in each game
+    stand_on: int
+        Raw hand value at which players stand
+    chase_charlie: bool
+        Whether players always hit on 4 cards, since a 5th card can never bust
+
+    ### Returns
+    A tuple:
+    Index 0
+        Win condition of each game; 0 = norm, 1 = blackjack, 2 = five card charlie
+    Index 1
+        Boolean array of shape (games, players); winners of each game, more than 1 means tie
+    Index 2
+        Seat that last had the turn in each game
+    """
+
+    games, players = dealt.shape
+    rows = np.arange(games)
+
+    following = (last[:, None] + np.arange(1, players + 1)) % players
+    first = following[rows, dealt[rows[:, None], following].argmax(axis = 1)]
+    last = last.copy()
+
+    decks = rng.permuted(np.tile(np.arange(52), (games, 1)), axis = 1)
+    values = CARD_VALUES[decks[:, :players * MAX_CARDS].reshape(games, players, MAX_CARDS)]
+
+    counts = np.where(dealt, 2, 0)
+    totals = np.where(dealt, values[:, :, 0] + values[:, :, 1], 0)
+    aces = np.where(dealt, (values[:, :, :2] == 11).sum(axis = 2), 0)
+    states = np.where(dealt, HIT, BUST)
+    over = np.zeros(games, bool)
+
+    # Players act in turn order from the first, one card at a time, until the round is over in every game
+    while not over.all():
+        for step in range(players):
+            seat = (first + step) % players
+            acting = ~over & (states[rows, seat] == HIT)
+            if not acting.any():
+                continue
+            last[acting] = seat[acting]
+
+            count = counts[rows, seat]
+            raw = raw_values(totals[rows, seat], aces[rows, seat])
+            wants = (count < MAX_CARDS) & ((raw < stand_on) | (chase_charlie & (count == MAX_CARDS - 1)))
+            hitting = acting & wants
+            standing = acting & ~wants
+
+            card = values[rows, seat, np.minimum(count, MAX_CARDS - 1)]
+            hit_rows, hit_seats = rows[hitting], seat[hitting]
+            totals[hit_rows, hit_seats] += card[hitting]
+            aces[hit_rows, hit_seats] += card[hitting] == 11
+            counts[hit_rows, hit_seats] += 1
+            busted = hitting & (value_classes(raw_values(totals[rows, seat], aces[rows, seat]), counts[rows, seat]) == 0)
+
+            states[rows[standing], seat[standing]] = STAND
+            states[rows[busted], seat[busted]] = BUST
+
+            # Same test as rules.tally_over()
+            over |= (standing | busted) & (
+                ((states == BUST).sum(axis = 1) == players - 1) | ((states == HIT).sum(axis = 1) == 0)
+            )
+
+    # Same comparison as rules.blackjack_winners()
+    raw = raw_values(totals, aces)
+    end_vals = value_classes(raw, counts)
+    winner_vals = end_vals.max(axis = 1)
+    normal = winner_vals == 2
+    end_vals[normal] = np.where(states[normal] != BUST, raw[normal], 0)
+    winners = end_vals == end_vals.max(axis = 1, keepdims = True)
+
+    return (winner_vals - 2, winners, last)
+
+def simulate_chunk(games: int, players: int, bet: list[int], cap: list[int], stand_on: int, chase_charlie: bool, seed) -> dict:
+    """Simulate whole games, replaying ties until every game has a single winner
+
+    ### Parameters
+    games: int
+        Amount of games to simulate
+    players: int
+        Players at each table
+    bet: list[int]
+        Bet at the start of each game
+    cap: list[int]
+        Maximum amount of each chip type that can be bet
+    stand_on: int
+        Raw hand value at which players stand
+    chase_charlie: bool
+        Whether players always hit on 4 cards
+    seed: np.random.SeedSequence | int | None
+        Seed of this chunk
+
+    ### Returns
+    dict
+        Raw counts; see simulate() for how they are summarised
+    """
+
+    rng = np.random.default_rng(seed)
+    bets = np.tile(np.array(bet, np.int64), (games, 1))
+    cap = np.array(cap, np.int64)
+    dealt = np.ones((games, players), bool)
+    # New games start with the turn on the first seat, as Blackjack.curr_turn does
+    last = np.zeros(games, np.int64)
+    pending = np.arange(games)
+
+    wins = np.zeros(players, np.int64)
+    win_cons = np.zeros(3, np.int64)
+    payout = np.zeros(len(bet), np.int64)
+    rounds = 0
+    ties = 0
+
+    while len(pending) > 0:
+        win_con, winners, last[pending] = play_round(rng, dealt[pending], last[pending], stand_on, chase_charlie)
+        rounds += len(pending)
+        single = winners.sum(axis = 1) == 1
+
+        done = pending[single]
+        wins += winners[single].sum(axis = 0)
+        win_cons += np.bincount(win_con[single], minlength = 3)
+        payout += bets[done].sum(axis = 0)
+
+        # Same multipliers and bet limits as rules.tie_bet()
+        tied = pending[~single]
+        ties += len(tied)
+        multipliers = np.where(win_con[~single] > 0, 9, 3)
+        bets[tied] = np.minimum(bets[tied] * multipliers[:, None], cap)
+        dealt[tied] = winners[~single]
+
+        pending = tied
+
+    return {
+        "games": games,
+        "rounds": rounds,
+        "ties": ties,
+        "wins": wins,
+        "win_cons": win_cons,
+        "payout": payout,
+    }
+
+def simulate(
+    games: int,
+    players: int = 2,
+    bet: list[int] = [1, 0, 0, 0, 0, 0],
+    cap: list[int] = rules.BET_CAP,
+    stand_on: int = 17,
+    chase_charlie: bool = False,
+    workers: int = 0,
+    seed: int | None = None,
+) -> dict:
+    """Simulate many games of Blackjack across a pool of processes
+
+    ### Parameters
+    games: int
+        Amount of games to simulate; each game lasts until a round has a single winner
+    players: int = 2
+        Players at each table, 2 to 10
+    bet: list[int] = [1, 0, 0, 0, 0, 0]
+        Bet at the start of each game
+    cap: list[int] = rules.BET_CAP
+        Maximum amount of each chip type that can be bet
+    stand_on: int = 17
+        Raw hand value at which players stand
+    chase_charlie: bool = False
+        Whether players always hit on 4 cards, since a 5th card can never bust
+    workers: int = 0
+        Amount of processes to use; 0 for every core
+    seed: int | None = None
+        Seed for reproducible results
+
+    ### Returns
+    dict
+        games, rounds: amounts simulated
+        tie_rate: share of rounds that ended in a tie
+        win_rate: share of games won by each seat, in join order; who acts first rotates between rounds
+        blackjack_rate, charlie_rate: share of games won with a 21 or a 5-card charlie
+        payout: mean chips paid to the winner per game, per chip type
+
+    ### Raises
+    ImportError
+        NumPy is not installed
+    ValueError
+        Invalid amount of games or players
+    """
+
+    if np is None:
+        raise ImportError("The Blackjack simulator requires NumPy")
+    if games < 1 or not 2 <= players <= 52 // MAX_CARDS:
+        raise ValueError("Invalid amount of games or players")
+
+    seeds = np.random.SeedSequence(seed).spawn((games + CHUNK_SIZE - 1) // CHUNK_SIZE)
+    sizes = [min(CHUNK_SIZE, games - i * CHUNK_SIZE) for i in range(len(seeds))]
+    args = [(size, players, bet, cap, stand_on, chase_charlie, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    workers = min(workers or cpu_count() or 1, len(args))
+    if workers == 1:
+        results = [simulate_chunk(*chunk) for chunk in args]
+    else:
+        # Spawn rather than fork, since this may be called from a thread of the running bot
+        with ProcessPoolExecutor(workers, mp_context = get_context("spawn")) as pool:
+            results = list(pool.map(simulate_chunk, *zip(*args)))
+
+    totals = {key: sum(result[key] for result in results) for key in results[0]}
+    payout = totals["payout"] / games
+
+    return {
+        "games": games,
+        "rounds": totals["rounds"],
+        "tie_rate": totals["ties"] / totals["rounds"],
+        "win_rate": (totals["wins"] / games).tolist(),
+        "blackjack_rate": totals["win_cons"][1] / games,
+        "charlie_rate": totals["win_cons"][2] / games,
+        "payout": payout.tolist(),
+    }
+
+if np is not None:
+    CARD_VALUES = np.array(rules.CARD_VALUES[:rules.HIDDEN_CARD])
+    """Blackjack value of every card in the standard deck, for lookups by card index"""
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from time import perf_counter
+
+    parser = ArgumentParser(description = "Simulate many games of Blackjack to balance house rules")
+    parser.add_argument("games", type = int, nargs = "?", default = 1000000)
+    parser.add_argument("--players", type = int, default = 2)
+    parser.add_argument("--bet", type = int, nargs = 6, default = [1, 0, 0, 0, 0, 0])
+    parser.add_argument("--stand-on", type = int, default = 17)
+    parser.add_argument("--chase-charlie", action = "store_true")
+    parser.add_argument("--workers", type = int, default = 0)
+    parser.add_argument("--seed", type = int)
+    args = parser.parse_args()
+
+    start = perf_counter()
+    stats = simulate(args.games, args.players, args.bet, rules.BET_CAP, args.stand_on, args.chase_charlie, args.workers, args.seed)
+    elapsed = perf_counter() - start
+
+    print(f"{stats['games']} games ({stats['rounds']} rounds) in {elapsed:.2f}s")
+    print(f"Tie rate per round: {stats['tie_rate']:.4f}")
+    print("Win rate by seat:   " + ", ".join(f"{rate:.4f}" for rate in stats["win_rate"]))
+    print(f"Blackjack wins:     {stats['blackjack_rate']:.4f}")
+    print(f"Charlie wins:       {stats['charlie_rate']:.4f}")
+    print("Mean payout:        " + ", ".join(f"{chips:.3f}" for chips in stats["payout"]))
@@ -0,0 +1,112 @@
+"""Periodically cleans up games abandoned in their channels, which would otherwise stay in the database forever
+
+Every sweeper.interval seconds, games that haven't changed in sweeper.idle_days (settings/config.json)
+are archived and ended, a few at a time, yielding to the event loop between batches.
+Archiving appends the final state of the game and its players to sweeper.archive as a line of JSON;
+the game's event log and history are kept as well, as for any other ended game.
+If sweeper.cash_out is set, players' chips are moved into their accounts under their names as the games end.
+"""
+
+print("Loading module 'sweeper'...")
+
+from asyncio import Task, get_running_loop, sleep
+from json import dumps
+from time import time
+from traceback import format_exception
+
+from sqlalchemy import select
+
+from .bot import bot_client, database_connector
+from .auxiliary import log, get_time, loc, config
+from .dbmodels import Game
+from . import shutdown
+
+sweeper_task: Task | None = None
+"""Reference to the sweeper task, so that it doesn't get garbage collected"""
+
+def snapshot(game: Game) -> dict:
+    """Final state of a game worth keeping, i.e. what each player held
+
+    ### Parameters
+    game: Game
+        The game to be archived
+
+    ### Returns
+    dict
+        Serializable summary of the game
+    """
+
+    return {
+        "t": int(time()),
+        "game": game.id,
+        "type": game.type,
+        "stake": game.stake,
+        "last_active": game.last_active,
+        "players": [[player.user_id, player.name, player.chips, player.used] for player in game.players],
+    }
+
+def sweep_batch(cutoff: int, batch: int) -> int:
+    """Archive and end up to a batch of games idle since before the cutoff, longest idle first
+
+    ### Parameters
+    cutoff: int
+        Unix time; games last active before it are swept
+    batch: int
+        Most games to sweep
+
+    ### Returns
+    int
+        Amount of games swept
+    """
+
+    session = database_connector()
+    games = session.scalars(select(Game).where(Game.last_active < cutoff).order_by(Game.last_active).limit(batch)).all()
+
+    # Archive the whole batch first, so that no game is deleted without being archived
+    if games:
+        with open(config["sweeper"]["archive"], "a", encoding = "utf-8") as file:
+            file.writelines(dumps(snapshot(game), separators = (",", ":")) + "\n" for game in games)
+
+    for game in games:
+        game.end(session, config["sweeper"]["cash_out"])
+
+    session.close()
+    return len(games)
+
+async def run_sweeper() -> None:
+    """Sweep idle games every interval; runs for as long as the bot does"""
+
+    while not shutdown.shutting_down:
+        settings = config["sweeper"]
+        cutoff = int(time()) - settings["idle_days"] * 86400
+        swept = 0
+
+        try:
+            while not shutdown.shutting_down:
+                count = sweep_batch(cutoff, settings["batch"])
+                swept += count
+                if count < settings["batch"]:
+                    break
+                # Let commands through between batches
+                await sleep(0)
+        except Exception as err:
+            log(loc("sweeper.error.log", get_time(), "".join(format_exception(err))))
+
+        if swept > 0:
+            log(loc("sweeper.log", get_time(), swept, settings["idle_days"]))
+
+        await sleep(settings["interval"])
+
+@bot_client.listen()
+async def on_ready():
+    # on_ready fires again after reconnecting; only one sweeper may run
+    global sweeper_task
+    if sweeper_task is None and config["sweeper"]["idle_days"] > 0:
+        sweeper_task = get_running_loop().create_task(run_sweeper())
+
+@shutdown.on_shutdown
+def stop_sweeper() -> None:
+    """Stop sweeping once commands have drained"""
+
+    if sweeper_task is not None:
+        sweeper_task.cancel()
@@ -0,0 +1,187 @@
+"""Turn timers, so that a player who walks away can't hold up a round forever
+
+Each game persists the deadline of its current turn in game.turn_deadline. In memory, every pending deadline
+sits in a single heap, watched by one task that sleeps until the earliest one; deadlines are pushed when the
+session that set them commits, so rolled back turns never time out. Replaced deadlines are left in the heap
+and skipped once they come up, which keeps rescheduling to a single push.
+On startup, the heap is refilled from the database, so deadlines survive restarts; overdue ones fire right away.
+
+Game modules register what happens on timeout with on_turn_timeout().
+"""
+
+print("Loading module 'timers'...")
+
+from asyncio import Event, Task, get_running_loop, wait_for
+from heapq import heapify, heappop, heappush
+from time import time
+from traceback import format_exception
+from typing import Awaitable, Callable
+
+from discord.abc import Messageable
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from .bot import SQLBase, bot_client, database_connector
+from .auxiliary import log, get_time, loc, config
+from . import shutdown
+
+BUFFER_KEY = "turn_deadlines"
+"""Key of the deadlines set by a session, pending its commit, in Session.info"""
+
+pending: list[tuple[int, int]] = []
+"""Heap of deadline and game ID; may hold deadlines since replaced, see current"""
+
+current: dict[int, int] = {}
+"""Deadline of every game with a running turn timer, by game ID; the only heap entries still valid"""
+
+timeout_handlers: dict[str, Callable[[Messageable, Session, int], Awaitable[None]]] = {}
+"""Coroutine to run when a turn times out, by polymorphic game type"""
+
+woken = Event()
+"""Set when a deadline earlier than all others is pushed, so the timer task goes back to sleep for less"""
+
+timer_task: Task | None = None
+"""Reference to the timer task, so that it doesn't get garbage collected"""
+
+def new_deadline() -> int | None:
+    """Deadline of a turn starting now, in unix seconds; None if turns.timeout in settings/config.json is 0"""
+
+    if config["turns"]["timeout"] <= 0:
+        return None
+    return int(time()) + config["turns"]["timeout"]
+
+def schedule(session: Session, game_id: int, deadline: int | None) -> None:
+    """Start, replace or stop a game's turn timer once the session commits
+
+    ### Parameters
+    session: sqlalchemy.orm.Session
+        Database session scope
+    game_id: int
+        ID of the game, i.e. its channel
+    deadline: int | None
+        Unix time the turn times out at; None stops the timer
+    """
+
+    session.info.setdefault(BUFFER_KEY, []).append((deadline, game_id))
+
+@event.listens_for(Session, "after_commit")
+def push_deadlines(session: Session) -> None:
+    """Put the deadlines the session set into the heap, now that they are persisted"""
+
+    for deadline, game_id in session.info.pop(BUFFER_KEY, ()):
+        if deadline is None:
+            current.pop(game_id, None)
+            continue
+
+        current[game_id] = deadline
+        heappush(pending, (deadline, game_id))
+        if pending[0] == (deadline, game_id):
+            woken.set()
+
+@event.listens_for(Session, "after_rollback")
+def drop_deadlines(session: Session) -> None:
+    """Turns of rolled back changes never started"""
+
+    session.info.pop(BUFFER_KEY, None)
+
+def on_turn_timeout(game_type: str):
+    """Decorator registering what to do when a turn of a type of game times out
+
+    The coroutine is given the game's channel, a session, and the game ID; the timer has already been stopped,
+    so it only needs to start a new one if another turn begins.
+
+    ### Parameters
+    game_type: str
+        Polymorphic identity of the Game subclass, e.g. "blackjack"
+    """
+
+    def register(handler: Callable[[Messageable, Session, int], Awaitable[None]]):
+        timeout_handlers[game_type] = handler
+        return handler
+
+    return register
+
+def load_deadlines() -> None:
+    """Refill the heap with every deadline in the database"""
+
+    games = SQLBase.metadata.tables["game"]
+    session = database_connector()
+    rows = session.execute(select(games.c.id, games.c.turn_deadline).where(games.c.turn_deadline.is_not(None))).all()
+    session.close()
+
+    current.clear()
+    current.update({game_id: deadline for game_id, deadline in rows})
+    pending[:] = [(deadline, game_id) for game_id, deadline in rows]
+    heapify(pending)
+
+async def expire(game_id: int, deadline: int) -> None:
+    """Time out the turn of a game, unless it has moved on since
+
+    ### Parameters
+    game_id: int
+        ID of the game, i.e. its channel
+    deadline: int
+        Deadline that has passed
+    """
+
+    if current.get(game_id) != deadline:
+        return
+    del current[game_id]
+
+    games = SQLBase.metadata.tables["game"]
+    session = database_connector()
+    try:
+        # Claim the timeout in the database too, so that it fires once even if the turn just ended
+        claimed = session.execute(
+            update(games)
+            .where(games.c.id == game_id, games.c.turn_deadline == deadline)
+            .values(turn_deadline = None)
+            .returning(games.c.type)
+        ).first()
+        session.commit()
+
+        if claimed is None or (handler := timeout_handlers.get(claimed.type)) is None:
+            return
+
+        channel = bot_client.get_channel(game_id) or await bot_client.fetch_channel(game_id)
+        await handler(channel, session, game_id)
+    except Exception as err:
+        log(loc("timers.error.log", get_time(), game_id, "".join(format_exception(err))))
+    finally:
+        session.close()
+
+async def run_timers() -> None:
+    """Sleep until the earliest deadline, time it out, and repeat; runs for as long as the bot does"""
+
+    load_deadlines()
+
+    while not shutdown.shutting_down:
+        woken.clear()
+        if not pending:
+            await woken.wait()
+            continue
+
+        delay = pending[0][0] - time()
+        if delay > 0:
+            try:
+                await wait_for(woken.wait(), delay)
+            except TimeoutError:
+                pass
+            continue
+
+        deadline, game_id = heappop(pending)
+        await expire(game_id, deadline)
+
+@bot_client.listen()
+async def on_ready():
+    # on_ready fires again after reconnecting; only one timer task may run
+    global timer_task
+    if timer_task is None:
+        timer_task = get_running_loop().create_task(run_timers())
+
+@shutdown.on_shutdown
+def stop_timers() -> None:
+    """Stop timing out turns once commands have drained; deadlines stay in the database for the next start"""
+
+    if timer_task is not None:
+        timer_task.cancel()
@@ -2,25 +2,25 @@
 
 print("Loading module 'blackjack'...")
 
-from discord import ApplicationContext
+from asyncio import get_running_loop
+from functools import partial
+
+from discord import ApplicationContext, Guild, option
+from discord.abc import Messageable
 from sqlalchemy.orm import Session
 
-from ..base.bot import bot_client, database_connector
-from ..base.auxiliary import log, get_time, ghost_reply, loc, loc_arr
+from ..base.bot import database_connector
+from ..base.auxiliary import log, get_time, ghost_reply, loc, loc_arr, config
 from ..base.dbmodels import Blackjack, BlackjackPlayer
+from ..base.chipvector import ChipVector
+from ..base.timers import on_turn_timeout
 from ..base.emojis import standard_deck, format_cards, format_chips
-from .game import base_game_cmds
+from .game import create_game_cmds
+from .registry import register_game
 from ..misc.admin import admin_cmds
 
 # Inherit and register command group to Discord
-bj_cmds = base_game_cmds.copy()
-bj_cmds.name = "bj"
-bj_cmds.description = "Commands to run the game of Blackjack"
-for i, cmd in enumerate(bj_cmds.subcommands):
-    cmd = cmd.copy()
-    cmd.game_type = Blackjack
-    bj_cmds.subcommands[i] = cmd
-bot_client.add_application_command(bj_cmds)
+bj_cmds = create_game_cmds("bj", "Commands to run the game of Blackjack", Blackjack)
 
 
 @bj_cmds.command(name = "hand", description = "Peek at the hand you've been given")
@@ -52,10 +52,10 @@ async def bj_hand(
                 loc("bj.hand.per",
                     other_player.name,
                     "None"
-                        if len(other_player.get_hand()) == 0
+                        if other_player.hand_size == 0
                         else format_cards(standard_deck, other_player.get_hand(True)),
                     "N/A"
-                        if len(other_player.get_hand()) == 0
+                        if other_player.hand_size == 0
                         else "Bust" if other_player.busted()
                         else "".join([
                             str(other_player.hand_value(True)),
@@ -66,7 +66,7 @@ async def bj_hand(
                 if other_player != player
                 ])
             hand = player.get_hand()
-            hand_val = "N/A" if len(hand) == 0 else player.hand_value(raw = True)
+            hand_val = "N/A" if player.hand_size == 0 else player.hand_value(raw = True)
             hand = "None" if len(hand) == 0 else format_cards(standard_deck, hand)
             await ghost_reply(context, loc("bj.hand", other_hands, hand, hand_val), True)
 
@@ -107,7 +107,7 @@ async def bj_hit(
             busted = not player.add_card(session, drawn[0])
             if busted and game.is_all_done():
                 # End round if all but one busted
-                await bj_end_round(context, session, game)
+                await bj_end_round(context.guild, context.channel, session, game)
             else:
                 game.next_turn(session)
 
@@ -155,23 +155,58 @@ async def bj_stand(
             player.stand(session)
             await ghost_reply(context, loc("bj.stand", player.name))
 
-            # player stood, so test for round end
-            if game.is_all_done():
-                await bj_end_round(context, session, game)
-            else:
-                # Round didn't end with stand
-                game.next_turn(session)
-                await context.channel.send(loc("bj.next", "", game.get_turn().name))
-                await context.channel.send(game.get_turn().mention(), delete_after = 0)
+            await bj_after_stand(context.guild, context.channel, session, game)
 
     session.close()
 
-async def bj_end_round(context: ApplicationContext, session: Session, game: Blackjack) -> None:
+async def bj_after_stand(guild: Guild | None, channel: Messageable, session: Session, game: Blackjack) -> None:
+    """End the round if the player who just stood was the last to, otherwise pass the turn on
+    
+    ### Parameters
+    guild: discord.Guild | None
+        Guild of the game's channel, for logging
+    channel: discord.abc.Messageable
+        Channel of the game
+    session: sqlalchemy.orm.Session
+        Current database scope
+    game: Blackjack
+        The blackjack game in which a player stood
+    """
+
+    # player stood, so test for round end
+    if game.is_all_done():
+        await bj_end_round(guild, channel, session, game)
+    else:
+        # Round didn't end with stand
+        game.next_turn(session)
+        await channel.send(loc("bj.next", "", game.get_turn().name))
+        await channel.send(game.get_turn().mention(), delete_after = 0)
+
+    # No need to close session; this function is not to be called on its own
+
+@on_turn_timeout("blackjack")
+async def bj_turn_timeout(channel: Messageable, session: Session, game_id: int) -> None:
+    """Stand for a player who let their turn time out"""
+
+    game: Blackjack = Blackjack.find_game(session, game_id)
+    if game is None or not game.is_midround():
+        return
+
+    player = game.get_turn()
+    log(loc("bj.timeout.log", get_time(), channel.guild, channel, player.name))
+    player.stand(session)
+    await channel.send(loc("bj.timeout", player.name))
+
+    await bj_after_stand(channel.guild, channel, session, game)
+
+async def bj_end_round(guild: Guild | None, channel: Messageable, session: Session, game: Blackjack) -> None:
     """Handle all functionality for ending a round of Blackjack
     
     ### Parameters
-    context: discord.ApplicationContext
-        Application command context
+    guild: discord.Guild | None
+        Guild of the game's channel, for logging
+    channel: discord.abc.Messageable
+        Channel of the game
     session: sqlalchemy.orm.Session
         Current database scope
     game: Blackjack
@@ -181,7 +216,7 @@ async def bj_end_round(context: ApplicationContext, session: Session, game: Blac
     hands = "".join([loc("bj.end.hand",
             player.name,
             "None"
-                if len(player.get_hand()) == 0
+                if player.hand_size == 0
                 else format_cards(standard_deck, player.get_hand()),
             player.hand_value(raw = True),
             loc_arr("bj.end.con", player.hand_value())
@@ -191,10 +226,10 @@ async def bj_end_round(context: ApplicationContext, session: Session, game: Blac
     
     # End the round
     win_con, winners = game.end_round(session)
-    log(loc("bj.end.log", get_time(), context.guild, context.channel, [str(winner.user()) for winner in winners]))
+    log(loc("bj.end.log", get_time(), guild, channel, [str(winner.user()) for winner in winners]))
     if len(winners) == 1:
         # Round ended with single winner
-        await context.channel.send("".join([loc("bj.end", hands), loc("bj.end.win",
+        await channel.send("".join([loc("bj.end", hands), loc("bj.end.win",
             winners[0].name,
             loc_arr("bj.end.con.win", win_con),
             winners[0].name,
@@ -203,7 +238,7 @@ async def bj_end_round(context: ApplicationContext, session: Session, game: Blac
             )]))
     else:
         # Round ended with a tie
-        await context.channel.send("".join([
+        await channel.send("".join([
             loc("bj.end", hands),
             loc("bj.end.tie",
                 ", ".join([winner.name for winner in winners]),
@@ -216,7 +251,7 @@ async def bj_end_round(context: ApplicationContext, session: Session, game: Blac
                 "".join([loc("bj.start.hand",
                         player.name,
                         format_cards(standard_deck, player.get_hand(True))
-                            if len(player.get_hand()) > 0
+                            if player.hand_size > 0
                             else "None"
                         )
                     for player in game.players
@@ -226,41 +261,34 @@ async def bj_end_round(context: ApplicationContext, session: Session, game: Blac
             ]))
 
     # Ping everyone for end of round
-    await context.channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
+    await channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
 
     # No need to close session; this function is not to be called on its own
 
-async def bj_start_round(context: ApplicationContext):
-    """Test for round start"""
-
-    session = database_connector()
-
-    game: Blackjack = Blackjack.find_game(session, context.channel_id)
+async def bj_start_round(context: ApplicationContext, session: Session, game: Blackjack):
+    """Deal a round once every bet is aligned; the round's bet has already been set
 
-    # Game must exist, and bets must be placed outside of round
-    if game is not None and not game.is_midround() and game.bets_aligned():
-        log(loc("bj.start.log", get_time(), context.guild, context.channel))
-        bet_placed = game.players[0].get_bet()
-        game.set_bet(session, bet_placed)
-
-        await context.channel.send(loc("bj.start",
-            # Should only log reshuffle if reshuffle occurred
-            loc("bj.reshuffle", log(loc("bj.reshuffle.log")))
-                if game.start_round(session)
-                else "",
-            "".join([loc("bj.start.hand", player.name, format_cards(standard_deck, player.get_hand(True)))
-                for player in game.players]),
-            game.get_turn().name
-            ))
-        
-        await context.channel.send(game.get_turn().mention(), delete_after = 0)
+    Called from within /bj bet, in its session; not to be called on its own
+    """
 
-    session.close()
+    log(loc("bj.start.log", get_time(), context.guild, context.channel))
+
+    await context.channel.send(loc("bj.start",
+        # Should only log reshuffle if reshuffle occurred
+        loc("bj.reshuffle", log(loc("bj.reshuffle.log")))
+            if game.start_round(session)
+            else "",
+        "".join([loc("bj.start.hand", player.name, format_cards(standard_deck, player.get_hand(True)))
+            for player in game.players]),
+        game.get_turn().name
+        ))
+    
+    await context.channel.send(game.get_turn().mention(), delete_after = 0)
 
-# Register round start logic to invoke after betting
+# Register round start logic, run by betting once bets are aligned
 for cmd in bj_cmds.walk_commands():
     if cmd.name == "bet":
-        cmd.after_invoke(bj_start_round)
+        cmd.start_round = bj_start_round
         break
 
 bj_admin_cmds = admin_cmds.create_subgroup("bj", "Admin commands directly related to blackjack")
@@ -282,10 +310,7 @@ async def bj_admin_show_deck(
         await ghost_reply(context, loc("bj.none"), True)
     else:
         log(loc("admin.bj.deck.log", get_time(), context.guild, context.channel, context.author))
-        deck = game.get_deck()
-        # Reverse deck order because drawing is from end
-        deck = deck[::-1]
-        await ghost_reply(context, loc("admin.bj.deck", deck))
+        await ghost_reply(context, loc("admin.bj.deck", game.get_deck()))
 
     session.close()
 
@@ -309,4 +334,65 @@ async def bj_admin_shuffle(
         game.shuffle(session)
         await ghost_reply(context, loc("admin.bj.shuffle"))
 
-    session.close()
\ No newline at end of file
+    session.close()
+
+@bj_admin_cmds.command(name = "simulate", description = "Admin command to simulate many games of blackjack for balancing")
+@option("games", int, description = "How many games to simulate", min_value = 1, default = 100000)
+@option("players", int, description = "How many players at each table", min_value = 2, max_value = 10, default = 2)
+@option("stand_on", int, description = "Hand value at which players stand", min_value = 2, max_value = 21, default = 17)
+@option("chase_charlie", bool, description = "Whether players always take a 5th card", default = False)
+@option("physical", int, description = "The amount of physical chips to bet", min_value = 0, default = 0)
+@option("mental", int, description = "The amount of mental chips to bet", min_value = 0, default = 0)
+@option("artificial", int, description = "The amount of artificial chips to bet", min_value = 0, default = 0)
+@option("supernatural", int, description = "The amount of supernatural chips to bet", min_value = 0, default = 0)
+@option("merge", int, description = "The amount of merge chips to bet", min_value = 0, default = 0)
+@option("swap", int, description = "The amount of swap chips to bet", min_value = 0, default = 0)
+@option("private", bool, description = "Whether to keep the response only visible to you", default = False)
+async def bj_admin_simulate(
+    context: ApplicationContext,
+    games: int,
+    players: int,
+    stand_on: int,
+    chase_charlie: bool,
+    physical: int,
+    mental: int,
+    artificial: int,
+    supernatural: int,
+    merge: int,
+    swap: int,
+    private: bool,
+):
+    """Add the command /admin bj simulate
+    
+    Report win, tie and charlie rates and chip flow of the current house rules
+    """
+
+    bet = ChipVector((physical, mental, artificial, supernatural, merge, swap))
+    if bet.is_zero():
+        bet = ChipVector((1, 0, 0, 0, 0, 0))
+    games = min(games, config["simulator"]["max_games"])
+
+    log(loc("admin.bj.sim.log", get_time(), context.guild, context.channel, context.author, games, players, stand_on, chase_charlie, bet))
+    # Simulating may take a few seconds; run it off the event loop
+    await context.defer(ephemeral = True)
+    try:
+        # Loads NumPy, so only once an admin first asks for a simulation
+        from ..base.simulator import simulate
+        stats = await get_running_loop().run_in_executor(None, partial(simulate,
+            games, players, bet, Blackjack.bet_cap, stand_on, chase_charlie, config["simulator"]["workers"]))
+    except ImportError:
+        log(loc("admin.bj.sim.numpy.log", get_time(), context.guild, context.channel, context.author))
+        await ghost_reply(context, loc("admin.bj.sim.numpy"), True)
+        return
+
+    await ghost_reply(context, loc("admin.bj.sim",
+        stats["games"],
+        stats["rounds"],
+        f"{stats['tie_rate']:.2%}",
+        ", ".join(f"{rate:.2%}" for rate in stats["win_rate"]),
+        f"{stats['blackjack_rate']:.2%}",
+        f"{stats['charlie_rate']:.2%}",
+        format_chips([round(chips, 2) for chips in stats["payout"]])
+    ), private)
+
+register_game("bj", Blackjack, bj_cmds)
\ No newline at end of file
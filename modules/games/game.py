@@ -2,32 +2,21 @@
 
 print("Loading module 'game'...")
 
-from random import randint
-
 from discord import ApplicationContext, OptionChoice, User, SlashCommandGroup, option
 
-from ..base.auxiliary import log, get_time, all_zero, ghost_reply, loc, loc_arr, guilds, InvalidArgumentError
-from ..base.dbmodels import Game, Player
+from ..base.auxiliary import log, get_time, ghost_reply, loc, loc_arr, guilds, InvalidArgumentError
+from ..base.dbmodels import Game, Player, ChipAccount
+from ..base.rules import stake_return
+from ..base.chipvector import ChipVector
+from ..base.conversions import CONVERSIONS, plan
+from ..base.rng import unseeded
 from ..base.emojis import format_chips
 from ..misc.admin import admin_cmds
-from ..base.bot import database_connector
-
-chip_conversions = (
-    ((0, 1, 0, 0, 0, 0), (10, 0, 0, 0, 0, 0)),
-    ((0, 0, 1, 0, 0, 0), (40, 3, 0, 0, 0, 0)),
-    ((40, 3, 0, 0, 0, 0), (0, 0, 1, 0, 0, 0)),
-    ((0, 0, 0, 1, 0, 0), (5, 0, 0, 0, 0, 0)),
-    ((0, 0, 0, 1, 0, 0), (0, 0.5, 0, 0, 0, 0)),
-    ((5, 0, 0, 0, 0, 0), (0, 0, 0, 1, 0, 0)),
-    ((0, 0.5, 0, 0, 0, 0), (0, 0, 0, 1, 0, 0)),
-    ((0, 0, 0, 0, 1, 0), (30, 0, 0, 0, 0, 0)),
-    ((0, 0, 0, 0, 1, 0), (0, 3, 0, 0, 0, 0)),
-    ((0, 0, 0, 0, 0, 1), (5, 0, 0, 0, 0, 0)),
-    ((0, 0, 0, 0, 0, 1), (0, 0.5, 0, 0, 0, 0)),
-)
+from ..misc.chips import owned_names
+from ..base.bot import bot_client, database_connector
 
 base_game_cmds = SlashCommandGroup("game_template", "If you can see this, something went wrong", guild_ids = guilds)
-"""Use .copy() to create another group, then change .name, .description, and then set .game_type for each cmd. Then use bot_client.add_application_command to register"""
+"""Template of commands shared by every game; use create_game_cmds() to make a group for a specific game type"""
 
 @base_game_cmds.command(name = "create", description = "Start a game in this channel")
 @option("stake", int, description = "What stake to set the game to", choices = [
@@ -52,7 +41,7 @@ async def create(context: ApplicationContext, stake: int):
     else:
         log(loc("gen.create.log", get_time(), context.guild, context.channel, context.author, expected_type))
         expected_type.create_game(session, context.channel_id, stake)
-        await ghost_reply(context, loc("gen.create", loc_arr("gen.create.stake", stake), randint(0, 63)))
+        await ghost_reply(context, loc("gen.create", loc_arr("gen.create.stake", stake), unseeded.randint(0, 63)))
 
     session.close()
 
@@ -136,9 +125,7 @@ async def concede(context: ApplicationContext):
                                 else loc("gen.lose.win.stake",
                                     loc_arr("gen.lose.stake", game.stake - 1),
                                     loc_arr("gen.lose.stake", game.stake + 1),
-                                    format_chips([n // 2 for n in winner.get_used()]
-                                        if game.stake == 1
-                                        else winner.get_used())
+                                    format_chips(stake_return(winner.get_used(), game.stake))
                                 )
                         )
                     )
@@ -256,9 +243,9 @@ async def bet(context: ApplicationContext, physical: int, mental: int, artificia
     expected_type: type[Game] = context.command.game_type
 
     # Extract chip args
-    chips: list[int] = list(locals().values())[1:7]
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
 
-    if all_zero(chips):
+    if chips.is_zero():
         log(loc("gen.bet.zero.log", get_time(), context.guild, context.channel, context.author))
         await ghost_reply(context, loc("gen.bet.zero"), True)
         return
@@ -277,14 +264,18 @@ async def bet(context: ApplicationContext, physical: int, mental: int, artificia
         elif game.is_midround():
             log(loc("gen.bet.mid.log", get_time(), context.guild, context.channel, context.author))
             await ghost_reply(context, loc("gen.bet.mid"), True)
-        elif game.get_bet_turn().bet == "[0, 0, 0, 0, 0, 0]" and player != game.get_bet_turn():
+        elif game.get_bet_turn().get_bet().is_zero() and player != game.get_bet_turn():
             log(loc("gen.bet.turn.log", get_time(), context.guild, context.channel, context.author))
             await ghost_reply(context, loc("gen.bet.turn"), True)
         else:
             log(loc("gen.bet.log", get_time(), context.guild, context.channel, context.author, chips))
-            player.set_bet(session, chips)
+            started = player.set_bet(session, chips)
             await ghost_reply(context, loc("gen.bet", player.name, format_chips(chips)))
 
+            # The bet aligned every bet, so the round's bet is already set; let the game start its round
+            if started:
+                await context.command.start_round(context, session, game)
+
     session.close()
 
 @base_game_cmds.command(name = "use", description = "Use an amount of chips from your stash")
@@ -303,11 +294,11 @@ async def use(context: ApplicationContext, physical: int, mental: int, artificia
     expected_type: type[Game] = context.command.game_type
 
     # Extract chip args
-    chips: list[int] = list(locals().values())[1:7]
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
 
     session = database_connector()
 
-    if all_zero(chips):
+    if chips.is_zero():
         log(loc("gen.use.zero.log", get_time(), context.guild, context.channel, context.author))
         await ghost_reply(context, loc("gen.use.zero"), True)
         return
@@ -373,25 +364,17 @@ async def convert(context: ApplicationContext, conversion: int, amount: int):
             log(loc("gen.conv.mid.log", get_time(), context.guild, context.channel, context.author))
             await ghost_reply(context, loc("gen.conv.mid"), True)
         else:
-            # test to see if conversion results in whole numbers
-            consumed, produced = chip_conversions[conversion]
-            consumed = [x * amount for x in consumed]
-            produced = [x * amount for x in produced]
+            # Rates are exact fractions, so any amount is checked for fractional chips
+            steps = CONVERSIONS[conversion].scaled(amount)
 
-            whole = True
-            for i in range(len(consumed)):
-                if consumed[i] % 1 != 0 or produced[i] % 1 != 0:
-                    whole = False
-
-            if not whole:
+            if steps is None:
+                consumed = [float(chips * amount) for chips in CONVERSIONS[conversion].consumed]
+                produced = [float(chips * amount) for chips in CONVERSIONS[conversion].produced]
                 log(loc("gen.conv.frac.log", get_time(), context.guild, context.channel, context.author, consumed, produced))
                 await ghost_reply(context, loc("gen.conv.frac"), True)
             else:
-                # convert to int
-                consumed = [int(x) for x in consumed]
-                produced = [int(x) for x in produced]
-                if player.use_chips(session, consumed, False):
-                    player.pay_chips(session, produced)
+                consumed, produced = steps
+                if player.convert_chips(session, [steps]):
                     log(loc("gen.conv.log", get_time(), context.guild, context.channel, context.author, consumed, produced))
                     await ghost_reply(context, loc("gen.conv", player.name, format_chips(consumed), format_chips(produced)))
                 else:
@@ -400,6 +383,115 @@ async def convert(context: ApplicationContext, conversion: int, amount: int):
 
     session.close()
 
+@base_game_cmds.command(name = "convert_plan", description = "Convert chips in as few steps as possible until you have at least an amount")
+@option("physical", int, description = "The amount of physical chips to end up with", min_value = 0, default = 0)
+@option("mental", int, description = "The amount of mental chips to end up with", min_value = 0, default = 0)
+@option("artificial", int, description = "The amount of artificial chips to end up with", min_value = 0, default = 0)
+@option("supernatural", int, description = "The amount of supernatural chips to end up with", min_value = 0, default = 0)
+@option("merge", int, description = "The amount of merge chips to end up with", min_value = 0, default = 0)
+@option("swap", int, description = "The amount of swap chips to end up with", min_value = 0, default = 0)
+async def convert_plan(context: ApplicationContext, physical: int, mental: int, artificial: int, supernatural: int, merge: int, swap: int):
+    """Add the command /<prefix> convert_plan [chip amounts]
+
+    For a player to cover a cost, e.g. of a TF, chaining the fewest conversions needed in one go.
+    """
+
+    expected_type: type[Game] = context.command.game_type
+
+    # Extract chip args
+    cost = ChipVector((physical, mental, artificial, supernatural, merge, swap))
+
+    session = database_connector()
+
+    game = expected_type.find_game(session, context.channel_id)
+    if game is None:
+        log(loc("gen.conv.none.log", get_time(), context.guild, context.channel, context.author))
+        await ghost_reply(context, loc("gen.none"), True)
+    else:
+        player = game.is_playing(session, context.author.id)
+        if player is None:
+            log(loc("gen.conv.spec.log", get_time(), context.guild, context.channel, context.author))
+            await ghost_reply(context, loc("gen.conv.spec"), True)
+        elif game.is_midround():
+            log(loc("gen.conv.mid.log", get_time(), context.guild, context.channel, context.author))
+            await ghost_reply(context, loc("gen.conv.mid"), True)
+        else:
+            found = plan(player.get_chips(), cost)
+            if found is None:
+                log(loc("gen.conv.plan.none.log", get_time(), context.guild, context.channel, context.author, cost))
+                await ghost_reply(context, loc("gen.conv.plan.none"), True)
+            elif len(found) == 0:
+                log(loc("gen.conv.plan.have.log", get_time(), context.guild, context.channel, context.author, cost))
+                await ghost_reply(context, loc("gen.conv.plan.have"), True)
+            else:
+                steps = [CONVERSIONS[conversion].scaled(amount) for conversion, amount in found]
+                if player.convert_chips(session, steps):
+                    log(loc("gen.conv.plan.log", get_time(), context.guild, context.channel, context.author, cost, steps))
+                    await ghost_reply(context, loc("gen.conv.plan", player.name,
+                        "".join(loc("gen.conv.plan.step", format_chips(consumed), format_chips(produced)) for consumed, produced in steps)))
+                else:
+                    log(loc("gen.conv.plan.poor.log", get_time(), context.guild, context.channel, context.author, cost, steps))
+                    await ghost_reply(context, loc("gen.conv.poor"), True)
+
+    session.close()
+
+@base_game_cmds.command(name = "cashout", description = "Move chips from the game into your chip account")
+@option("account", str, description = "The name of the account to move the chips to", min_length = 1, max_length = 50, autocomplete = owned_names)
+@option("physical", int, description = "The amount of physical chips to move; leave all at 0 to move everything", min_value = 0, default = 0)
+@option("mental", int, description = "The amount of mental chips to move", min_value = 0, default = 0)
+@option("artificial", int, description = "The amount of artificial chips to move", min_value = 0, default = 0)
+@option("supernatural", int, description = "The amount of supernatural chips to move", min_value = 0, default = 0)
+@option("merge", int, description = "The amount of merge chips to move", min_value = 0, default = 0)
+@option("swap", int, description = "The amount of swap chips to move", min_value = 0, default = 0)
+async def cashout(context: ApplicationContext, account: str, physical: int, mental: int, artificial: int, supernatural: int, merge: int, swap: int):
+    """Add the command /<prefix> cashout <account> [chip amounts]
+
+    For a player to move chips out of the game and into their chip account, in one transaction.
+    """
+
+    expected_type: type[Game] = context.command.game_type
+
+    # Extract chip args
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
+
+    session = database_connector()
+
+    game = expected_type.find_game(session, context.channel_id)
+    if game is None:
+        log(loc("gen.cash.none.log", get_time(), context.guild, context.channel, context.author))
+        await ghost_reply(context, loc("gen.none"), True)
+    else:
+        player = game.is_playing(session, context.author.id)
+        target = ChipAccount.find_account(session, account)
+        if player is None:
+            log(loc("gen.cash.spec.log", get_time(), context.guild, context.channel, context.author))
+            await ghost_reply(context, loc("gen.cash.spec"), True)
+        elif game.is_midround():
+            log(loc("gen.cash.mid.log", get_time(), context.guild, context.channel, context.author))
+            await ghost_reply(context, loc("gen.cash.mid"), True)
+        elif target is None:
+            log(loc("chips.none.log", get_time(), context.guild, context.channel, context.author, account))
+            await ghost_reply(context, loc("chips.none"), True)
+        elif target.owner_id != context.author.id:
+            log(loc("gen.cash.other.log", get_time(), context.guild, context.channel, context.author, account))
+            await ghost_reply(context, loc("chips.other"), True)
+        else:
+            # Nothing given means everything
+            if chips.is_zero():
+                chips = player.get_chips()
+
+            if chips.is_zero():
+                log(loc("gen.cash.zero.log", get_time(), context.guild, context.channel, context.author))
+                await ghost_reply(context, loc("gen.cash.zero"), True)
+            elif player.cash_out(session, target, chips):
+                log(loc("gen.cash.log", get_time(), context.guild, context.channel, context.author, chips, target.name))
+                await ghost_reply(context, loc("gen.cash", player.name, format_chips(chips), target.name))
+            else:
+                log(loc("gen.cash.poor.log", get_time(), context.guild, context.channel, context.author, chips))
+                await ghost_reply(context, loc("gen.cash.poor"), True)
+
+    session.close()
+
 @base_game_cmds.command(name = "tfadd", description = "Add a TF to a player")
 @option("player", User, description = "The player to add a TF to")
 @option("description", str, description = "What the TF is", min_length = 1, max_length = 100)
@@ -546,34 +638,65 @@ async def tflist(context: ApplicationContext, player: User):
             # Viewing own tfs
             log(loc("gen.tfl.self.log", get_time(), context.guild, context.channel, context.author))
             entries = "".join([
-                loc("gen.tfl.entry.self", entry[0], entry[1], loc_arr("gen.tfl.types", entry[2]))
+                loc("gen.tfl.entry.self", entry.description, entry.cost, loc_arr("gen.tfl.types", entry.cost_type))
                 for entry in target.get_tf_entry()
-                if entry[3]
+                if entry.done
             ])
             await ghost_reply(context, loc("gen.tfl.self", entries), True)
         else:
             # Viewing other's tfs
             log(loc("gen.tfl.other.log", get_time(), context.guild, context.channel, context.author, player))
-            unfinished = "".join([
-                loc("gen.tfl.entry.other", index, entry[0], entry[1], loc_arr("gen.tfl.types", entry[2]))
-                for index, entry in enumerate(target.get_tf_entry())
-                if not entry[3]
-            ])
-            finished = "".join([
-                loc("gen.tfl.entry.other", index, entry[0], entry[1], loc_arr("gen.tfl.types", entry[2]))
-                for index, entry in enumerate(target.get_tf_entry())
-                if entry[3]
-            ])
-            await ghost_reply(context, loc("gen.tfl.other", target.name, unfinished, finished), True)
+            unfinished = []
+            finished = []
+            for entry in target.get_tf_entry():
+                (finished if entry.done else unfinished).append(
+                    loc("gen.tfl.entry.other", entry.position, entry.description, entry.cost, loc_arr("gen.tfl.types", entry.cost_type))
+                )
+            await ghost_reply(context, loc("gen.tfl.other", target.name, "".join(unfinished), "".join(finished), format_chips(target.tf_owed)), True)
     
     session.close()
 
 
+def create_game_cmds(name: str, description: str, game_type: type[Game]) -> SlashCommandGroup:
+    """Copy the template commands into a new group for a game type and register it to Discord
+
+    Every command in the group has .game_type set to the given Game subclass.
+    The bet command also has .start_round, which the game's module sets to a coroutine
+    taking the context, session and game, called within /bet once every bet is aligned.
+
+    ### Parameters
+    name: str
+        Name of the command group, i.e. the command prefix
+    description: str
+        Description of the command group
+    game_type: type[Game]
+        Game subclass the commands in the group operate on
+
+    ### Returns
+    discord.SlashCommandGroup
+        The registered command group; add game-specific commands to it
+    """
+
+    cmds = base_game_cmds.copy()
+    cmds.name = name
+    cmds.description = description
+    for i, cmd in enumerate(cmds.subcommands):
+        cmd = cmd.copy()
+        cmd.game_type = game_type
+        if cmd.name == "bet":
+            cmd.start_round = None
+        cmds.subcommands[i] = cmd
+    bot_client.add_application_command(cmds)
+
+    return cmds
+
+
 game_admin_cmds = admin_cmds.create_subgroup("game", "Admin commands directly related to games in general")
 
 @game_admin_cmds.command(name = "force_end_game", description = "Admin command to end a game in this channel")
+@option("cash_out", bool, description = "Whether to move every player's chips into their account under their name", default = False)
 @option("private", bool, description = "Whether to keep the response only visible to you", default = False)
-async def admin_force_end_game(context: ApplicationContext, private: bool):
+async def admin_force_end_game(context: ApplicationContext, cash_out: bool, private: bool):
     """Add the command /admin game force_end_game
     
     Delete a game
@@ -587,8 +710,11 @@ async def admin_force_end_game(context: ApplicationContext, private: bool):
         await ghost_reply(context, loc("admin.gen.none"), True)
     else:
         log(loc("admin.gen.end.log", get_time(), context.guild, context.channel, context.author))
-        game.end(session)
-        await ghost_reply(context, loc("admin.gen.end"), private)
+        message = [loc("admin.gen.end")]
+        for cashed_name, account_name, cashed in game.end(session, cash_out):
+            log(loc("admin.gen.end.cashout.log", cashed_name, cashed, account_name))
+            message.append(loc("admin.gen.end.cashout", cashed_name, format_chips(cashed), account_name))
+        await ghost_reply(context, "".join(message), private)
 
     session.close()
 
@@ -637,7 +763,7 @@ async def admin_set_chips(context: ApplicationContext, user: User, physical: int
     session = database_connector()
 
     # Extract chip args
-    chips: list[int] = list(locals().values())[2:8]
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
 
     game = Game.find_game(session, context.channel_id)
     if game is None:
@@ -673,7 +799,7 @@ async def admin_set_used(context: ApplicationContext, user: User, physical: int,
     session = database_connector()
 
     # Extract chip args
-    chips: list[int] = list(locals().values())[2:8]
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
 
     game = Game.find_game(session, context.channel_id)
     if game is None:
@@ -708,7 +834,7 @@ async def admin_set_bet(context: ApplicationContext, physical: int, mental: int,
     session = database_connector()
 
     # Extract chip args
-    chips: list[int] = list(locals().values())[1:7]
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
 
     game = Game.find_game(session, context.channel_id)
     if game is None:
@@ -841,9 +967,7 @@ async def admin_swap(context: ApplicationContext, user1: User, user2: User):
         else:
             log(loc("admin.gen.swap.log", get_time(), context.guild, context.channel, context.author, user1, user2))
 
-            temp_tfs = player1.get_tf_entry()
-            player1.set_tf_entry(session, player2.get_tf_entry())
-            player2.set_tf_entry(session, temp_tfs)
+            player1.swap_tf_entries(session, player2)
 
             await ghost_reply(context, loc("admin.gen.swap", player1.name, player2.name), True)
 
@@ -2,25 +2,19 @@
 
 print("Loading module 'miscgame'...")
 
-from random import randint
-
 from discord import ApplicationContext, option
+from sqlalchemy.orm import Session
 
-from ..base.bot import bot_client, database_connector
+from ..base.bot import database_connector
+from ..base.rng import unseeded
 from ..base.auxiliary import log, loc, get_time, ghost_reply, InvalidArgumentError
 from ..base.dbmodels import Misc, MiscPlayer
 from ..base.emojis import standard_deck, format_cards, format_chips
-from .game import base_game_cmds
+from .game import create_game_cmds
+from .registry import register_game
 
 # Inherit and register command group to Discord
-mg_cmds = base_game_cmds.copy()
-mg_cmds.name = "mg"
-mg_cmds.description = "Commands to run a Miscellaneous game"
-for i, cmd in enumerate(mg_cmds.subcommands):
-    cmd = cmd.copy()
-    cmd.game_type = Misc
-    mg_cmds.subcommands[i] = cmd
-bot_client.add_application_command(mg_cmds)
+mg_cmds = create_game_cmds("mg", "Commands to run a Miscellaneous game", Misc)
 
 
 @mg_cmds.command(name = "shuffle", description = "Shuffle the standard deck in this game")
@@ -135,8 +129,16 @@ async def mg_roll(context: ApplicationContext, amount: int, sides: int, private:
     
     Roll an amount of dice
     """
-    dice = [randint(1, sides) for i in range(amount)]
+
+    # Rolls at a table come from that game's own stream and are logged, so they can be reproduced
+    session = database_connector()
+    game: Misc = Misc.find_game(session, context.channel_id)
+    if game is None:
+        dice = [unseeded.randint(1, sides) for i in range(amount)]
+    else:
+        dice = game.roll(session, context.author.id, amount, sides)
     total = sum(dice)
+    session.close()
 
     log(loc("mg.roll.log", get_time(), context.guild, context.channel, context.author, amount, sides, total))
     
@@ -172,28 +174,23 @@ async def mg_win_bet(
 
     session.close()
 
-async def mg_start_round(context: ApplicationContext):
-    """Test for round start"""
-
-    session = database_connector()
-
-    game: Misc = Misc.find_game(session, context.channel_id)
+async def mg_start_round(context: ApplicationContext, session: Session, game: Misc):
+    """Announce a round once every bet is aligned; the round's bet has already been set
 
-    # Game must exist, and bets must be placed outside of round
-    if game is not None and not game.is_midround() and game.bets_aligned():
-        log(loc("mg.start.log", get_time(), context.guild, context.channel))
-        bet_placed = game.players[0].get_bet()
-        game.set_bet(session, bet_placed)
-        
-        await context.channel.send(loc("mg.start"))
-        
-        # Ping everyone for beginning of round
-        await context.channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
+    Called from within /mg bet, in its session; not to be called on its own
+    """
 
-    session.close()
+    log(loc("mg.start.log", get_time(), context.guild, context.channel))
+    
+    await context.channel.send(loc("mg.start"))
+    
+    # Ping everyone for beginning of round
+    await context.channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
 
-# Register round start logic to invoke after betting
+# Register round start logic, run by betting once bets are aligned
 for cmd in mg_cmds.walk_commands():
     if cmd.name == "bet":
-        cmd.after_invoke(mg_start_round)
-        break
\ No newline at end of file
+        cmd.start_round = mg_start_round
+        break
+
+register_game("mg", Misc, mg_cmds)
\ No newline at end of file
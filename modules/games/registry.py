@@ -0,0 +1,74 @@
+"""Registry of every game type the bot knows of; only the enabled ones are ever imported"""
+
+print("Loading module 'registry'...")
+
+from importlib import import_module
+
+from ..base.auxiliary import log, get_time, loc
+
+game_modules: dict[str, str] = {
+    "mg": "modules.games.miscgame",
+    "bj": "modules.games.blackjack",
+    "ty": "modules.games.tourney",
+}
+"""Command prefix of each game type mapped to the module implementing it; modules are imported on load_games()"""
+
+class GameEntry:
+    """Everything the rest of the bot needs to know about a loaded game type
+
+    ### Attributes
+    prefix: str
+        Name of the game's command group, e.g. 'bj'
+    game_type: type[Game]
+        Game subclass backing this game type
+    cmds: discord.SlashCommandGroup
+        Player-facing command group of the game
+    """
+
+    __slots__ = ("prefix", "game_type", "cmds")
+
+    def __init__(self, prefix: str, game_type: type, cmds):
+        self.prefix = prefix
+        self.game_type = game_type
+        self.cmds = cmds
+
+registered_games: dict[str, GameEntry] = {}
+"""Command prefix mapped to entry, for every game type that has been loaded; modules loaded after the games,
+e.g. modules.misc.misc, look up the games they build on here"""
+
+def register_game(prefix: str, game_type: type, cmds) -> GameEntry:
+    """Declare a game type; to be called by each game module once its commands are set up
+
+    ### Parameters
+    prefix: str
+        Name of the game's command group
+    game_type: type[Game]
+        Game subclass backing this game type
+    cmds: discord.SlashCommandGroup
+        Player-facing command group of the game
+
+    ### Returns
+    GameEntry
+        The newly registered entry
+    """
+
+    entry = GameEntry(prefix, game_type, cmds)
+    registered_games[prefix] = entry
+    return entry
+
+def load_games(enabled: list[str]) -> None:
+    """Import the modules of every enabled game type, registering their commands
+
+    ### Parameters
+    enabled: list[str]
+        Command prefixes of the game types to load; unknown ones are logged and skipped
+    """
+
+    for prefix in enabled:
+        if prefix not in game_modules:
+            log(loc("games.unknown", get_time(), prefix))
+            continue
+
+        import_module(game_modules[prefix])
+
+    log(loc("games.loaded", get_time(), ", ".join(f"{entry.prefix} ({entry.game_type.__name__})" for entry in registered_games.values())))
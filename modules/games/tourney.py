@@ -3,22 +3,20 @@
 print("Loading module 'tourney'...")
 
 from discord import ApplicationContext, option
+from discord.abc import Messageable
+from sqlalchemy.orm import Session
 
-from ..base.bot import bot_client, database_connector
+from ..base.bot import database_connector
 from ..base.auxiliary import log, loc, loc_arr, get_time, ghost_reply
 from ..base.dbmodels import Tourney, TourneyPlayer
 from ..base.emojis import standard_deck, format_cards, format_chips
-from .game import base_game_cmds
+from ..base.rules import card_face
+from ..base.timers import on_turn_timeout
+from .game import create_game_cmds
+from .registry import register_game
 
 # Inherit and register command group to Discord
-ty_cmds = base_game_cmds.copy()
-ty_cmds.name = "ty"
-ty_cmds.description = "Commands to run the game of Tourney"
-for i, cmd in enumerate(ty_cmds.subcommands):
-    cmd = cmd.copy()
-    cmd.game_type = Tourney
-    ty_cmds.subcommands[i] = cmd
-bot_client.add_application_command(ty_cmds)
+ty_cmds = create_game_cmds("ty", "Commands to run the game of Tourney", Tourney)
 
 
 @ty_cmds.command(name = "hand", description = "Review the cards in your hand")
@@ -50,7 +48,7 @@ async def ty_hand(
             # Show own hand
             await ghost_reply(context, loc("ty.hand", "".join([loc("ty.hand.card",
                     i + 1,
-                    standard_deck[card[0]],
+                    standard_deck[card_face(card[0])],
                     loc_arr("ty.hand.card.played", card[1])
                     )
                 for i, card in enumerate(player.get_hand())
@@ -87,7 +85,7 @@ async def ty_recon(
                         loc("ty.recon.opp",
                             other_player.points,
                             other_player.name,
-                            format_cards(standard_deck, [card[0] for card in other_player.get_hand() if card[1]])
+                            format_cards(standard_deck, [card_face(card[0]) for card in other_player.get_hand() if card[1]])
                             )
                         for other_player in game.players
                         if other_player != player
@@ -99,7 +97,7 @@ async def ty_recon(
     session.close()
 
 @ty_cmds.command(name = "play", description = "Choose one of your cards to send into the Tourney")
-@option("card", int, description = "Which card to play", min_value = 1, max_value = 8)
+@option("card", int, description = "Which card to play", min_value = 1, max_value = Tourney.max_players + 2)
 async def ty_play(context: ApplicationContext, card: int):
     """Add the command /ty play
     
@@ -137,89 +135,119 @@ async def ty_play(context: ApplicationContext, card: int):
 
                     # Test to see if the turn is over
                     if game.all_played():
-                        played = "".join([loc("ty.turn.played",
-                                standard_deck[player.get_hand()[player.played][0]],
-                                player.name
-                                )
-                            for player in game.players
-                            ])
-                        winner: TourneyPlayer = game.evaluate_turn(session)
-
-                        log(loc("ty.turn.log", game.turn - 1, winner.user()))
-
-                        message = [loc("ty.turn",
-                            len(game.players),
-                            played,
-                            winner.name,
-                            winner.name,
-                            winner.points
-                            )]
-                        
-                        # Test to see if the round is over
-                        if game.turn <= len(game.players) + 1:
-                            # Round not over, next turn
-                            message.append(loc("ty.turn.next", game.turn))
-                        else:
-                            # Round over
-                            winners = game.end_round(session)
-                            winners_unsorted = [player for player in game.players if player in winners]
-
-                            log(loc("ty.turn.end.log", winners[0].user()))
-
-                            message.append(loc("ty.turn.end",
-                                "".join([loc("ty.turn.points", player.name, player.points)
-                                    for player in game.players
-                                    ]),
-                                loc("ty.turn.tie",
-                                        ", ".join([winner.name for winner in winners_unsorted]),
-                                        "".join([loc("ty.turn.played", standard_deck[winner.tiebreaker()], winner.name)
-                                            for winner in winners_unsorted
-                                            ]),
-                                        winners[0].name
-                                        )
-                                    if len(winners) > 1
-                                    else "",
-                                winners[0].name,
-                                loc("ty.turn.over", winners[0].points, winners[0].points - 1)
-                                    if winners[0].points > 2
-                                    else "",
-                                winners[0].name,
-                                format_chips(winners[0].get_chips()),
-                                game.get_bet_turn().name
-                                ))
-
-                        await context.channel.send("".join(message))
-
-                        # Ping everyone for end of match/round
-                        await context.channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
+                        await ty_end_turn(context.channel, session, game)
 
     session.close()
 
-async def ty_start_round(context: ApplicationContext):
-    """Test for round start"""
+async def ty_end_turn(channel: Messageable, session: Session, game: Tourney) -> None:
+    """Compare the cards played once everyone has played, then move on to the next turn or end the round
+    
+    ### Parameters
+    channel: discord.abc.Messageable
+        Channel of the game
+    session: sqlalchemy.orm.Session
+        Current database scope
+    game: Tourney
+        The tourney game whose turn is over
+    """
 
-    session = database_connector()
+    played = "".join([loc("ty.turn.played",
+            standard_deck[card_face(player.get_hand()[player.played][0])],
+            player.name
+            )
+        for player in game.players
+        ])
+    winner: TourneyPlayer = game.evaluate_turn(session)
+
+    log(loc("ty.turn.log", game.turn - 1, winner.user()))
+
+    message = [loc("ty.turn",
+        len(game.players),
+        played,
+        winner.name,
+        winner.name,
+        winner.points
+        )]
+
+    # Test to see if the round is over
+    if game.turn <= len(game.players) + 1:
+        # Round not over, next turn
+        message.append(loc("ty.turn.next", game.turn))
+    else:
+        # Round over
+        winners = game.end_round(session)
+        winners_unsorted = [player for player in game.players if player in winners]
+
+        log(loc("ty.turn.end.log", winners[0].user()))
+
+        message.append(loc("ty.turn.end",
+            "".join([loc("ty.turn.points", player.name, player.points)
+                for player in game.players
+                ]),
+            loc("ty.turn.tie",
+                    ", ".join([winner.name for winner in winners_unsorted]),
+                    "".join([loc("ty.turn.played", standard_deck[card_face(winner.tiebreaker())], winner.name)
+                        for winner in winners_unsorted
+                        ]),
+                    winners[0].name
+                    )
+                if len(winners) > 1
+                else "",
+            winners[0].name,
+            loc("ty.turn.over", winners[0].points, winners[0].points - 1)
+                if winners[0].points > 2
+                else "",
+            winners[0].name,
+            format_chips(winners[0].get_chips()),
+            game.get_bet_turn().name
+            ))
 
-    game: Tourney = Tourney.find_game(session, context.channel_id)
+    await channel.send("".join(message))
 
-    # Game must exist, and bets must be placed outside of round
-    if game is not None and not game.is_midround() and game.bets_aligned():
-        log(loc("ty.start.log", get_time(), context.guild, context.channel))
+    # Ping everyone for end of match/round
+    await channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
 
-        bet_placed = game.players[0].get_bet()
-        game.set_bet(session, bet_placed)
+    # No need to close session; this function is not to be called on its own
 
-        game.start_round(session)
-        
-        await context.channel.send(loc("ty.start", len(game.players) + 2), len(game.players) + 1)
-        
-        # Ping everyone for beginning of match
-        await context.channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
+@on_turn_timeout("tourney")
+async def ty_turn_timeout(channel: Messageable, session: Session, game_id: int) -> None:
+    """Play a card for everyone who hasn't by the end of the turn, then carry on as if they had
 
-    session.close()
+    Plays their first unplayed card, i.e. the one they would keep as tiebreaker otherwise.
+    """
+
+    game: Tourney = Tourney.find_game(session, game_id)
+    if game is None or not game.is_midround():
+        return
+
+    late: list[TourneyPlayer] = [player for player in game.players if player.played == -1]
+    for player in late:
+        player.play_card(session, next(i for i, card in enumerate(player.get_hand()) if not card[1]))
 
-# Register round start logic to invoke after betting
+    log(loc("ty.timeout.log", get_time(), channel.guild, channel, [player.name for player in late]))
+    await channel.send(loc("ty.timeout", ", ".join([player.name for player in late])))
+
+    await ty_end_turn(channel, session, game)
+
+async def ty_start_round(context: ApplicationContext, session: Session, game: Tourney):
+    """Start a round once every bet is aligned; the round's bet has already been set
+
+    Called from within /ty bet, in its session; not to be called on its own
+    """
+
+    log(loc("ty.start.log", get_time(), context.guild, context.channel))
+
+    game.start_round(session)
+    
+    await context.channel.send(loc("ty.start", len(game.players) + 2), len(game.players) + 1)
+    
+    # Ping everyone for beginning of match
+    await context.channel.send(" ".join([player.mention() for player in game.players]), delete_after = 0)
+
+# Register round start logic, run by betting once bets are aligned
 for cmd in ty_cmds.walk_commands():
     if cmd.name == "bet":
-        cmd.after_invoke(ty_start_round)
-        break
\ No newline at end of file
+        cmd.start_round = ty_start_round
+        break
+
+register_game("ty", Tourney, ty_cmds)
\ No newline at end of file
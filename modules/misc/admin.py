@@ -4,8 +4,11 @@ print("Loading module 'admin'...")
 
 from discord import ApplicationContext
 
-from ..base.bot import bot_client
-from ..base.auxiliary import perms, guilds, log, get_time, ghost_reply, loc
+from ..base.bot import bot_client, database_connector
+from ..base.auxiliary import perms, guilds, log, get_time, ghost_reply, loc, command_path
+from ..base.dbmodels import Game
+from ..base.events import EventKind, record
+from ..base.shutdown import request_shutdown
 
 admin_cmds = bot_client.create_group("admin", "Commands that only an admin can use", guild_ids = guilds)
 
@@ -30,7 +33,34 @@ async def check_admin(context: ApplicationContext) -> bool:
         await ghost_reply(context, loc("admin.deny"), True)
         return False
     
+async def record_admin(context: ApplicationContext) -> bool:
+    """Global check that logs admin commands to the event log of the channel's game, if any; always passes
+
+    Whatever the command changes is logged after this as usual, so replays show which changes were overrides.
+    
+    ### Parameters
+    context: discord.ApplicationContext
+        Application command context
+
+    ### Returns
+    True
+    """
+
+    name, options = command_path(context.interaction.data)
+    if not name.startswith("admin ") or context.author.id not in perms["admin"]:
+        return True
+
+    session = database_connector()
+
+    if Game.find_game(session, context.channel_id) is not None:
+        record(session, context.channel_id, EventKind.ADMIN, context.author.id, command = name, options = options)
+        session.commit()
+
+    session.close()
+    return True
+
 admin_cmds.checks = [check_admin]
+bot_client.add_check(record_admin, call_once = True)
 
 @admin_cmds.command(name = "bad_girl", description = "Admin command to shut C1RC3 down")
 async def shutdown(context: ApplicationContext):
@@ -41,5 +71,5 @@ async def shutdown(context: ApplicationContext):
 
     log(loc("admin.shutdown.log", get_time(), context.guild, context.channel, context.author))
     await context.respond(loc("admin.shutdown"))
-    await bot_client.close()
-    quit()
+    # Actual shutdown waits for this and every other running command to finish
+    request_shutdown()
@@ -2,15 +2,22 @@
 
 print("Loading module 'chips'...")
 
-from discord import ApplicationContext, option
+from discord import ApplicationContext, AutocompleteContext, option
 
 from ..base.bot import bot_client, database_connector
-from ..base.auxiliary import guilds, log, loc, get_time, all_zero, ghost_reply
+from ..base.auxiliary import guilds, log, loc, loc_arr, get_time, ghost_reply
 from ..base.dbmodels import ChipAccount
+from ..base.chipvector import ChipVector
 from ..base.emojis import format_chips
+from ..base import nameindex
 
 chip_cmds = bot_client.create_group("chip", "Commands related to chip-holding accounts out of game", guild_ids = guilds)
 
+async def owned_names(context: AutocompleteContext) -> list[str]:
+    """Suggest the names of the user's own accounts that start with what has been typed"""
+
+    return nameindex.complete(context.interaction.user.id, context.value)
+
 @chip_cmds.command(name = "open_account", description = "Open an account for you to keep track of the chips you've won from tables.")
 @option("name", str, description = "The name of the character holding the account", min_length = 1, max_length = 50)
 @option("private", bool, description = "Whether to keep the response only visible to you")
@@ -34,7 +41,7 @@ async def open_account(context: ApplicationContext, name: str, private: bool):
     session.close()
 
 @chip_cmds.command(name = "change_name", description = "Update the holder's name on an account.")
-@option("name", str, description = "The original name of the casino account", min_length = 1, max_length = 50)
+@option("name", str, description = "The original name of the casino account", min_length = 1, max_length = 50, autocomplete = owned_names)
 @option("new_name", str, description = "The new name of the account", min_length = 1, max_length = 50)
 @option("private", bool, description = "Whether to keep the response only visible to you")
 async def change_name(context: ApplicationContext, name: str, new_name: str, private: bool):
@@ -60,8 +67,8 @@ async def change_name(context: ApplicationContext, name: str, new_name: str, pri
         session.close()
         return
 
-    # Check if account with new name already exists
-    if ChipAccount.find_account(session, new_name):
+    # Check if account with new name already exists; only changing the case of the name is fine
+    if ChipAccount.find_account(session, new_name) not in (None, account):
         log(loc("chips.name.dupe.log", get_time(), context.guild, context.channel, context.author, name, new_name))
         await ghost_reply(context, loc("chips.dupe", new_name), True)
         session.close()
@@ -80,7 +87,7 @@ async def change_name(context: ApplicationContext, name: str, new_name: str, pri
     session.close()
 
 @chip_cmds.command(name = "balance", description = "Check how many chips you have in an account.")
-@option("name", str, description = "The name the account is under", min_length = 1, max_length = 50)
+@option("name", str, description = "The name the account is under", min_length = 1, max_length = 50, autocomplete = owned_names)
 @option("private", bool, description = "Whether to keep the response only visible to you")
 async def balance(context: ApplicationContext, name: str, private: bool):
     """Add the command /chip balance
@@ -106,12 +113,33 @@ async def balance(context: ApplicationContext, name: str, private: bool):
         return
 
     log(loc("chips.bal.log", get_time(), context.guild, context.channel, context.author, name))
-    await ghost_reply(context, loc("chips.bal", name, format_chips(account.get_bal())), private)
+    await ghost_reply(context, loc("chips.bal", account.name, format_chips(account.get_bal())), private)
+
+    session.close()
+
+@chip_cmds.command(name = "accounts", description = "List the accounts you own.")
+@option("private", bool, description = "Whether to keep the response only visible to you")
+async def accounts(context: ApplicationContext, private: bool):
+    """Add the command /chip accounts
+    
+    List every chip account of the user
+    """
+
+    session = database_connector()
+
+    owned = ChipAccount.owned_by(session, context.author.id)
+
+    log(loc("chips.list.log", get_time(), context.guild, context.channel, context.author, len(owned)))
+    if len(owned) == 0:
+        await ghost_reply(context, loc("chips.list.none"), True)
+    else:
+        entries = "".join([loc("chips.list.entry", account.name, format_chips(account.get_bal())) for account in owned])
+        await ghost_reply(context, loc("chips.list", entries), private)
 
     session.close()
 
 @chip_cmds.command(name = "deposit", description = "Deposit an amount of chips into an account.")
-@option("name", str, description = "The name the account is under", min_length = 1, max_length = 50)
+@option("name", str, description = "The name the account is under", min_length = 1, max_length = 50, autocomplete = owned_names)
 @option("private", bool, description = "Whether to keep the response only visible to you")
 @option("physical", int, description = "The amount of physical chips to deposit", min_value = 0, default = 0)
 @option("mental", int, description = "The amount of mental chips to deposit", min_value = 0, default = 0)
@@ -126,10 +154,10 @@ async def deposit(context: ApplicationContext, name: str, private: bool, physica
     """
 
     # Grab chip params
-    chips: list[int] = list(locals().values())[3:9]
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
 
     # If every single parameter is 0
-    if all_zero(chips):
+    if chips.is_zero():
         log(loc("chips.depo.zero.log", get_time(), context.guild, context.channel, context.author))
         await ghost_reply(context, loc("chips.depo.zero"), True)
         return
@@ -151,14 +179,14 @@ async def deposit(context: ApplicationContext, name: str, private: bool, physica
     
     log(loc("chips.depo.log", get_time(), context.guild, context.channel, context.author, chips, name))
     
-    account.deposit(session, chips)
+    account.deposit(session, chips, context.author.id)
 
-    await ghost_reply(context, loc("chips.depo", name, format_chips(account.get_bal())), private)
+    await ghost_reply(context, loc("chips.depo", account.name, format_chips(account.get_bal())), private)
 
     session.close()
 
 @chip_cmds.command(name = "withdraw", description = "Withdraw an amount of chips from an account.")
-@option("name", str, description = "The name the account is under", min_length = 1, max_length = 50)
+@option("name", str, description = "The name the account is under", min_length = 1, max_length = 50, autocomplete = owned_names)
 @option("private", bool, description = "Whether to keep the response only visible to you")
 @option("physical", int, description = "The amount of physical chips to withdraw", min_value = 0, default = 0)
 @option("mental", int, description = "The amount of mental chips to withdraw", min_value = 0, default = 0)
@@ -174,10 +202,10 @@ async def withdraw(
     """
 
     # Grab chip params
-    chips: list[int] = list(locals().values())[3:9]
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
 
     # If every single parameter is 0
-    if all_zero(chips):
+    if chips.is_zero():
         log(loc("chips.with.zero.log", get_time(), context.guild, context.channel, context.author))
         await ghost_reply(context, loc("chips.with.zero"), True)
         return
@@ -199,7 +227,7 @@ async def withdraw(
         session.close()
         return
 
-    success: bool = account.withdraw(session, chips)
+    success: bool = account.withdraw(session, chips, context.author.id)
 
     if not success:
         log(loc("chips.with.fail.log", get_time(), context.guild, context.channel, context.author, name))
@@ -207,6 +235,113 @@ async def withdraw(
     else:
         log(loc("chips.with.log", get_time(), context.guild, context.channel, context.author, chips, name))
 
-        await ghost_reply(context, loc("chips.with", name, format_chips(account.get_bal())), private)
+        await ghost_reply(context, loc("chips.with", account.name, format_chips(account.get_bal())), private)
 
-    session.close()
\ No newline at end of file
+    session.close()
+
+@chip_cmds.command(name = "transfer", description = "Move an amount of chips from one of your accounts to another account.")
+@option("name", str, description = "The name the account to take the chips from is under", min_length = 1, max_length = 50, autocomplete = owned_names)
+@option("target", str, description = "The name the account to move the chips to is under", min_length = 1, max_length = 50)
+@option("private", bool, description = "Whether to keep the response only visible to you")
+@option("physical", int, description = "The amount of physical chips to transfer", min_value = 0, default = 0)
+@option("mental", int, description = "The amount of mental chips to transfer", min_value = 0, default = 0)
+@option("artificial", int, description = "The amount of artificial chips to transfer", min_value = 0, default = 0)
+@option("supernatural", int, description = "The amount of supernatural chips to transfer", min_value = 0, default = 0)
+@option("merge", int, description = "The amount of merge chips to transfer", min_value = 0, default = 0)
+@option("swap", int, description = "The amount of swap chips to transfer", min_value = 0, default = 0)
+async def transfer(
+    context: ApplicationContext, name: str, target: str, private: bool, physical: int, mental: int, artificial: int, supernatural: int, merge: int, swap: int):
+    """Add the command /chip transfer
+    
+    Move chips between chip accounts in one transaction
+    """
+
+    # Grab chip params
+    chips = ChipVector((physical, mental, artificial, supernatural, merge, swap))
+
+    # If every single parameter is 0
+    if chips.is_zero():
+        log(loc("chips.tran.zero.log", get_time(), context.guild, context.channel, context.author))
+        await ghost_reply(context, loc("chips.tran.zero"), True)
+        return
+
+    session = database_connector()
+
+    # Attempt to retrieve both accounts
+    account = ChipAccount.find_account(session, name)
+    target_account = ChipAccount.find_account(session, target)
+    if account is None or target_account is None:
+        log(loc("chips.none.log", get_time(), context.guild, context.channel, context.author, name if account is None else target))
+        await ghost_reply(context, loc("chips.none"), True)
+        session.close()
+        return
+
+    # Check if the account taken from belongs to the person sending the command; any account can be given to
+    if account.owner_id != context.author.id:
+        log(loc("chips.tran.other.log", get_time(), context.guild, context.channel, context.author, name))
+        await ghost_reply(context, loc("chips.other"), True)
+        session.close()
+        return
+
+    if account.id == target_account.id:
+        log(loc("chips.tran.same.log", get_time(), context.guild, context.channel, context.author, name))
+        await ghost_reply(context, loc("chips.tran.same"), True)
+        session.close()
+        return
+
+    success: bool = account.transfer(session, target_account, chips, context.author.id)
+
+    if not success:
+        log(loc("chips.tran.fail.log", get_time(), context.guild, context.channel, context.author, name))
+        await ghost_reply(context, loc("chips.tran.fail"), True)
+    else:
+        log(loc("chips.tran.log", get_time(), context.guild, context.channel, context.author, chips, account.name, target_account.name))
+
+        await ghost_reply(context, loc("chips.tran", account.name, target_account.name, format_chips(chips), account.name, format_chips(account.get_bal())), private)
+
+    session.close()
+
+@chip_cmds.command(name = "history", description = "See the latest changes to an account's balance.")
+@option("name", str, description = "The name the account is under", min_length = 1, max_length = 50, autocomplete = owned_names)
+@option("private", bool, description = "Whether to keep the response only visible to you")
+async def history(context: ApplicationContext, name: str, private: bool):
+    """Add the command /chip history
+    
+    View the latest ledger entries of a chip account
+    """
+
+    session = database_connector()
+
+    # Attempt to retrieve account
+    account = ChipAccount.find_account(session, name)
+    if account is None:
+        log(loc("chips.none.log", get_time(), context.guild, context.channel, context.author, name))
+        await ghost_reply(context, loc("chips.none"), True)
+        session.close()
+        return
+
+    # Check if account belongs to the person sending the command
+    if account.owner_id != context.author.id:
+        log(loc("chips.hist.other.log", get_time(), context.guild, context.channel, context.author, name))
+        await ghost_reply(context, loc("chips.other"), True)
+        session.close()
+        return
+
+    log(loc("chips.hist.log", get_time(), context.guild, context.channel, context.author, name))
+    entries = account.history(10)
+    if len(entries) == 0:
+        await ghost_reply(context, loc("chips.hist.none", account.name), private)
+    else:
+        lines = "".join([
+            loc("chips.hist.entry",
+                entry.time,
+                loc_arr("chips.hist.reason", entry.reason),
+                loc("chips.hist.in", format_chips(entry.delta))
+                    if entry.delta.nonnegative()
+                    else loc("chips.hist.out", format_chips(-entry.delta))
+                )
+            for entry in entries
+        ])
+        await ghost_reply(context, loc("chips.hist", account.name, lines, format_chips(account.get_bal())), private)
+
+    session.close()
@@ -0,0 +1,64 @@
+"""Contains the leaderboard of who has won the most rounds, drawn from the statistics kept as rounds end"""
+
+print("Loading module 'leaderboard'...")
+
+from discord import ApplicationContext, OptionChoice, option
+from sqlalchemy import select
+
+from ..base.bot import bot_client, database_connector
+from ..base.auxiliary import guilds, log, loc, loc_arr, get_time, ghost_reply
+from ..base.dbmodels import UserStats, AccountStats, ChipAccount, stat_periods
+from ..base.emojis import format_chips
+
+@bot_client.slash_command(name = "leaderboard", description = "See who has won the most rounds", guild_ids = guilds)
+@option("period", int, description = "Which rounds to count", choices = [
+    OptionChoice("This month", 0),
+    OptionChoice("All time", 1)
+    ])
+@option("by", int, description = "Whether to rank players or characters", choices = [
+    OptionChoice("Players", 0),
+    OptionChoice("Characters", 1)
+    ])
+@option("private", bool, description = "Whether to keep the response only visible to you")
+async def leaderboard(context: ApplicationContext, period: int, by: int, private: bool):
+    """Add the command /leaderboard
+
+    Show the top 10 winners of a period
+    """
+
+    log(loc("board.log", get_time(), context.guild, context.channel, context.author, loc_arr("board.by", by), loc_arr("board.period", period)))
+
+    stats_type = (UserStats, AccountStats)[by]
+    session = database_connector()
+
+    # Walks the (period, wins) index from the top
+    top = session.scalars(
+        select(stats_type)
+        .where(stats_type.period == stat_periods()[period])
+        .order_by(stats_type.wins.desc())
+        .limit(10)
+    ).all()
+
+    if len(top) == 0:
+        await ghost_reply(context, loc("board.none"), True)
+    else:
+        if by == 1:
+            # Current names of the accounts, in one query
+            names = dict(session.execute(
+                select(ChipAccount.id, ChipAccount.name).where(ChipAccount.id.in_([stats.account_id for stats in top]))
+            ).all())
+
+        lines = []
+        for rank, stats in enumerate(top, 1):
+            if by == 0:
+                user = bot_client.get_user(stats.user_id)
+                name = str(stats.user_id) if user is None else user.display_name
+            else:
+                name = names.get(stats.account_id, str(stats.account_id))
+            lines.append(loc("board.line", rank, name, stats.wins, stats.rounds, format_chips(stats.won)))
+            if stats.blackjacks > 0 or stats.charlies > 0:
+                lines.append(loc("board.line.bj", stats.blackjacks, stats.charlies))
+
+        await ghost_reply(context, loc("board", loc_arr("board.by", by), loc_arr("board.period", period), "".join(lines)), private)
+
+    session.close()
@@ -2,17 +2,12 @@
 
 print("Loading module 'misc'...")
 
-from random import randint
-
 from discord import ApplicationContext, User, option, SlashCommand
 
 from ..base.bot import bot_client
+from ..base.rng import unseeded
 from ..base.auxiliary import guilds, log, loc, loc_arr, get_time
-try:
-    from ..games.miscgame import mg_roll
-    misc_exists = True
-except ImportError:
-    misc_exists = False
+from ..games.registry import registered_games
 
 @bot_client.slash_command(name = "good_girl", description = "Reward <3", guild_ids = guilds)
 @option("user", User, description = "User to target with love")
@@ -25,15 +20,17 @@ async def headpat(context: ApplicationContext, user: User, user2: User):
         
     if user2 is None:
         log(loc("pat.log.single", get_time(), context.guild, context.channel, context.author, user))
-        await context.respond(loc_arr("pat.single", randint(0, 19)))
+        await context.respond(loc_arr("pat.single", unseeded.randint(0, 19)))
         await context.channel.send(user.mention)
     else:
         log(loc("pat.log.double", get_time(), context.guild, context.channel, context.author, user, user2))
-        await context.respond(loc_arr("pat.double", randint(0, 2)))
+        await context.respond(loc_arr("pat.double", unseeded.randint(0, 2)))
         await context.channel.send(" ".join([user.mention, user2.mention]))
 
-# Only make the alias if the miscgame module even exists
-if misc_exists:
+# Only make the alias if the miscgame module is even enabled
+if (entry := registered_games.get("mg")) is not None:
+    mg_roll = next(cmd for cmd in entry.cmds.subcommands if cmd.name == "roll")
+
     roll_alias = SlashCommand(mg_roll.callback, name = "roll", description = "Roll some dice (does not require a game)", guild_ids = guilds)
     """Add the command /roll
 